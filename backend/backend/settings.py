@@ -98,6 +98,36 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # PDFs de nota fiscal já renderizados (compartilhado entre os workers)
+    'notas_fiscais': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'notas_fiscais',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+}
+
+NOTA_FISCAL_CACHE = 'notas_fiscais'
+
+# Cache dos relatórios (invalidado por sinais; o TTL cobre alterações sem sinal)
+RELATORIOS_CACHE = 'default'
+RELATORIOS_CACHE_TIMEOUT = 60
+
+# Cache em memória da leitura de código de barras no PDV (por processo)
+PRODUTO_CODIGO_BARRAS_CACHE_MAX = 10000
+PRODUTO_CODIGO_BARRAS_CACHE_TTL = 30
+
+# Processos usados para gerar notas fiscais em lote (None = número de CPUs)
+NOTA_FISCAL_LOTE_WORKERS = None
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
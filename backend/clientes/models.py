@@ -60,6 +60,10 @@ class Cliente(models.Model):
         verbose_name = "Cliente"
         verbose_name_plural = "Clientes"
         ordering = ['nome']
+        indexes = [
+            # buscar_por_cpf
+            models.Index(fields=['cpf'], name='cliente_cpf'),
+        ]
 
     def __str__(self):
         cpf_display = self.cpf if self.cpf else "N/A"
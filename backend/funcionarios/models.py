@@ -56,5 +56,11 @@ class Usuario(models.Model):
     senha = models.CharField(max_length=128)
     nivel_acesso = models.CharField(max_length=50,choices=NIVEIS_ACESSO, verbose_name="Nível de Acesso")
 
+    class Meta:
+        indexes = [
+            # Login busca o usuário pelo nome
+            models.Index(fields=['nome'], name='usuario_nome'),
+        ]
+
     def __str__(self):
         return self.nome
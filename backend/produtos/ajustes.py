@@ -0,0 +1,75 @@
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import DecimalField, F, Value
+from django.db.models.functions import Greatest, Least, Round
+from django.utils import timezone
+from reports.cache import invalidar_relatorios
+from .codigo_barras import invalidar_produtos
+from .filtros import filtrar_produtos
+from .models import Produto
+
+# Campo ajustável -> (menor valor, maior valor); o resultado é limitado à faixa
+CAMPOS = {
+    'preco': (Decimal(0), None),
+    'desconto_percentual': (Decimal(0), Decimal(100)),
+}
+OPERACOES = ('percentual', 'valor', 'definir')
+TAMANHO_AMOSTRA = 10
+
+
+def expressao_ajuste(campo, operacao, valor):
+    """
+    Novo valor do campo calculado no banco:
+    - percentual: campo * (1 + valor/100)  (valor negativo reduz)
+    - valor: campo + valor
+    - definir: valor fixo
+    Arredondado para 2 casas e limitado à faixa do campo em CAMPOS.
+    """
+    saida = DecimalField(max_digits=12, decimal_places=2)
+    if operacao == 'percentual':
+        expressao = F(campo) * Value(1 + valor / Decimal(100), output_field=saida)
+    elif operacao == 'valor':
+        expressao = F(campo) + Value(valor, output_field=saida)
+    else:
+        expressao = Value(valor, output_field=saida)
+
+    expressao = Round(expressao, 2, output_field=saida)
+    minimo, maximo = CAMPOS[campo]
+    expressao = Greatest(expressao, Value(minimo, output_field=saida), output_field=saida)
+    if maximo is not None:
+        expressao = Least(expressao, Value(maximo, output_field=saida), output_field=saida)
+    return expressao
+
+
+def ajustar_precos(campo, operacao, valor, filtros=None, ids=None, simular=False):
+    """
+    Aplica um ajuste de preço ou desconto a todos os produtos do filtro
+    (mesmos parâmetros da listagem, ver produtos.filtros) e/ou da lista de ids,
+    em um único UPDATE com F(), sem carregar os produtos.
+    Produtos com o campo nulo só entram quando a operação é "definir".
+    Com simular=True nada é gravado: devolve a quantidade afetada e uma amostra
+    com o valor atual e o novo, calculados pela mesma expressão.
+    """
+    queryset = filtrar_produtos(Produto.objects.all(), filtros or {})
+    if ids is not None:
+        queryset = queryset.filter(pk__in=ids)
+    if operacao != 'definir':
+        queryset = queryset.filter(**{f'{campo}__isnull': False})
+    novo = expressao_ajuste(campo, operacao, valor)
+
+    if simular:
+        amostra = (
+            queryset.annotate(atual=F(campo), novo=novo)
+            .order_by('id')
+            .values('id', 'descricao', 'codigo_barras', 'atual', 'novo')[:TAMANHO_AMOSTRA]
+        )
+        return {'simulacao': True, 'afetados': queryset.count(), 'amostra': list(amostra)}
+
+    with transaction.atomic():
+        # Os ids (travados) só servem para invalidar o cache de leitura do PDV
+        afetados_ids = list(queryset.select_for_update().order_by().values_list('pk', flat=True))
+        afetados = queryset.update(**{campo: novo, 'data_atualizacao': timezone.now()})
+        # update() não dispara sinais: invalida os caches à mão
+        invalidar_produtos(ids=afetados_ids)
+        invalidar_relatorios()
+    return {'simulacao': False, 'afetados': afetados}
@@ -0,0 +1,132 @@
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.db import transaction
+from .models import Produto
+from .serializers import ProdutoLeituraSerializer
+
+# Colunas lidas do banco para montar a resposta da leitura
+CAMPOS = ('id', 'descricao', 'codigo_barras', 'preco', 'desconto_percentual', 'quantidade_estoque', 'ativo')
+
+
+class CacheLRU:
+    """
+    Cache LRU limitado, em memória do processo e seguro entre threads.
+    Guarda também códigos inexistentes (valor None), para que leituras repetidas
+    de um código desconhecido não voltem ao banco. Entradas vencem após `ttl`
+    segundos, o que limita a defasagem de alterações feitas por outros processos.
+    """
+    def __init__(self, tamanho_maximo, ttl):
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl = ttl
+        self._itens = OrderedDict()
+        self._codigos_por_id = {}
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter(self, codigo):
+        """Devolve (encontrado, produto); produto None quando o código não existe"""
+        with self._lock:
+            entrada = self._itens.get(codigo)
+            if entrada is None or entrada[0] < time.monotonic():
+                self.falhas += 1
+                return False, None
+            self._itens.move_to_end(codigo)
+            self.acertos += 1
+            return True, entrada[1]
+
+    def guardar(self, codigo, produto):
+        with self._lock:
+            self._remover(codigo)
+            self._itens[codigo] = (time.monotonic() + self.ttl, produto)
+            if produto is not None:
+                self._codigos_por_id.setdefault(produto['id'], set()).add(codigo)
+            while len(self._itens) > self.tamanho_maximo:
+                antigo, (_, produto_antigo) = self._itens.popitem(last=False)
+                self._desindexar(antigo, produto_antigo)
+
+    def invalidar(self, codigos=(), ids=()):
+        """Remove os códigos informados e todos os códigos já ligados aos ids"""
+        with self._lock:
+            for pk in ids:
+                for codigo in self._codigos_por_id.pop(pk, ()):
+                    self._itens.pop(codigo, None)
+            for codigo in codigos:
+                self._remover(codigo)
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self._codigos_por_id.clear()
+            self.acertos = self.falhas = 0
+
+    def _remover(self, codigo):
+        entrada = self._itens.pop(codigo, None)
+        if entrada is not None:
+            self._desindexar(codigo, entrada[1])
+
+    def _desindexar(self, codigo, produto):
+        if produto is None:
+            return
+        codigos = self._codigos_por_id.get(produto['id'])
+        if codigos is not None:
+            codigos.discard(codigo)
+            if not codigos:
+                del self._codigos_por_id[produto['id']]
+
+
+cache_codigos = CacheLRU(
+    tamanho_maximo=getattr(settings, 'PRODUTO_CODIGO_BARRAS_CACHE_MAX', 10000),
+    ttl=getattr(settings, 'PRODUTO_CODIGO_BARRAS_CACHE_TTL', 30),
+)
+
+
+def buscar_por_codigos(codigos):
+    """
+    Resolve vários códigos de barras: o que estiver em cache não consulta o banco
+    e o restante sai de uma única consulta pelo índice de codigo_barras.
+    Devolve {codigo: produto ou None}. Havendo códigos repetidos no cadastro,
+    vale o produto ativo de menor id.
+    """
+    resultado = {}
+    faltantes = []
+    for codigo in dict.fromkeys(codigos):
+        encontrado, produto = cache_codigos.obter(codigo)
+        if encontrado:
+            resultado[codigo] = produto
+        else:
+            faltantes.append(codigo)
+
+    if faltantes:
+        produtos = (
+            Produto.objects.filter(codigo_barras__in=faltantes)
+            .order_by('-ativo', 'id')
+            .only(*CAMPOS)
+        )
+        encontrados = {}
+        for produto in produtos:
+            if produto.codigo_barras not in encontrados:
+                encontrados[produto.codigo_barras] = dict(ProdutoLeituraSerializer(produto).data)
+        for codigo in faltantes:
+            produto = encontrados.get(codigo)
+            cache_codigos.guardar(codigo, produto)
+            resultado[codigo] = produto
+    return resultado
+
+
+def buscar_por_codigo(codigo):
+    return buscar_por_codigos([codigo])[codigo]
+
+
+def invalidar_produtos(ids=(), codigos=()):
+    """
+    Descarta do cache os produtos alterados. Chamada pelos sinais de Produto e,
+    diretamente, por alterações em massa (update()/bulk_create), que não disparam sinais.
+    Invalida na hora e de novo no commit, para não guardar uma leitura feita
+    antes da transação terminar.
+    """
+    ids, codigos = list(ids), [codigo for codigo in codigos if codigo]
+    cache_codigos.invalidar(codigos=codigos, ids=ids)
+    transaction.on_commit(lambda: cache_codigos.invalidar(codigos=codigos, ids=ids))
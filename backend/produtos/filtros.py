@@ -0,0 +1,83 @@
+from decimal import Decimal, InvalidOperation
+from functools import reduce
+from operator import and_
+from django.db.models import Q
+from rest_framework import serializers
+from .models import normalizar_busca, preco_com_desconto_sql
+
+# ?ordenar= aceitos (com "-" para decrescente); id desempata para a paginação ser estável
+ORDENACOES = ('descricao', 'preco', 'preco_com_desconto', 'quantidade_estoque', 'data_cadastro', 'id')
+
+# Faixas numéricas: parâmetro -> (lookup, conversor)
+FAIXAS = {
+    'preco_min': ('preco__gte', Decimal),
+    'preco_max': ('preco__lte', Decimal),
+    'preco_com_desconto_min': ('preco_com_desconto__gte', Decimal),
+    'preco_com_desconto_max': ('preco_com_desconto__lte', Decimal),
+    'estoque_min': ('quantidade_estoque__gte', int),
+    'estoque_max': ('quantidade_estoque__lte', int),
+}
+
+# Parâmetros que restringem a seleção (ordenar só ordena)
+PARAMETROS_FILTRO = ('busca', 'prefixo', 'codigo_barras', 'ativo', *FAIXAS)
+
+
+def faixa_prefixo(campo, prefixo):
+    """
+    Prefixo como faixa (campo >= p AND campo < p + U+FFFF): usa o índice B-tree
+    em qualquer banco, ao contrário de LIKE 'p%', que depende de collation
+    """
+    return Q(**{f'{campo}__gte': prefixo, f'{campo}__lt': prefixo + '\uffff'})
+
+
+def filtrar_produtos(queryset, params):
+    """
+    Aplica os filtros da listagem de produtos:
+    - busca: cada palavra precisa aparecer na descrição ou no código de barras
+      (substring na coluna normalizada, sem acento e sem diferenciar maiúsculas)
+    - prefixo: descrição normalizada ou código de barras começando pelo termo (índices)
+    - codigo_barras: código exato
+    - ativo: true/false
+    - preco_min, preco_max, preco_com_desconto_min, preco_com_desconto_max,
+      estoque_min, estoque_max
+    - ordenar: um de ORDENACOES, com "-" para decrescente
+    preco_com_desconto é calculado no banco (alias, só entra no SQL quando usado).
+    """
+    if 'preco_com_desconto' not in queryset.query.annotations:
+        queryset = queryset.alias(preco_com_desconto=preco_com_desconto_sql())
+
+    termos = normalizar_busca(params.get('busca', '')).split()
+    if termos:
+        queryset = queryset.filter(reduce(and_, (Q(busca__contains=termo) for termo in termos)))
+
+    prefixo = params.get('prefixo', '').strip()
+    if prefixo:
+        queryset = queryset.filter(
+            faixa_prefixo('busca', normalizar_busca(prefixo)) | faixa_prefixo('codigo_barras', prefixo)
+        )
+
+    codigo_barras = params.get('codigo_barras', '').strip()
+    if codigo_barras:
+        queryset = queryset.filter(codigo_barras=codigo_barras)
+
+    ativo = params.get('ativo')
+    if ativo is not None and ativo != '':
+        if ativo.lower() not in ('true', 'false', '1', '0'):
+            raise serializers.ValidationError({'ativo': 'Use true ou false.'})
+        queryset = queryset.filter(ativo=ativo.lower() in ('true', '1'))
+
+    for param, (lookup, converter) in FAIXAS.items():
+        valor = params.get(param)
+        if valor in (None, ''):
+            continue
+        try:
+            queryset = queryset.filter(**{lookup: converter(valor)})
+        except (InvalidOperation, ValueError):
+            raise serializers.ValidationError({param: 'Número inválido.'})
+
+    ordenar = params.get('ordenar')
+    if ordenar:
+        if ordenar.lstrip('-') not in ORDENACOES:
+            raise serializers.ValidationError({'ordenar': f"Use um de: {', '.join(ORDENACOES)} (com '-' para decrescente)."})
+        queryset = queryset.order_by(ordenar, '-id' if ordenar.startswith('-') else 'id')
+    return queryset
@@ -0,0 +1,184 @@
+import csv
+import io
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from reports.cache import invalidar_relatorios
+from .codigo_barras import invalidar_produtos
+from .models import Produto
+
+# Colunas aceitas na importação; codigo_barras é a chave do upsert
+COLUNAS = ('codigo_barras', 'descricao', 'preco', 'quantidade_estoque', 'desconto_percentual', 'ativo')
+VERDADEIROS = {'1', 'true', 'sim', 's', 'yes'}
+FALSOS = {'0', 'false', 'nao', 'não', 'n', 'no'}
+# Limite de IntegerField nos bancos suportados
+INTEIRO_MAXIMO = 2147483647
+
+
+def ler_csv(arquivo):
+    """Lê um CSV (bytes ou texto, separado por vírgula ou ponto e vírgula) em uma lista de dicts"""
+    conteudo = arquivo.read() if hasattr(arquivo, 'read') else arquivo
+    if isinstance(conteudo, bytes):
+        conteudo = conteudo.decode('utf-8-sig')
+    try:
+        dialeto = csv.Sniffer().sniff(conteudo[:4096], delimiters=',;')
+    except csv.Error:
+        dialeto = csv.excel
+    return list(csv.DictReader(io.StringIO(conteudo), dialect=dialeto))
+
+
+def _texto(valor, tamanho):
+    valor = str(valor).strip()
+    if len(valor) > tamanho:
+        raise ValueError(f'Máximo de {tamanho} caracteres.')
+    return valor or None
+
+
+def _decimal(valor, digitos, casas, minimo=Decimal(0), maximo=None):
+    texto = str(valor).strip()
+    if ',' in texto:
+        # Formato brasileiro: 1.234,56
+        texto = texto.replace('.', '').replace(',', '.')
+    try:
+        numero = Decimal(texto)
+    except InvalidOperation:
+        raise ValueError('Número inválido.')
+    if not numero.is_finite() or numero < minimo or (maximo is not None and numero > maximo):
+        raise ValueError('Valor fora da faixa permitida.')
+    # Parte inteira cabe em max_digits - decimal_places; confere antes do quantize,
+    # que estoura (InvalidOperation) com expoentes grandes como 1e30
+    if numero and numero.adjusted() >= digitos - casas:
+        raise ValueError(f'Máximo de {digitos - casas} dígitos antes da vírgula.')
+    try:
+        numero = numero.quantize(Decimal(1).scaleb(-casas))
+    except InvalidOperation:
+        raise ValueError('Número inválido.')
+    if len(numero.as_tuple().digits) > digitos:
+        raise ValueError(f'Máximo de {digitos} dígitos.')
+    return numero
+
+
+def _inteiro(valor):
+    try:
+        numero = int(str(valor).strip())
+    except ValueError:
+        raise ValueError('Número inteiro inválido.')
+    if numero < 0:
+        raise ValueError('Não pode ser negativo.')
+    if numero > INTEIRO_MAXIMO:
+        raise ValueError(f'Máximo de {INTEIRO_MAXIMO}.')
+    return numero
+
+
+def _booleano(valor):
+    texto = str(valor).strip().lower()
+    if texto in VERDADEIROS:
+        return True
+    if texto in FALSOS:
+        return False
+    raise ValueError('Use true ou false.')
+
+
+# Coluna -> conversor do texto da célula
+CONVERSORES = {
+    'descricao': lambda v: _texto(v, 200),
+    'preco': lambda v: _decimal(v, 10, 2),
+    'quantidade_estoque': _inteiro,
+    'desconto_percentual': lambda v: _decimal(v, 5, 2, maximo=Decimal(100)),
+    'ativo': _booleano,
+}
+# Valores de produtos novos para as colunas não informadas (além dos padrões do modelo)
+PADROES_NOVOS = {'quantidade_estoque': 0}
+
+
+def validar_linhas(linhas):
+    """
+    Valida todas as linhas em uma única passada, com conversores simples por coluna
+    (sem um serializer por linha). Devolve (validas, erros):
+    - validas: {codigo_barras: (numero_da_linha, valores)}, só com as colunas preenchidas na linha
+      (célula em branco ou null conta como coluna não enviada: listas de fornecedor
+      costumam deixar estoque e descrição vazios, e isso não pode apagar o cadastro)
+    - erros: [{"linha", "codigo_barras", "erros": {coluna: mensagem}}]
+    A numeração começa em 1 na primeira linha de dados.
+    """
+    validas = {}
+    erros = []
+    for numero, linha in enumerate(linhas, 1):
+        if not isinstance(linha, dict):
+            erros.append({'linha': numero, 'codigo_barras': None, 'erros': {'linha': 'Esperado um objeto.'}})
+            continue
+
+        problemas = {}
+        codigo = str(linha.get('codigo_barras') or '').strip()
+        if not codigo:
+            problemas['codigo_barras'] = 'Obrigatório.'
+        elif len(codigo) > 50:
+            problemas['codigo_barras'] = 'Máximo de 50 caracteres.'
+        elif codigo in validas:
+            problemas['codigo_barras'] = f'Repetido no arquivo (linha {validas[codigo][0]}).'
+
+        valores = {}
+        for coluna, converter in CONVERSORES.items():
+            bruto = linha.get(coluna)
+            if bruto is None or str(bruto).strip() == '':
+                continue
+            try:
+                valores[coluna] = converter(bruto)
+            except ValueError as exc:
+                problemas[coluna] = str(exc)
+
+        if problemas:
+            erros.append({'linha': numero, 'codigo_barras': codigo or None, 'erros': problemas})
+        else:
+            validas[codigo] = (numero, valores)
+    return validas, erros
+
+
+def importar_produtos(linhas, tamanho_lote=1000):
+    """
+    Importa (cria ou atualiza pelo código de barras) uma lista de linhas já lidas
+    de CSV ou JSON. As linhas válidas são gravadas em lotes com
+    INSERT ... ON CONFLICT (codigo_barras) DO UPDATE, só nas colunas preenchidas
+    na linha; as inválidas voltam no relatório de erros, sem impedir as demais.
+    """
+    validas, erros = validar_linhas(linhas)
+    codigos = list(validas)
+
+    # Linhas com as mesmas colunas preenchidas vão no mesmo upsert
+    grupos = defaultdict(list)
+    for codigo in codigos:
+        grupos[tuple(validas[codigo][1])].append(codigo)
+
+    criados = 0
+    with transaction.atomic():
+        for colunas, codigos_grupo in grupos.items():
+            # busca só muda junto com a descrição (o código é a própria chave)
+            campos_atualizados = [*colunas, *(['busca'] if 'descricao' in colunas else []), 'data_atualizacao']
+            for inicio in range(0, len(codigos_grupo), tamanho_lote):
+                lote = codigos_grupo[inicio:inicio + tamanho_lote]
+                existentes = set(
+                    Produto.objects.filter(codigo_barras__in=lote).values_list('codigo_barras', flat=True)
+                )
+                criados += len(lote) - len(existentes)
+
+                produtos = [
+                    Produto(codigo_barras=codigo, **{**PADROES_NOVOS, **validas[codigo][1]}).preencher_busca()
+                    for codigo in lote
+                ]
+                Produto.objects.bulk_create(
+                    produtos,
+                    update_conflicts=True,
+                    unique_fields=['codigo_barras'],
+                    update_fields=campos_atualizados,
+                )
+
+        # bulk_create não dispara sinais: invalida os caches à mão
+        invalidar_produtos(codigos=codigos)
+        invalidar_relatorios()
+
+    return {
+        'total': len(linhas),
+        'criados': criados,
+        'atualizados': len(codigos) - criados,
+        'erros': erros,
+    }
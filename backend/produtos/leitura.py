@@ -0,0 +1,82 @@
+from decimal import Decimal
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from .serializers import ProdutoSerializer
+
+
+def _conversor_decimal(campo):
+    # Mesmo texto do DecimalField.to_representation: casas fixas, sem passar pela instância do campo
+    coerce_to_string = getattr(campo, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if not coerce_to_string or campo.localize or campo.normalize_output or campo.decimal_places is None:
+        return lambda: campo.to_representation
+    expoente = Decimal(1).scaleb(-campo.decimal_places)
+    return lambda: lambda valor: f'{valor.quantize(expoente, rounding=campo.rounding):f}'
+
+
+def _conversor_data_hora(campo):
+    # Mesmo texto do DateTimeField.to_representation, com o fuso resolvido uma vez por resposta
+    formato = getattr(campo, 'format', api_settings.DATETIME_FORMAT)
+    if formato is None or formato.lower() != ISO_8601:
+        return lambda: campo.to_representation
+
+    def preparar():
+        fuso = campo.timezone if hasattr(campo, 'timezone') else campo.default_timezone()
+        if fuso is None:
+            return campo.to_representation
+
+        def converter(valor):
+            texto = valor.astimezone(fuso).isoformat()
+            return texto[:-6] + 'Z' if texto.endswith('+00:00') else texto
+        return converter
+    return preparar
+
+
+# Campos cuja representação difere do valor vindo do banco -> fábrica do conversor.
+# A fábrica devolve uma função que prepara o conversor no início de cada resposta.
+CONVERSORES = (
+    (serializers.DecimalField, _conversor_decimal),
+    (serializers.DateTimeField, _conversor_data_hora),
+)
+
+
+class LeitorValores:
+    """
+    Caminho rápido de leitura: monta a mesma resposta de um ModelSerializer a
+    partir das linhas de .values(), sem instanciar modelos nem percorrer os
+    campos do serializer a cada objeto.
+
+    O mapeamento (coluna -> conversão) é montado uma vez a partir dos campos
+    de leitura do serializer; só decimais e datas são convertidos, o resto vai
+    direto do banco. None é repassado, como no DRF.
+    """
+    def __init__(self, serializer_class):
+        campos = [campo for campo in serializer_class().fields.values() if not campo.write_only]
+        self.colunas = tuple(dict.fromkeys(campo.source for campo in campos))
+        # (chave na resposta, coluna do .values(), preparo do conversor ou None), na ordem do serializer
+        self._mapa = tuple((campo.field_name, campo.source, self._fabrica(campo)) for campo in campos)
+
+    @staticmethod
+    def _fabrica(campo):
+        for tipo, fabrica in CONVERSORES:
+            if isinstance(campo, tipo):
+                return fabrica(campo)
+        return None
+
+    def valores(self, queryset):
+        """O queryset reduzido às colunas necessárias (anotações inclusas)"""
+        return queryset.values(*self.colunas)
+
+    def linhas(self, linhas):
+        mapa = tuple((nome, coluna, preparar and preparar()) for nome, coluna, preparar in self._mapa)
+        resultado = []
+        for linha in linhas:
+            dados = {}
+            for nome, coluna, converter in mapa:
+                valor = linha[coluna]
+                dados[nome] = valor if converter is None or valor is None else converter(valor)
+            resultado.append(dados)
+        return resultado
+
+
+# Leitura de produtos na listagem (a queryset precisa de com_preco_com_desconto())
+leitor_produtos = LeitorValores(ProdutoSerializer)
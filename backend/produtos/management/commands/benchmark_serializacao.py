@@ -0,0 +1,67 @@
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import connection
+from produtos.leitura import leitor_produtos
+from produtos.models import Produto
+from produtos.serializers import ProdutoSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara a listagem de produtos pelo ProdutoSerializer e pelo caminho rápido "
+        "de .values() (produtos.leitura) em um banco de teste temporário com --produtos registros."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--produtos', type=int, default=10_000)
+        parser.add_argument('--repeticoes', type=int, default=5)
+
+    def handle(self, *args, **options):
+        nome_original = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=False)
+        try:
+            self._executar(options)
+        finally:
+            connection.creation.destroy_test_db(nome_original, verbosity=0)
+
+    def _executar(self, options):
+        Produto.objects.bulk_create(
+            (
+                Produto(
+                    descricao=f'Produto {i}',
+                    preco=Decimal(i % 500) + Decimal('0.99'),
+                    quantidade_estoque=i % 100,
+                    desconto_percentual=Decimal(i % 4 * 5),
+                    codigo_barras=f'789{i:010d}',
+                ).preencher_busca()
+                for i in range(options['produtos'])
+            ),
+            batch_size=2000,
+        )
+        queryset = Produto.objects.com_preco_com_desconto()
+        instancias = list(queryset)
+        linhas = list(leitor_produtos.valores(queryset))
+
+        medicoes = {
+            'serializer (só serialização)': lambda: ProdutoSerializer(instancias, many=True).data,
+            'values (só serialização)': lambda: leitor_produtos.linhas(linhas),
+            'serializer (consulta + serialização)': lambda: ProdutoSerializer(queryset.all(), many=True).data,
+            'values (consulta + serialização)': lambda: leitor_produtos.linhas(leitor_produtos.valores(queryset.all())),
+        }
+        tempos = {nome: self._medir(funcao, options['repeticoes']) for nome, funcao in medicoes.items()}
+
+        self.stdout.write(f"{options['produtos']} produtos, média de {options['repeticoes']} execuções")
+        for nome, tempo in tempos.items():
+            self.stdout.write(f"{nome:<40}{tempo:>10.1f} ms")
+        for etapa in ('só serialização', 'consulta + serialização'):
+            ganho = tempos[f'serializer ({etapa})'] / max(tempos[f'values ({etapa})'], 1e-6)
+            self.stdout.write(f"ganho ({etapa}): {ganho:.1f}x")
+
+    @staticmethod
+    def _medir(funcao, repeticoes):
+        funcao()  # aquece caches (campos do serializer, páginas do banco)
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            funcao()
+        return (time.perf_counter() - inicio) * 1000 / repeticoes
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(fields=['codigo_barras'], name='produto_codigo_barras'),
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(fields=['quantidade_estoque'], name='produto_estoque'),
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(fields=['ativo', 'quantidade_estoque'], name='produto_ativo_estoque'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:22
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+def normalizar_busca(*partes):
+    # Cópia congelada de produtos.models.normalizar_busca: a migração não pode
+    # mudar de comportamento se a função do modelo mudar depois
+    texto = ' '.join(parte for parte in partes if parte)
+    texto = unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(texto.lower().split())
+
+
+def preencher_busca(apps, schema_editor):
+    Produto = apps.get_model('produtos', 'Produto')
+    lote = []
+    for produto in Produto.objects.only('id', 'descricao', 'codigo_barras').iterator(chunk_size=2000):
+        produto.busca = normalizar_busca(produto.descricao, produto.codigo_barras)[:260]
+        lote.append(produto)
+        if len(lote) == 2000:
+            Produto.objects.bulk_update(lote, ['busca'])
+            lote = []
+    Produto.objects.bulk_update(lote, ['busca'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtos', '0002_indices'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='produto',
+            name='busca',
+            field=models.CharField(default='', editable=False, max_length=260),
+        ),
+        migrations.RunPython(preencher_busca, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(fields=['busca'], name='produto_busca'),
+        ),
+    ]
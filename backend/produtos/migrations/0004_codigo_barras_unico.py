@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:23
+
+from django.db import migrations, models
+
+
+def limpar_codigos(apps, schema_editor):
+    """
+    Prepara a restrição de unicidade: código em branco vira NULL. Códigos repetidos
+    não são alterados aqui (seria apagar dado sem rastro): a migração para e lista
+    os produtos, para a correção manual no cadastro antes de rodar de novo.
+    """
+    Produto = apps.get_model('produtos', 'Produto')
+    Produto.objects.filter(codigo_barras__regex=r'^\s*$').update(codigo_barras=None)
+
+    repetidos = (
+        Produto.objects.exclude(codigo_barras=None)
+        .values('codigo_barras')
+        .annotate(quantidade=models.Count('id'))
+        .filter(quantidade__gt=1)
+        .order_by('codigo_barras')
+    )
+    ids_por_codigo = {}
+    for codigo, pk in (
+        Produto.objects.filter(codigo_barras__in=repetidos.values('codigo_barras'))
+        .order_by('codigo_barras', 'id').values_list('codigo_barras', 'id')
+    ):
+        ids_por_codigo.setdefault(codigo, []).append(pk)
+    if ids_por_codigo:
+        detalhes = '; '.join(
+            f"{codigo!r}: produtos {', '.join(map(str, ids))}" for codigo, ids in ids_por_codigo.items()
+        )
+        raise RuntimeError(
+            f"Há {len(ids_por_codigo)} código(s) de barras repetido(s). Deixe cada código em um único "
+            f"produto (ou apague o código dos demais) e rode o migrate de novo. {detalhes}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtos', '0003_produto_busca'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='produto',
+            name='produto_codigo_barras',
+        ),
+        migrations.RunPython(limpar_codigos, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='produto',
+            constraint=models.UniqueConstraint(fields=('codigo_barras',), name='produto_codigo_barras_unico'),
+        ),
+    ]
@@ -1,5 +1,40 @@
+import unicodedata
 from django.db import models
-from decimal import Decimal
+from django.db.models import Case, DecimalField, F, Value, When
+from django.db.models.functions import Round
+from decimal import ROUND_HALF_UP, Decimal
+
+
+def normalizar_busca(*partes):
+    """Texto para busca: sem acentos, minúsculo e com espaços simples ("Maçã  Verde" -> "maca verde")"""
+    texto = ' '.join(parte for parte in partes if parte)
+    texto = unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(texto.lower().split())
+
+
+def preco_com_desconto_sql():
+    """
+    preco_com_desconto calculado no banco, arredondado em centavos como a property:
+    preço menos o desconto percentual (NULL quando não há preço).
+    Divide por 100.0: o SQLite guarda decimais inteiros como INTEGER e, com / 100,
+    faria divisão inteira (10 * 85 / 100 = 8 em vez de 8.50).
+    """
+    return Case(
+        When(desconto_percentual__gt=0, then=Round(
+            F('preco') * (Value(100) - F('desconto_percentual')) / Value(100.0), 2,
+            output_field=DecimalField(max_digits=10, decimal_places=2),
+        )),
+        default=F('preco'),
+        output_field=DecimalField(max_digits=10, decimal_places=2),
+    )
+
+
+class ProdutoQuerySet(models.QuerySet):
+
+    def com_preco_com_desconto(self):
+        """Anota preco_com_desconto (o valor anotado substitui o cálculo da property)"""
+        return self.annotate(preco_com_desconto=preco_com_desconto_sql())
+
 
 class Produto(models.Model):
     descricao = models.CharField(max_length=200, verbose_name="Descrição", blank=True, null=True)
@@ -20,11 +55,44 @@ class Produto(models.Model):
     ativo = models.BooleanField(default=True, verbose_name="Ativo")
     data_cadastro = models.DateTimeField(auto_now_add=True, verbose_name="Data de Cadastro")
     data_atualizacao = models.DateTimeField(auto_now=True, verbose_name="Última Atualização")
+    # Descrição + código de barras normalizados, mantidos no save(): a busca compara
+    # uma coluna indexada, sem lower()/unaccent por linha na consulta
+    busca = models.CharField(max_length=260, default='', editable=False)
+
+    objects = ProdutoQuerySet.as_manager()
 
     class Meta:
         ordering = ['descricao']
         verbose_name = "Produto"
         verbose_name_plural = "Produtos"
+        indexes = [
+            # Menor estoque no dashboard (ORDER BY quantidade_estoque LIMIT n)
+            models.Index(fields=['quantidade_estoque'], name='produto_estoque'),
+            # Produtos ativos com estoque baixo
+            models.Index(fields=['ativo', 'quantidade_estoque'], name='produto_ativo_estoque'),
+            # Busca por prefixo da descrição normalizada (faixa busca >= termo AND busca < termo + '\uffff')
+            models.Index(fields=['busca'], name='produto_busca'),
+        ]
+        constraints = [
+            # Chave da leitura no PDV e do upsert da importação (NULL pode repetir)
+            models.UniqueConstraint(fields=['codigo_barras'], name='produto_codigo_barras_unico'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Código em branco vira NULL para não colidir na restrição de unicidade
+        self.codigo_barras = (self.codigo_barras or '').strip() or None
+        self.preencher_busca()
+        # Valor anotado na consulta fica velho depois de salvar preço/desconto
+        self.__dict__.pop('_preco_com_desconto', None)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'descricao', 'codigo_barras'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'busca'}
+        super().save(*args, **kwargs)
+
+    def preencher_busca(self):
+        """Atualiza a coluna de busca; chamar antes de bulk_create/bulk_update, que não passam pelo save()"""
+        self.busca = normalizar_busca(self.descricao, self.codigo_barras)[:260]
+        return self
 
     def __str__(self):
         descricao_display = self.descricao if self.descricao else "Produto sem descrição"
@@ -33,10 +101,17 @@ class Produto(models.Model):
 
     @property
     def preco_com_desconto(self):
+        if '_preco_com_desconto' in self.__dict__:
+            return self._preco_com_desconto
         if self.preco is None or self.desconto_percentual is None:
             return None
             
         if self.desconto_percentual > 0:
             desconto = (self.desconto_percentual / Decimal(100)) * self.preco
-            return self.preco - desconto
-        return self.preco
\ No newline at end of file
+            return (self.preco - desconto).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        return self.preco
+
+    @preco_com_desconto.setter
+    def preco_com_desconto(self, valor):
+        # Recebe a anotação de ProdutoQuerySet.com_preco_com_desconto()
+        self._preco_com_desconto = valor
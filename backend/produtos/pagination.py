@@ -0,0 +1,18 @@
+from rest_framework.pagination import PageNumberPagination
+
+
+class ProdutoPagination(PageNumberPagination):
+    """
+    Paginação da listagem de produtos, ativada só quando a chamada pede
+    (?page= ou ?page_size=): sem esses parâmetros a resposta continua sendo
+    a lista completa, como as telas antigas esperam.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.page_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
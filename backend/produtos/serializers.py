@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from decimal import Decimal
+from .filtros import PARAMETROS_FILTRO
 from .models import Produto
 
 class ProdutoSerializer(serializers.ModelSerializer):
@@ -15,7 +16,18 @@ class ProdutoSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Produto
-        fields = '__all__'
+        exclude = ['busca']
+
+    def validate_codigo_barras(self, value):
+        # Em branco vira NULL: a unicidade vale só para códigos preenchidos
+        value = (value or '').strip() or None
+        if value is not None:
+            repetidos = Produto.objects.filter(codigo_barras=value)
+            if self.instance is not None:
+                repetidos = repetidos.exclude(pk=self.instance.pk)
+            if repetidos.exists():
+                raise serializers.ValidationError('Já existe um produto com este código de barras.')
+        return value
 
     def to_internal_value(self, data):
         for field_name in ['preco', 'quantidade_estoque', 'desconto_percentual']:
@@ -23,4 +35,52 @@ class ProdutoSerializer(serializers.ModelSerializer):
             if value is not None and isinstance(value, str) and not value.replace('.', '', 1).isdigit():
                 data[field_name] = None
                 
-        return super().to_internal_value(data)
\ No newline at end of file
+        return super().to_internal_value(data)
+
+
+class ProdutoLeituraSerializer(serializers.ModelSerializer):
+    """Resposta enxuta da leitura de código de barras no PDV"""
+    preco_com_desconto = serializers.ReadOnlyField()
+
+    class Meta:
+        model = Produto
+        fields = ['id', 'descricao', 'codigo_barras', 'preco', 'desconto_percentual',
+                  'preco_com_desconto', 'quantidade_estoque', 'ativo']
+
+
+class AjustePrecosSerializer(serializers.Serializer):
+    """Entrada do ajuste em massa de preço/desconto (ver produtos.ajustes)"""
+    campo = serializers.ChoiceField(choices=['preco', 'desconto_percentual'])
+    operacao = serializers.ChoiceField(choices=['percentual', 'valor', 'definir'])
+    valor = serializers.DecimalField(max_digits=12, decimal_places=4)
+    filtros = serializers.DictField(required=False, default=dict)
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    simular = serializers.BooleanField(default=False)
+
+    def validate_filtros(self, value):
+        # Chave desconhecida seria ignorada pelo filtro e o ajuste pegaria o catálogo inteiro
+        desconhecidos = sorted(set(value) - set(PARAMETROS_FILTRO))
+        if desconhecidos:
+            raise serializers.ValidationError(
+                f"Filtros não suportados: {', '.join(desconhecidos)}. Use: {', '.join(PARAMETROS_FILTRO)}."
+            )
+        # Mesmo formato da query string da listagem (booleanos JSON viram "true"/"false")
+        filtros = {
+            chave: str(valor).lower() if isinstance(valor, bool) else str(valor).strip()
+            for chave, valor in value.items() if valor is not None
+        }
+        filtros = {chave: valor for chave, valor in filtros.items() if valor}
+        if value and not filtros:
+            raise serializers.ValidationError('Todos os filtros informados estão vazios.')
+        return filtros
+
+    def validate(self, attrs):
+        if not attrs['filtros'] and 'ids' not in attrs:
+            raise serializers.ValidationError('Informe "filtros" ou "ids" (para todos os produtos, use {"ativo": true}).')
+        if attrs['operacao'] == 'percentual' and attrs['valor'] <= -100:
+            raise serializers.ValidationError({'valor': 'O percentual deve ser maior que -100.'})
+        if attrs['operacao'] == 'definir' and attrs['valor'] < 0:
+            raise serializers.ValidationError({'valor': 'O valor não pode ser negativo.'})
+        if attrs['operacao'] == 'definir' and attrs['campo'] == 'desconto_percentual' and attrs['valor'] > 100:
+            raise serializers.ValidationError({'valor': 'O desconto deve estar entre 0 e 100.'})
+        return attrs
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from .codigo_barras import invalidar_produtos
+from .models import Produto
+
+
+def _invalidar_codigo_barras(sender, instance, **kwargs):
+    # Pelo id também sai o código antigo, se o código de barras mudou
+    invalidar_produtos(ids=[instance.pk], codigos=[instance.codigo_barras])
+
+
+def conectar():
+    post_save.connect(_invalidar_codigo_barras, sender=Produto, dispatch_uid='produto_codigo_barras_save')
+    post_delete.connect(_invalidar_codigo_barras, sender=Produto, dispatch_uid='produto_codigo_barras_delete')
@@ -1,8 +1,18 @@
 from rest_framework.test import APITestCase
 from rest_framework import status
 from decimal import Decimal
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+from produtos.codigo_barras import CacheLRU, cache_codigos
 from produtos.models import Produto
+from produtos.serializers import ProdutoSerializer
+from produtos.views import ProdutoViewSet
+from vendas.estoque import baixar_estoque
 from django.urls import reverse
+from django.utils import timezone
 
 class ProdutoAPITest(APITestCase):
 
@@ -67,3 +77,474 @@ class ProdutoAPITest(APITestCase):
         response = self.client.post(self.url_list, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(Produto.objects.count(), 1)
+
+
+class CodigoBarrasAPITest(APITestCase):
+
+    def setUp(self):
+        cache_codigos.limpar()
+        self.url = reverse('produto-buscar-por-codigo-barras')
+        self.url_lote = reverse('produto-buscar-por-codigos-barras')
+        self.produto = Produto.objects.create(
+            descricao="Caneta", preco=Decimal("10.00"), desconto_percentual=Decimal("10.00"),
+            quantidade_estoque=50, codigo_barras="7891000000001",
+        )
+
+    # LEITURA NO PDV (GET /buscar-por-codigo-barras/)
+    def test_buscar_por_codigo_barras(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {"codigo_barras": "7891000000001"})
+        with self.assertNumQueries(0):
+            self.client.get(self.url, {"codigo_barras": "7891000000001"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["id"], self.produto.id)
+        self.assertEqual(response.data["preco"], "10.00")
+        self.assertEqual(Decimal(str(response.data["preco_com_desconto"])), Decimal("9.00"))
+        self.assertEqual(response.data["quantidade_estoque"], 50)
+
+    def test_buscar_por_codigo_barras_inexistente(self):
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {"codigo_barras": "000"}).status_code, status.HTTP_404_NOT_FOUND)
+
+        # O código desconhecido fica em cache até um produto com ele ser salvo
+        with self.assertNumQueries(0):
+            self.client.get(self.url, {"codigo_barras": "000"})
+        Produto.objects.create(descricao="Novo", preco=Decimal("1.00"), codigo_barras="000")
+        self.assertEqual(self.client.get(self.url, {"codigo_barras": "000"}).status_code, status.HTTP_200_OK)
+
+    # CACHE INVALIDADO AO SALVAR/EXCLUIR O PRODUTO E NA BAIXA DE ESTOQUE
+    def test_cache_invalidado(self):
+        self.client.get(self.url, {"codigo_barras": "7891000000001"})
+
+        self.produto.preco = Decimal("12.00")
+        self.produto.save()
+        self.assertEqual(self.client.get(self.url, {"codigo_barras": "7891000000001"}).data["preco"], "12.00")
+
+        baixar_estoque({self.produto.id: 5})
+        self.assertEqual(self.client.get(self.url, {"codigo_barras": "7891000000001"}).data["quantidade_estoque"], 45)
+
+        self.produto.codigo_barras = "7891000000002"
+        self.produto.save()
+        self.assertEqual(self.client.get(self.url, {"codigo_barras": "7891000000001"}).status_code, status.HTTP_404_NOT_FOUND)
+
+        self.produto.delete()
+        self.assertEqual(self.client.get(self.url, {"codigo_barras": "7891000000002"}).status_code, status.HTTP_404_NOT_FOUND)
+
+    # LOTE (POST /buscar-por-codigos-barras/)
+    def test_buscar_por_codigos_barras(self):
+        outro = Produto.objects.create(descricao="Lápis", preco=Decimal("2.00"), codigo_barras="7891000000003")
+        self.client.get(self.url, {"codigo_barras": "7891000000001"})
+
+        # Só os códigos fora do cache vão ao banco, em uma consulta
+        with self.assertNumQueries(1):
+            response = self.client.post(
+                self.url_lote, {"codigos": ["7891000000001", "7891000000003", "999"]}, format="json"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["produtos"]["7891000000003"]["id"], outro.id)
+        self.assertEqual(response.data["produtos"]["7891000000001"]["id"], self.produto.id)
+        self.assertEqual(response.data["nao_encontrados"], ["999"])
+        self.assertEqual(self.client.post(self.url_lote, {"codigos": []}, format="json").status_code, status.HTTP_400_BAD_REQUEST)
+
+    # CACHE LIMITADO DESCARTA O MENOS USADO
+    def test_cache_lru_limitado(self):
+        cache = CacheLRU(tamanho_maximo=2, ttl=60)
+        cache.guardar("a", {"id": 1})
+        cache.guardar("b", {"id": 2})
+        cache.obter("a")
+        cache.guardar("c", {"id": 3})
+
+        self.assertEqual(cache.obter("b"), (False, None))
+        self.assertEqual(cache.obter("a"), (True, {"id": 1}))
+        cache.invalidar(ids=[1])
+        self.assertEqual(cache.obter("a"), (False, None))
+
+
+class ProdutoBuscaAPITest(APITestCase):
+
+    def setUp(self):
+        self.url_list = reverse('produto-list')
+        dados = [
+            ("Maçã Verde", "10.00", 5, "7890000000011", True),
+            ("Maçã Fuji", "12.00", 50, "7890000000028", True),
+            ("Suco de MAÇÃ", "8.00", 0, "7891111111111", False),
+            ("Banana Prata", "6.00", 30, "7892222222222", True),
+        ]
+        for descricao, preco, estoque, codigo, ativo in dados:
+            Produto.objects.create(
+                descricao=descricao, preco=Decimal(preco), quantidade_estoque=estoque,
+                codigo_barras=codigo, ativo=ativo,
+            )
+
+    def _descricoes(self, params):
+        response = self.client.get(self.url_list, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [p["descricao"] for p in response.data]
+
+    # BUSCA SEM ACENTO E SEM DIFERENCIAR MAIÚSCULAS (GET /?busca=)
+    def test_busca_normalizada(self):
+        self.assertEqual(self._descricoes({"busca": "maca"}), ["Maçã Fuji", "Maçã Verde", "Suco de MAÇÃ"])
+        self.assertEqual(self._descricoes({"busca": "verde MAÇÃ"}), ["Maçã Verde"])
+        self.assertEqual(self._descricoes({"busca": "2222"}), ["Banana Prata"])
+        self.assertEqual(self._descricoes({"prefixo": "maca"}), ["Maçã Fuji", "Maçã Verde"])
+        self.assertEqual(self._descricoes({"prefixo": "789000"}), ["Maçã Fuji", "Maçã Verde"])
+        self.assertEqual(self._descricoes({"codigo_barras": "7891111111111"}), ["Suco de MAÇÃ"])
+
+    # FILTROS E ORDENAÇÃO
+    def test_filtros_e_ordenacao(self):
+        self.assertEqual(self._descricoes({"ativo": "false"}), ["Suco de MAÇÃ"])
+        self.assertEqual(self._descricoes({"preco_min": "8", "preco_max": "10"}), ["Maçã Verde", "Suco de MAÇÃ"])
+        self.assertEqual(self._descricoes({"estoque_min": "10", "ordenar": "-preco"}), ["Maçã Fuji", "Banana Prata"])
+        self.assertEqual(self.client.get(self.url_list, {"preco_min": "abc"}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url_list, {"ordenar": "senha"}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    # PREÇO COM DESCONTO CALCULADO NO BANCO: ORDENA E FILTRA
+    def test_preco_com_desconto(self):
+        Produto.objects.filter(descricao="Maçã Fuji").update(desconto_percentual=Decimal("50.00"))
+
+        # Empate em 6.00 desempata pelo id
+        self.assertEqual(self._descricoes({"ordenar": "preco_com_desconto"}),
+                         ["Maçã Fuji", "Banana Prata", "Suco de MAÇÃ", "Maçã Verde"])
+        self.assertEqual(self._descricoes({"preco_com_desconto_max": "7"}), ["Banana Prata", "Maçã Fuji"])
+
+        response = self.client.get(self.url_list, {"busca": "fuji"})
+        self.assertEqual(Decimal(str(response.data[0]["preco_com_desconto"])), Decimal("6.00"))
+
+        # Depois de salvar, a resposta não repete o valor anotado antes da alteração
+        produto = Produto.objects.get(descricao="Maçã Fuji")
+        response = self.client.patch(reverse('produto-detail', args=[produto.id]), {"preco": "20.00"}, format="json")
+        self.assertEqual(Decimal(str(response.data["preco_com_desconto"])), Decimal("10.00"))
+
+    # PREÇO E DESCONTO INTEIROS NÃO CAEM EM DIVISÃO INTEIRA NO SQLITE
+    def test_preco_com_desconto_valores_inteiros(self):
+        produto = Produto.objects.create(descricao="Uva", preco=Decimal("10.00"),
+                                         desconto_percentual=Decimal("15.00"), codigo_barras="7893333333333")
+
+        detalhe = self.client.get(reverse('produto-detail', args=[produto.id]))
+        self.assertEqual(Decimal(str(detalhe.data["preco_com_desconto"])), Decimal("8.50"))
+        self.assertEqual(Decimal(str(detalhe.data["preco_com_desconto"])), produto.preco_com_desconto)
+        listagem = self.client.get(self.url_list, {"busca": "uva"})
+        self.assertEqual(Decimal(str(listagem.data[0]["preco_com_desconto"])), Decimal("8.50"))
+        self.assertEqual(self._descricoes({"preco_com_desconto_min": "8.5", "preco_com_desconto_max": "8.5"}), ["Uva"])
+        self.assertEqual(self._descricoes({"ordenar": "preco_com_desconto", "preco_com_desconto_max": "9"}),
+                         ["Banana Prata", "Suco de MAÇÃ", "Uva"])
+
+    # PAGINAÇÃO SÓ QUANDO PEDIDA
+    def test_paginacao(self):
+        response = self.client.get(self.url_list, {"page_size": 3, "ordenar": "preco"})
+
+        self.assertEqual(response.data["count"], 4)
+        self.assertEqual([p["descricao"] for p in response.data["results"]], ["Banana Prata", "Suco de MAÇÃ", "Maçã Verde"])
+        self.assertIsNotNone(response.data["next"])
+        self.assertNotIn("busca", response.data["results"][0])
+
+    # COLUNA DE BUSCA ACOMPANHA A DESCRIÇÃO
+    def test_busca_atualizada_no_save(self):
+        produto = Produto.objects.get(descricao="Banana Prata")
+        produto.descricao = "Banana Nanica"
+        produto.save(update_fields=["descricao"])
+
+        self.assertEqual(self._descricoes({"busca": "nanica"}), ["Banana Nanica"])
+
+
+class ProdutoImportacaoAPITest(APITestCase):
+
+    def setUp(self):
+        self.url = reverse('produto-importar')
+        self.url_codigo = reverse('produto-buscar-por-codigo-barras')
+        cache_codigos.limpar()
+        self.existente = Produto.objects.create(
+            descricao="Caneta Azul", preco=Decimal("3.50"), quantidade_estoque=10, codigo_barras="7891000000001"
+        )
+
+    # UPSERT POR CÓDIGO DE BARRAS (POST /importar/ com JSON)
+    def test_importar_json(self):
+        linhas = [
+            {"codigo_barras": "7891000000001", "preco": "3.90"},
+            {"codigo_barras": "7891000000002", "preco": "1.25", "descricao": "Borracha"},
+        ]
+        response = self.client.post(self.url, linhas, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"total": 2, "criados": 1, "atualizados": 1, "erros": []})
+        # Só as colunas enviadas são gravadas: descrição e estoque do existente ficam
+        self.existente.refresh_from_db()
+        self.assertEqual((self.existente.descricao, self.existente.preco, self.existente.quantidade_estoque),
+                         ("Caneta Azul", Decimal("3.90"), 10))
+        novo = Produto.objects.get(codigo_barras="7891000000002")
+        self.assertEqual((novo.descricao, novo.preco, novo.busca), ("Borracha", Decimal("1.25"), "borracha 7891000000002"))
+
+    # CSV COM PONTO E VÍRGULA E DECIMAIS COM VÍRGULA
+    def test_importar_csv(self):
+        conteudo = (
+            "codigo_barras;descricao;preco;quantidade_estoque;ativo\n"
+            "7891000000001;Caneta Preta;1.234,50;5;sim\n"
+            "7891000000003;Lápis;2,00;;não\n"
+        ).encode("utf-8")
+        arquivo = SimpleUploadedFile("produtos.csv", conteudo, content_type="text/csv")
+        response = self.client.post(self.url, {"arquivo": arquivo}, format="multipart")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data["criados"], response.data["atualizados"]), (1, 1))
+        self.existente.refresh_from_db()
+        self.assertEqual((self.existente.descricao, self.existente.preco), ("Caneta Preta", Decimal("1234.50")))
+        lapis = Produto.objects.get(codigo_barras="7891000000003")
+        self.assertEqual((lapis.preco, lapis.quantidade_estoque, lapis.ativo), (Decimal("2.00"), 0, False))
+        self.assertEqual(self.client.get(reverse('produto-list'), {"busca": "preta"}).data[0]["id"], self.existente.id)
+
+    # CÉLULA EM BRANCO NÃO APAGA DESCRIÇÃO NEM ESTOQUE DO PRODUTO EXISTENTE
+    def test_celulas_em_branco_mantem_cadastro(self):
+        self.existente.quantidade_estoque = 40
+        self.existente.save()
+        conteudo = "codigo_barras;descricao;preco;quantidade_estoque\n7891000000001;;6,50;\n"
+        arquivo = SimpleUploadedFile("precos.csv", conteudo.encode("utf-8"), content_type="text/csv")
+        response = self.client.post(self.url, {"arquivo": arquivo}, format="multipart")
+
+        self.assertEqual(response.data["atualizados"], 1)
+        self.existente.refresh_from_db()
+        self.assertEqual((self.existente.descricao, self.existente.preco, self.existente.quantidade_estoque),
+                         ("Caneta Azul", Decimal("6.50"), 40))
+        self.assertEqual(self.client.get(reverse('produto-list'), {"busca": "caneta"}).data[0]["id"], self.existente.id)
+
+    # LINHAS INVÁLIDAS VOLTAM NO RELATÓRIO SEM IMPEDIR AS DEMAIS
+    def test_relatorio_de_erros(self):
+        linhas = [
+            {"codigo_barras": "7891000000004", "preco": "abc", "quantidade_estoque": "-1"},
+            {"codigo_barras": "", "preco": "1.00"},
+            {"codigo_barras": "7891000000005", "preco": "5.00"},
+            {"codigo_barras": "7891000000005", "preco": "6.00"},
+            {"codigo_barras": "7891000000006", "desconto_percentual": "150"},
+        ]
+        response = self.client.post(self.url, {"produtos": linhas}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data["total"], response.data["criados"]), (5, 1))
+        erros = {erro["linha"]: erro["erros"] for erro in response.data["erros"]}
+        self.assertEqual(set(erros), {1, 2, 4, 5})
+        self.assertEqual(set(erros[1]), {"preco", "quantidade_estoque"})
+        self.assertIn("codigo_barras", erros[2])
+        self.assertIn("linha 3", erros[4]["codigo_barras"])
+        self.assertIn("desconto_percentual", erros[5])
+        self.assertEqual(Produto.objects.get(codigo_barras="7891000000005").preco, Decimal("5.00"))
+
+        self.assertEqual(self.client.post(self.url, [], format="json").status_code, status.HTTP_400_BAD_REQUEST)
+
+    # NÚMEROS FORA DOS LIMITES DAS COLUNAS SÃO ERRO DA LINHA, NÃO ERRO 500
+    def test_limites_numericos(self):
+        linhas = [
+            {"codigo_barras": "7891000000007", "preco": "1e30"},
+            {"codigo_barras": "7891000000008", "preco": "123456789,00"},
+            {"codigo_barras": "7891000000009", "quantidade_estoque": "2147483648"},
+            {"codigo_barras": "7891000000010", "preco": "99999999,99", "quantidade_estoque": "2147483647"},
+        ]
+        response = self.client.post(self.url, linhas, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        erros = {erro["linha"]: set(erro["erros"]) for erro in response.data["erros"]}
+        self.assertEqual(erros, {1: {"preco"}, 2: {"preco"}, 3: {"quantidade_estoque"}})
+        self.assertEqual(response.data["criados"], 1)
+        limite = Produto.objects.get(codigo_barras="7891000000010")
+        self.assertEqual((limite.preco, limite.quantidade_estoque), (Decimal("99999999.99"), 2147483647))
+
+    # CACHE DO PDV INVALIDADO PELA IMPORTAÇÃO
+    def test_cache_invalidado(self):
+        self.assertEqual(self.client.get(self.url_codigo, {"codigo_barras": "7891000000001"}).data["preco"], "3.50")
+        self.assertEqual(self.client.get(self.url_codigo, {"codigo_barras": "7891000000009"}).status_code,
+                         status.HTTP_404_NOT_FOUND)
+
+        self.client.post(self.url, [
+            {"codigo_barras": "7891000000001", "preco": "4.00"},
+            {"codigo_barras": "7891000000009", "descricao": "Régua", "preco": "2.00"},
+        ], format="json")
+
+        self.assertEqual(self.client.get(self.url_codigo, {"codigo_barras": "7891000000001"}).data["preco"], "4.00")
+        self.assertEqual(self.client.get(self.url_codigo, {"codigo_barras": "7891000000009"}).data["descricao"], "Régua")
+
+    # CÓDIGO EM BRANCO VIRA NULL E CÓDIGO REPETIDO É RECUSADO NO CADASTRO
+    def test_codigo_barras_unico(self):
+        url_list = reverse('produto-list')
+        for _ in range(2):
+            response = self.client.post(url_list, {"descricao": "Sem código", "codigo_barras": ""}, format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Produto.objects.filter(codigo_barras__isnull=True).count(), 2)
+
+        response = self.client.post(url_list, {"descricao": "Outra", "codigo_barras": "7891000000001"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class MigracaoCodigoBarrasUnicoTest(TransactionTestCase):
+    """Migração 0004: prepara os códigos de barras para a restrição de unicidade"""
+    antes = [('produtos', '0003_produto_busca')]
+    depois = [('produtos', '0004_codigo_barras_unico')]
+
+    def setUp(self):
+        self.executor = MigrationExecutor(connection)
+        self.executor.migrate(self.antes)
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    # CÓDIGOS REPETIDOS PARAM A MIGRAÇÃO, SEM APAGAR NADA; EM BRANCO VIRA NULL
+    def test_codigos_repetidos(self):
+        ProdutoAntigo = self.executor.loader.project_state(self.antes).apps.get_model('produtos', 'Produto')
+        primeiro = ProdutoAntigo.objects.create(descricao="Caneta", codigo_barras="789")
+        segundo = ProdutoAntigo.objects.create(descricao="Caneta (cópia)", codigo_barras="789")
+        em_branco = ProdutoAntigo.objects.create(descricao="Sem código", codigo_barras="  ")
+
+        with self.assertRaisesMessage(RuntimeError, f"'789': produtos {primeiro.id}, {segundo.id}"):
+            MigrationExecutor(connection).migrate(self.depois)
+        self.assertEqual(ProdutoAntigo.objects.filter(codigo_barras="789").count(), 2)
+
+        ProdutoAntigo.objects.filter(pk=segundo.pk).update(codigo_barras="790")
+        MigrationExecutor(connection).migrate(self.depois)
+        self.assertIsNone(ProdutoAntigo.objects.get(pk=em_branco.pk).codigo_barras)
+
+
+class AjustePrecosAPITest(APITestCase):
+
+    def setUp(self):
+        self.url = reverse('produto-ajustar-precos')
+        self.url_codigo = reverse('produto-buscar-por-codigo-barras')
+        cache_codigos.limpar()
+        self.caneta = Produto.objects.create(descricao="Caneta", preco=Decimal("10.00"), codigo_barras="7891000000001")
+        self.lapis = Produto.objects.create(descricao="Lápis", preco=Decimal("3.33"), codigo_barras="7891000000002",
+                                            desconto_percentual=Decimal("5.00"))
+        self.inativo = Produto.objects.create(descricao="Borracha", preco=Decimal("2.00"), ativo=False)
+        self.sem_preco = Produto.objects.create(descricao="Sem preço")
+
+    def _precos(self):
+        return list(Produto.objects.order_by('id').values_list('preco', flat=True))
+
+    # SIMULAÇÃO NÃO GRAVA (POST /ajustar-precos/ com "simular")
+    def test_simular(self):
+        response = self.client.post(self.url, {
+            "campo": "preco", "operacao": "percentual", "valor": "7",
+            "filtros": {"ativo": True}, "simular": True,
+        }, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["afetados"], 2)
+        self.assertEqual(
+            [(p["id"], p["atual"], p["novo"]) for p in response.data["amostra"]],
+            [(self.caneta.id, Decimal("10.00"), Decimal("10.70")), (self.lapis.id, Decimal("3.33"), Decimal("3.56"))],
+        )
+        self.assertEqual(self._precos(), [Decimal("10.00"), Decimal("3.33"), Decimal("2.00"), None])
+
+    # PERCENTUAL SOBRE O FILTRO, EM UM ÚNICO UPDATE
+    def test_ajustar_percentual(self):
+        # SELECT dos ids (para o cache) e um UPDATE, entre SAVEPOINT e RELEASE
+        with self.assertNumQueries(4):
+            response = self.client.post(self.url, {
+                "campo": "preco", "operacao": "percentual", "valor": "-10", "filtros": {"ativo": "true"},
+            }, format="json")
+
+        self.assertEqual(response.data, {"simulacao": False, "afetados": 2})
+        self.assertEqual(self._precos(), [Decimal("9.00"), Decimal("3.00"), Decimal("2.00"), None])
+
+    # VALOR ABSOLUTO NÃO DEIXA PREÇO NEGATIVO E DESCONTO FICA ENTRE 0 E 100
+    def test_limites(self):
+        self.client.post(self.url, {"campo": "preco", "operacao": "valor", "valor": "-5",
+                                    "ids": [self.caneta.id, self.lapis.id]}, format="json")
+        self.assertEqual(self._precos(), [Decimal("5.00"), Decimal("0.00"), Decimal("2.00"), None])
+
+        self.client.post(self.url, {"campo": "desconto_percentual", "operacao": "valor", "valor": "98",
+                                    "filtros": {"busca": "lapis"}}, format="json")
+        self.lapis.refresh_from_db()
+        self.assertEqual(self.lapis.desconto_percentual, Decimal("100.00"))
+
+    # DEFINIR UM DESCONTO DE PROMOÇÃO, INCLUSIVE EM PRODUTOS SEM PREÇO
+    def test_definir_desconto(self):
+        response = self.client.post(self.url, {
+            "campo": "desconto_percentual", "operacao": "definir", "valor": "15", "filtros": {"preco_max": "5"},
+        }, format="json")
+
+        self.assertEqual(response.data["afetados"], 2)
+        self.assertEqual(
+            list(Produto.objects.order_by('id').values_list('desconto_percentual', flat=True)),
+            [Decimal("0.00"), Decimal("15.00"), Decimal("15.00"), Decimal("0.00")],
+        )
+
+    # FILTRO PELO PREÇO COM DESCONTO (CALCULADO NO BANCO)
+    def test_filtrar_por_preco_com_desconto(self):
+        response = self.client.post(self.url, {
+            "campo": "desconto_percentual", "operacao": "definir", "valor": "10",
+            "filtros": {"preco_com_desconto_max": "3.20"},
+        }, format="json")
+
+        self.assertEqual(response.data["afetados"], 2)
+        self.lapis.refresh_from_db()
+        self.assertEqual(self.lapis.desconto_percentual, Decimal("10.00"))
+
+    # ENTRADA INVÁLIDA
+    def test_validacao(self):
+        casos = [
+            {"campo": "preco", "operacao": "percentual", "valor": "5"},
+            {"campo": "estoque", "operacao": "valor", "valor": "1", "ids": [1]},
+            {"campo": "preco", "operacao": "percentual", "valor": "-100", "ids": [1]},
+            {"campo": "desconto_percentual", "operacao": "definir", "valor": "120", "ids": [1]},
+            {"campo": "preco", "operacao": "valor", "valor": "1", "filtros": {"preco_min": "abc"}},
+            {"campo": "preco", "operacao": "percentual", "valor": "7", "filtros": {"categoria": "bebidas"}},
+            {"campo": "preco", "operacao": "percentual", "valor": "7", "filtros": {"ordenar": "preco"}},
+            {"campo": "preco", "operacao": "percentual", "valor": "7", "filtros": {"busca": " ", "ativo": None}},
+        ]
+        for dados in casos:
+            self.assertEqual(self.client.post(self.url, dados, format="json").status_code,
+                             status.HTTP_400_BAD_REQUEST, dados)
+        # Nada foi reajustado
+        self.assertEqual(self._precos(), [Decimal("10.00"), Decimal("3.33"), Decimal("2.00"), None])
+
+    # CACHE DO PDV INVALIDADO PELO AJUSTE
+    def test_cache_invalidado(self):
+        self.assertEqual(self.client.get(self.url_codigo, {"codigo_barras": "7891000000001"}).data["preco"], "10.00")
+        self.client.post(self.url, {"campo": "preco", "operacao": "definir", "valor": "12",
+                                    "ids": [self.caneta.id]}, format="json")
+        self.assertEqual(self.client.get(self.url_codigo, {"codigo_barras": "7891000000001"}).data["preco"], "12.00")
+
+
+class LeituraRapidaAPITest(APITestCase):
+
+    def setUp(self):
+        self.url_list = reverse('produto-list')
+        Produto.objects.create(descricao="Caneta", preco=Decimal("10.00"), quantidade_estoque=3,
+                               desconto_percentual=Decimal("12.50"), codigo_barras="7891000000001")
+        Produto.objects.create(descricao="Lápis", preco=Decimal("3.33"), ativo=False)
+        Produto.objects.create()
+
+    def _esperado(self):
+        # Serializer completo sobre instâncias sem anotação: preco_com_desconto vem da property
+        return [dict(dados) for dados in ProdutoSerializer(Produto.objects.all(), many=True).data]
+
+    # LISTAGEM A PARTIR DE .values() IGUAL À DO SERIALIZER, EM UMA CONSULTA
+    def test_listagem_igual_ao_serializer(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url_list)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [dict(dados) for dados in response.data],
+            self._esperado(),
+        )
+        self.assertEqual(list(response.data[1]), list(ProdutoSerializer().fields))
+
+        # O fuso ativo é respeitado como no DateTimeField do DRF
+        with timezone.override("America/Sao_Paulo"):
+            response = self.client.get(self.url_list)
+            self.assertEqual([dict(dados) for dados in response.data],
+                             self._esperado())
+        self.assertTrue(response.data[0]["data_cadastro"].endswith("-03:00"))
+
+    # DETALHE IGUAL À LISTAGEM, COM A CHECAGEM DE PERMISSÃO DO OBJETO
+    def test_detalhe(self):
+        produto = Produto.objects.get(descricao="Caneta")
+        listagem = self.client.get(self.url_list, {"busca": "caneta"})
+        with mock.patch.object(ProdutoViewSet, 'check_object_permissions') as checagem:
+            response = self.client.get(reverse('produto-detail', args=[produto.id]))
+
+        checagem.assert_called_once()
+        self.assertEqual(dict(response.data), dict(listagem.data[0]))
+        self.assertEqual(response.data["preco"], "10.00")
+        self.assertEqual(Decimal(str(response.data["preco_com_desconto"])), Decimal("8.75"))
+        self.assertEqual(self.client.get(reverse('produto-detail', args=[0])).status_code, status.HTTP_404_NOT_FOUND)
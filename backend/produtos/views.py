@@ -1,7 +1,128 @@
-from rest_framework import viewsets
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from .ajustes import ajustar_precos
+from .codigo_barras import buscar_por_codigo, buscar_por_codigos
+from .filtros import filtrar_produtos
+from .importacao import importar_produtos, ler_csv
+from .leitura import leitor_produtos
 from .models import Produto
-from .serializers import ProdutoSerializer
+from .pagination import ProdutoPagination
+from .serializers import AjustePrecosSerializer, ProdutoSerializer
 
 class ProdutoViewSet(viewsets.ModelViewSet):
-    queryset = Produto.objects.all()
+    """
+    CRUD de produtos. A listagem aceita busca, filtros e ordenação
+    (ver produtos.filtros) e pagina com ?page=/?page_size=.
+    A listagem responde direto de .values() (ver produtos.leitura); o detalhe
+    passa pelo get_object() (com a checagem de permissão do objeto) e pelo
+    ProdutoSerializer, assim como a escrita.
+    """
+    # preco_com_desconto vem calculado do banco, sem a conta em Python por linha
+    queryset = Produto.objects.com_preco_com_desconto()
     serializer_class = ProdutoSerializer
+    pagination_class = ProdutoPagination
+    # Limite de códigos por chamada do lote
+    lote_max_codigos = 500
+    # Limite de linhas por importação
+    importacao_max_linhas = 100000
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = filtrar_produtos(queryset, self.request.query_params)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        queryset = leitor_produtos.valores(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(leitor_produtos.linhas(page))
+        return Response(leitor_produtos.linhas(queryset))
+
+    @action(detail=False, methods=['get'], url_path='buscar-por-codigo-barras')
+    def buscar_por_codigo_barras(self, request):
+        """
+        Leitura do código de barras no PDV (cache LRU em memória, ver produtos.codigo_barras)
+        GET /api/produtos/buscar-por-codigo-barras/?codigo_barras=789...
+        """
+        codigo = request.query_params.get('codigo_barras', '').strip()
+        if not codigo:
+            return Response({'detail': 'Código de barras não fornecido'}, status=status.HTTP_400_BAD_REQUEST)
+
+        produto = buscar_por_codigo(codigo)
+        if produto is None:
+            return Response({'detail': 'Produto não encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(produto)
+
+    @action(detail=False, methods=['post'], url_path='buscar-por-codigos-barras')
+    def buscar_por_codigos_barras(self, request):
+        """
+        Resolve vários códigos de uma vez (uma consulta para os que não estão em cache)
+        POST /api/produtos/buscar-por-codigos-barras/  {"codigos": ["789...", ...]}
+        Resposta: {"produtos": {codigo: produto}, "nao_encontrados": [codigo, ...]}
+        """
+        codigos = request.data.get('codigos') if hasattr(request.data, 'get') else None
+        if not isinstance(codigos, list) or not codigos:
+            return Response({'detail': 'Informe "codigos" como uma lista.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(codigos) > self.lote_max_codigos:
+            return Response(
+                {'detail': f'Máximo de {self.lote_max_codigos} códigos por chamada.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        codigos = [str(codigo).strip() for codigo in codigos if str(codigo).strip()]
+        resultado = buscar_por_codigos(codigos)
+        return Response({
+            'produtos': {codigo: produto for codigo, produto in resultado.items() if produto is not None},
+            'nao_encontrados': [codigo for codigo, produto in resultado.items() if produto is None],
+        })
+
+    @action(detail=False, methods=['post'])
+    def importar(self, request):
+        """
+        Importa uma lista de preços: cria ou atualiza produtos pelo código de barras
+        POST /api/produtos/importar/
+        - multipart com o arquivo CSV em "arquivo" (cabeçalho na primeira linha), ou
+        - JSON com uma lista de objetos (ou {"produtos": [...]})
+        Colunas: codigo_barras (obrigatória), descricao, preco, quantidade_estoque,
+        desconto_percentual, ativo. Só as células preenchidas são gravadas
+        (em branco mantém o valor atual; produto novo sem estoque começa com 0).
+        Resposta: {"total", "criados", "atualizados", "erros": [{"linha", "codigo_barras", "erros"}]}
+        """
+        arquivo = request.FILES.get('arquivo')
+        if arquivo is not None:
+            try:
+                linhas = ler_csv(arquivo)
+            except UnicodeDecodeError:
+                return Response({'detail': 'O CSV deve estar em UTF-8.'}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            linhas = request.data.get('produtos') if isinstance(request.data, dict) else request.data
+
+        if not isinstance(linhas, list) or not linhas:
+            return Response(
+                {'detail': 'Envie um CSV em "arquivo" ou uma lista JSON de produtos.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(linhas) > self.importacao_max_linhas:
+            return Response(
+                {'detail': f'Máximo de {self.importacao_max_linhas} linhas por importação.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(importar_produtos(linhas))
+
+    @action(detail=False, methods=['post'], url_path='ajustar-precos')
+    def ajustar_precos(self, request):
+        """
+        Ajuste em massa de preço ou desconto em um único UPDATE
+        POST /api/produtos/ajustar-precos/
+        {"campo": "preco" | "desconto_percentual",
+         "operacao": "percentual" | "valor" | "definir", "valor": "7",
+         "filtros": {mesmos parâmetros da listagem}, "ids": [...], "simular": true}
+        Com "simular" nada é gravado: a resposta traz "afetados" e uma "amostra"
+        com o valor atual e o novo de alguns produtos.
+        """
+        entrada = AjustePrecosSerializer(data=request.data)
+        entrada.is_valid(raise_exception=True)
+        return Response(ajustar_precos(**entrada.validated_data))
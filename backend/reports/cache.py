@@ -0,0 +1,83 @@
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+# Chaves de controle; as entradas de relatório levam a versão atual na chave,
+# então invalidar é só trocar a versão (as antigas expiram pelo TTL)
+CHAVE_VERSAO = 'relatorios:versao'
+CHAVE_ACERTOS = 'relatorios:acertos'
+CHAVE_FALHAS = 'relatorios:falhas'
+
+
+def _cache():
+    return caches[getattr(settings, 'RELATORIOS_CACHE', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'RELATORIOS_CACHE_TIMEOUT', 60)
+
+
+def _versao(cache):
+    # time_ns como valor inicial: se a versão for despejada do cache,
+    # a nova nunca coincide com uma versão antiga ainda guardada
+    return cache.get_or_set(CHAVE_VERSAO, time.time_ns(), timeout=None)
+
+
+def _incrementar(cache, chave):
+    cache.add(chave, 0, timeout=None)
+    try:
+        cache.incr(chave)
+    except ValueError:
+        # Contador despejado entre o add e o incr
+        cache.set(chave, 1, timeout=None)
+
+
+def obter_relatorio(nome, calcular, *partes):
+    """
+    Devolve (dados, acerto) do relatório `nome` a partir do cache, chamando
+    `calcular()` só quando não houver entrada válida. `partes` entram na chave
+    (data de referência, parâmetros da consulta...).
+    """
+    cache = _cache()
+    chave = ':'.join(['relatorios', nome, str(_versao(cache)), *map(str, partes)])
+    dados = cache.get(chave)
+    if dados is not None:
+        _incrementar(cache, CHAVE_ACERTOS)
+        return dados, True
+
+    _incrementar(cache, CHAVE_FALHAS)
+    dados = calcular()
+    cache.set(chave, dados, timeout=_timeout())
+    return dados, False
+
+
+def invalidar_relatorios():
+    """
+    Descarta todos os relatórios em cache. Invalida na hora e de novo no commit,
+    para que um relatório recalculado durante a transação (ainda sem os dados novos)
+    não fique no cache.
+    """
+    _trocar_versao()
+    transaction.on_commit(_trocar_versao)
+
+
+def _trocar_versao():
+    _cache().set(CHAVE_VERSAO, time.time_ns(), timeout=None)
+
+
+def estatisticas():
+    cache = _cache()
+    acertos = cache.get(CHAVE_ACERTOS, 0)
+    falhas = cache.get(CHAVE_FALHAS, 0)
+    total = acertos + falhas
+    return {
+        'acertos': acertos,
+        'falhas': falhas,
+        'taxa_acerto': round(acertos / total, 4) if total else 0.0,
+        'timeout': _timeout(),
+    }
+
+
+def zerar_estatisticas():
+    _cache().delete_many([CHAVE_ACERTOS, CHAVE_FALHAS])
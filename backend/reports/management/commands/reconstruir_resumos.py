@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from reports.models import ResumoProdutoDia, ResumoVendasDia
+from reports.resumos import reconstruir_resumos
+
+
+class Command(BaseCommand):
+    help = "Recalcula os resumos diários de vendas (por vendedor e por produto) a partir das vendas."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--data-inicio', help='AAAA-MM-DD (inclusivo)')
+        parser.add_argument('--data-fim', help='AAAA-MM-DD (inclusivo)')
+
+    def handle(self, *args, **options):
+        datas = {}
+        for opcao in ('data_inicio', 'data_fim'):
+            if options[opcao]:
+                datas[opcao] = parse_date(options[opcao])
+                if datas[opcao] is None:
+                    raise CommandError(f"Data inválida em --{opcao.replace('_', '-')}. Use AAAA-MM-DD.")
+
+        reconstruir_resumos(**datas)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Resumos reconstruídos: {ResumoVendasDia.objects.count()} linha(s) de vendas, "
+            f"{ResumoProdutoDia.objects.count()} linha(s) de produtos."
+        ))
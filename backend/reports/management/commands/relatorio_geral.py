@@ -0,0 +1,21 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from reports.servicos import relatorio_geral
+
+
+class Command(BaseCommand):
+    help = "Imprime em JSON as métricas do dashboard de Relatórios (as mesmas da API)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--data', help='Data de referência AAAA-MM-DD (padrão: hoje)')
+        parser.add_argument('--indent', type=int, default=2, help='Indentação do JSON')
+
+    def handle(self, *args, **options):
+        hoje = None
+        if options['data']:
+            hoje = parse_date(options['data'])
+            if hoje is None:
+                raise CommandError("Data inválida em --data. Use AAAA-MM-DD.")
+
+        self.stdout.write(json.dumps(relatorio_geral(hoje), ensure_ascii=False, indent=options['indent']))
@@ -0,0 +1,93 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Round, TruncDate
+
+
+def popular_resumos(apps, schema_editor):
+    """
+    Preenche os resumos com as vendas já existentes. A conta fica aqui (e não em
+    reports.resumos) para a migração não mudar junto com o código atual.
+    ItemVenda.subtotal ainda pode não existir (vendas 0002): o subtotal é refeito
+    em SQL, dividindo por 100.0 porque o SQLite guarda decimais inteiros como
+    INTEGER e / 100 truncaria.
+    """
+    Venda = apps.get_model('vendas', 'Venda')
+    ItemVenda = apps.get_model('vendas', 'ItemVenda')
+    ResumoVendasDia = apps.get_model('reports', 'ResumoVendasDia')
+    ResumoProdutoDia = apps.get_model('reports', 'ResumoProdutoDia')
+    valor = models.DecimalField(max_digits=14, decimal_places=2)
+    subtotal = Round(
+        models.F('quantidade') * models.F('preco_unitario') * (100 - models.F('desconto_percentual')) / 100.0,
+        2,
+        output_field=valor,
+    )
+
+    ResumoVendasDia.objects.bulk_create(
+        (
+            ResumoVendasDia(data=linha['dia'], vendedor_id=linha['vendedor_id'],
+                            quantidade_vendas=linha['quantidade'], valor_total=linha['valor'])
+            for linha in Venda.objects.annotate(dia=TruncDate('data_venda')).values('dia', 'vendedor_id')
+            .annotate(quantidade=models.Count('id'), valor=models.Sum('total_venda')).order_by().iterator()
+        ),
+        batch_size=1000,
+    )
+    ResumoProdutoDia.objects.bulk_create(
+        (
+            ResumoProdutoDia(data=linha['dia'], produto_id=linha['produto_id'],
+                             quantidade=linha['quantidade_total'], valor_total=linha['valor'])
+            for linha in ItemVenda.objects.annotate(dia=TruncDate('venda__data_venda')).values('dia', 'produto_id')
+            .annotate(quantidade_total=models.Sum('quantidade'), valor=models.Sum(subtotal, output_field=valor))
+            .order_by().iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('produtos', '__first__'),
+        ('vendas', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoProdutoDia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField()),
+                ('quantidade', models.IntegerField(default=0)),
+                ('valor_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='produtos.produto')),
+            ],
+            options={
+                'verbose_name': 'Resumo de Produto por Dia',
+                'verbose_name_plural': 'Resumos de Produtos por Dia',
+                'ordering': ['-data'],
+                'constraints': [models.UniqueConstraint(fields=('data', 'produto'), name='resumo_produto_dia_unico')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumoVendasDia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField()),
+                ('quantidade_vendas', models.IntegerField(default=0)),
+                ('valor_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('vendedor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Resumo de Vendas por Dia',
+                'verbose_name_plural': 'Resumos de Vendas por Dia',
+                'ordering': ['-data'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('vendedor__isnull', False)), fields=('data', 'vendedor'), name='resumo_vendas_dia_vendedor_unico'), models.UniqueConstraint(condition=models.Q(('vendedor__isnull', True)), fields=('data',), name='resumo_vendas_dia_sem_vendedor_unico')],
+            },
+        ),
+        migrations.RunPython(popular_resumos, migrations.RunPython.noop),
+    ]
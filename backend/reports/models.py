@@ -1,38 +1,49 @@
-from django.http import JsonResponse
-from django.utils import timezone
-from django.db.models import Sum
-# from vendas.models import Venda
-from clientes.models import Cliente
-from produtos.models import Produto
-
-def relatorio_geral(request):
-    today = timezone.now().date()
-
-    # Vendas hoje
-    vendas_hoje = Venda.objects.filter(data__date=today)
-    total_vendas_hoje = vendas_hoje.count()
-    valor_vendas_hoje = vendas_hoje.aggregate(total=Sum('valor'))['total'] or 0
-
-    # Clientes ativos
-    total_clientes_ativos = Cliente.objects.filter(ativo=True).count()
-
-    # Total produtos
-    total_produtos = Produto.objects.count()
-
-    # Vendas totais
-    vendas_totais = Venda.objects.all()
-    total_vendas = vendas_totais.count()
-    valor_total_vendas = vendas_totais.aggregate(total=Sum('valor'))['total'] or 0
-
-    return JsonResponse({
-        "vendas_hoje": {
-            "quantidade": total_vendas_hoje,
-            "valor": valor_vendas_hoje
-        },
-        "clientes_ativos": total_clientes_ativos,
-        "produtos_total": total_produtos,
-        "vendas_totais": {
-            "quantidade": total_vendas,
-            "valor": valor_total_vendas
-        }
-    })
+from django.conf import settings
+from django.db import models
+
+
+class ResumoVendasDia(models.Model):
+    """
+    Vendas consolidadas por dia e vendedor, mantidas incrementalmente na criação
+    e no cancelamento de vendas (ver reports.resumos). valor_total já tem o desconto geral.
+    """
+    data = models.DateField()
+    vendedor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    quantidade_vendas = models.IntegerField(default=0)
+    valor_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = 'Resumo de Vendas por Dia'
+        verbose_name_plural = 'Resumos de Vendas por Dia'
+        ordering = ['-data']
+        constraints = [
+            models.UniqueConstraint(fields=['data', 'vendedor'], name='resumo_vendas_dia_vendedor_unico',
+                                    condition=models.Q(vendedor__isnull=False)),
+            models.UniqueConstraint(fields=['data'], name='resumo_vendas_dia_sem_vendedor_unico',
+                                    condition=models.Q(vendedor__isnull=True)),
+        ]
+
+    def __str__(self):
+        return f"{self.data} - {self.quantidade_vendas} venda(s) - R$ {self.valor_total}"
+
+
+class ResumoProdutoDia(models.Model):
+    """
+    Itens vendidos consolidados por dia e produto. valor_total soma os subtotais
+    dos itens (com desconto do item, sem o desconto geral da venda).
+    """
+    data = models.DateField()
+    produto = models.ForeignKey('produtos.Produto', on_delete=models.CASCADE, related_name='+')
+    quantidade = models.IntegerField(default=0)
+    valor_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = 'Resumo de Produto por Dia'
+        verbose_name_plural = 'Resumos de Produtos por Dia'
+        ordering = ['-data']
+        constraints = [
+            models.UniqueConstraint(fields=['data', 'produto'], name='resumo_produto_dia_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.data} - produto {self.produto_id} x{self.quantidade}"
@@ -0,0 +1,132 @@
+from collections import defaultdict
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+from django.apps import apps as django_apps
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Sum, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .cache import invalidar_relatorios
+from .models import ResumoProdutoDia, ResumoVendasDia
+
+
+def registrar_venda(venda, itens):
+    """Soma uma venda recém-criada aos resumos (4 consultas, independente do número de itens)"""
+    data = timezone.localdate(venda.data_venda)
+    _acumular(ResumoVendasDia, ('data', 'vendedor_id'), {
+        (data, venda.vendedor_id): {'quantidade_vendas': 1, 'valor_total': venda.total_venda},
+    })
+
+    por_produto = defaultdict(lambda: {'quantidade': 0, 'valor_total': Decimal(0)})
+    for item in itens:
+        por_produto[(data, item.produto_id)]['quantidade'] += item.quantidade
+        por_produto[(data, item.produto_id)]['valor_total'] += item.subtotal
+    _acumular(ResumoProdutoDia, ('data', 'produto_id'), por_produto)
+
+
+def estornar_vendas(ids):
+    """
+    Subtrai dos resumos as vendas que serão canceladas; chamar antes de excluí-las,
+    dentro da mesma transação. Os agregados vêm do banco em duas consultas agrupadas.
+    """
+    Venda = django_apps.get_model('vendas', 'Venda')
+    ItemVenda = django_apps.get_model('vendas', 'ItemVenda')
+
+    vendas = (
+        Venda.objects.filter(pk__in=ids)
+        .annotate(dia=TruncDate('data_venda'))
+        .values('dia', 'vendedor_id')
+        .annotate(quantidade=Count('id'), valor=Sum('total_venda'))
+        .order_by()
+    )
+    _acumular(ResumoVendasDia, ('data', 'vendedor_id'), {
+        (linha['dia'], linha['vendedor_id']): {'quantidade_vendas': -linha['quantidade'], 'valor_total': -linha['valor']}
+        for linha in vendas
+    })
+
+    itens = (
+        ItemVenda.objects.filter(venda_id__in=ids)
+        .annotate(dia=TruncDate('venda__data_venda'))
+        .values('dia', 'produto_id')
+        .annotate(quantidade_total=Sum('quantidade'), valor=Sum('subtotal'))
+        .order_by()
+    )
+    _acumular(ResumoProdutoDia, ('data', 'produto_id'), {
+        (linha['dia'], linha['produto_id']): {'quantidade': -linha['quantidade_total'], 'valor_total': -linha['valor']}
+        for linha in itens
+    })
+
+    ResumoVendasDia.objects.filter(quantidade_vendas__lte=0).delete()
+    ResumoProdutoDia.objects.filter(quantidade__lte=0).delete()
+
+
+def reconstruir_resumos(data_inicio=None, data_fim=None):
+    """Recalcula os resumos a partir das vendas (todas ou do intervalo de datas, inclusivo)"""
+    Venda = django_apps.get_model('vendas', 'Venda')
+    ItemVenda = django_apps.get_model('vendas', 'ItemVenda')
+
+    filtro_data = {}
+    if data_inicio:
+        filtro_data['gte'] = data_inicio
+    if data_fim:
+        filtro_data['lte'] = data_fim
+
+    vendas = Venda.objects.annotate(dia=TruncDate('data_venda'))
+    itens = ItemVenda.objects.annotate(dia=TruncDate('venda__data_venda'))
+    resumos_vendas = ResumoVendasDia.objects.all()
+    resumos_produtos = ResumoProdutoDia.objects.all()
+    for lookup, valor in filtro_data.items():
+        vendas = vendas.filter(**{f'dia__{lookup}': valor})
+        itens = itens.filter(**{f'dia__{lookup}': valor})
+        resumos_vendas = resumos_vendas.filter(**{f'data__{lookup}': valor})
+        resumos_produtos = resumos_produtos.filter(**{f'data__{lookup}': valor})
+
+    with transaction.atomic():
+        resumos_vendas.delete()
+        resumos_produtos.delete()
+
+        ResumoVendasDia.objects.bulk_create(
+            (
+                ResumoVendasDia(data=linha['dia'], vendedor_id=linha['vendedor_id'],
+                                quantidade_vendas=linha['quantidade'], valor_total=linha['valor'])
+                for linha in vendas.values('dia', 'vendedor_id')
+                .annotate(quantidade=Count('id'), valor=Sum('total_venda')).order_by().iterator()
+            ),
+            batch_size=1000,
+        )
+        ResumoProdutoDia.objects.bulk_create(
+            (
+                ResumoProdutoDia(data=linha['dia'], produto_id=linha['produto_id'],
+                                 quantidade=linha['quantidade_total'], valor_total=linha['valor'])
+                for linha in itens.values('dia', 'produto_id')
+                .annotate(quantidade_total=Sum('quantidade'), valor=Sum('subtotal')).order_by().iterator()
+            ),
+            batch_size=1000,
+        )
+        invalidar_relatorios()
+
+
+def _acumular(modelo, campos_chave, incrementos):
+    """
+    Aplica incrementos (positivos ou negativos) em linhas de resumo, criando as que faltam.
+    Um INSERT ... ON CONFLICT DO NOTHING garante que as linhas existam e um único
+    UPDATE relativo (campo = campo + n) soma tudo, seguro com vendas concorrentes.
+    """
+    if not incrementos:
+        return
+
+    modelo.objects.bulk_create(
+        [modelo(**dict(zip(campos_chave, chave))) for chave in incrementos],
+        ignore_conflicts=True,
+    )
+
+    condicoes = {chave: Q(**dict(zip(campos_chave, chave))) for chave in incrementos}
+    campos = next(iter(incrementos.values())).keys()
+    modelo.objects.filter(reduce(or_, condicoes.values())).update(**{
+        campo: Case(
+            *[When(condicao, then=F(campo) + incrementos[chave][campo]) for chave, condicao in condicoes.items()],
+            default=F(campo),
+        )
+        for campo in campos
+    })
@@ -0,0 +1,90 @@
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDay, TruncHour, TruncMonth, TruncWeek
+from vendas.models import ItemVenda, Venda
+
+# Intervalo -> função de truncamento (no fuso atual, com USE_TZ)
+INTERVALOS = {
+    'hora': TruncHour,
+    'dia': TruncDay,
+    'semana': TruncWeek,
+    'mes': TruncMonth,
+}
+
+# Agrupamento -> (campo do id, campo do nome), relativos à venda
+AGRUPAMENTOS = {
+    'vendedor': ('vendedor_id', 'vendedor__username'),
+    'cliente': ('cliente_id', 'cliente__nome'),
+}
+
+
+def serie_vendas(filtros, intervalo='dia', agrupar=None):
+    """
+    Totais de vendas e quantidades de itens por período (e opcionalmente por
+    vendedor, cliente ou produto), agregados no banco com Trunc* + GROUP BY.
+    `filtros` são lookups sobre data_venda (ver vendas.exportacao.intervalo_datas).
+
+    Por vendedor/cliente (ou sem agrupamento) são duas consultas agrupadas:
+    vendas (quantidade e total com o desconto da venda) e itens (unidades).
+    Por produto é uma consulta sobre os itens; o valor é a soma dos subtotais
+    dos itens, já que o desconto geral da venda não é rateado entre produtos.
+    """
+    trunc = INTERVALOS[intervalo]
+
+    if agrupar == 'produto':
+        linhas = (
+            ItemVenda.objects.filter(**{f'venda__{lookup}': valor for lookup, valor in filtros.items()})
+            .annotate(periodo=trunc('venda__data_venda'))
+            .values('periodo', 'produto_id', 'produto__descricao')
+            .annotate(
+                quantidade_vendas=Count('venda_id', distinct=True),
+                valor_total=Sum('subtotal'),
+                quantidade_itens=Sum('quantidade'),
+            )
+            .order_by('periodo', 'produto_id')
+        )
+        return [
+            _ponto(linha, linha['produto_id'], linha['produto__descricao'])
+            for linha in linhas
+        ]
+
+    campo_id, campo_nome = AGRUPAMENTOS.get(agrupar, (None, None))
+    campos = ['periodo'] + ([campo_id, campo_nome] if agrupar else [])
+
+    vendas = (
+        Venda.objects.filter(**filtros)
+        .annotate(periodo=trunc('data_venda'))
+        .values(*campos)
+        .annotate(quantidade_vendas=Count('id'), valor_total=Sum('total_venda'))
+        .order_by(*campos[:2])
+    )
+    itens = (
+        ItemVenda.objects.filter(**{f'venda__{lookup}': valor for lookup, valor in filtros.items()})
+        .annotate(periodo=trunc('venda__data_venda'))
+        .values('periodo', *([f'venda__{campo_id}'] if agrupar else []))
+        .annotate(quantidade_itens=Sum('quantidade'))
+        .order_by()
+    )
+    unidades = {
+        (linha['periodo'], linha.get(f'venda__{campo_id}')): linha['quantidade_itens']
+        for linha in itens
+    }
+
+    return [
+        _ponto(
+            dict(linha, quantidade_itens=unidades.get((linha['periodo'], linha.get(campo_id)), 0)),
+            linha.get(campo_id),
+            linha.get(campo_nome),
+        )
+        for linha in vendas
+    ]
+
+
+def _ponto(linha, grupo_id, grupo):
+    return {
+        'periodo': linha['periodo'].isoformat(),
+        'grupo_id': grupo_id,
+        'grupo': grupo,
+        'quantidade_vendas': linha['quantidade_vendas'],
+        'valor_total': float(linha['valor_total'] or 0),
+        'quantidade_itens': linha['quantidade_itens'] or 0,
+    }
@@ -0,0 +1,220 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.db.models import Count, F, Func, OuterRef, Q, Subquery, Sum, Window
+from django.db.models.expressions import RowRange
+from django.db.models.functions import Coalesce, RowNumber
+from django.utils import timezone
+from clientes.models import Cliente
+from produtos.models import Produto
+from vendas.models import ItemVenda, Venda
+from .models import ResumoProdutoDia, ResumoVendasDia
+
+# Participação acumulada na receita que fecha as classes A e B da curva ABC
+LIMITE_CLASSE_A = Decimal('0.80')
+LIMITE_CLASSE_B = Decimal('0.95')
+
+# Formas de pagamento exibidas nas vendas recentes (a venda ainda não registra o pagamento)
+PAGAMENTOS_MOCK = ['PIX', 'Cartão', 'Dinheiro']
+
+
+def janelas_comparativas(hoje):
+    """
+    Períodos móveis (atual, anterior), cada um como (início, fim) inclusivos:
+    - dia: hoje vs ontem
+    - semana: últimos 7 dias vs os 7 dias antes deles
+    - mes: últimos 30 dias vs os 30 dias antes deles
+    """
+    janelas = {}
+    for nome, dias in (('dia', 1), ('semana', 7), ('mes', 30)):
+        inicio = hoje - timedelta(days=dias - 1)
+        anterior_fim = inicio - timedelta(days=1)
+        janelas[nome] = ((inicio, hoje), (anterior_fim - timedelta(days=dias - 1), anterior_fim))
+    return janelas
+
+
+def variacao(atual, anterior):
+    """Variação percentual no formato usado pelo frontend: '+12.5%' / '-3.0%'"""
+    atual = float(atual or 0)
+    anterior = float(anterior or 0)
+    if anterior == 0:
+        return '+100.0%' if atual > 0 else '+0.0%'
+    return f"{(atual - anterior) / anterior * 100:+.1f}%"
+
+
+def _inicio_do_dia(dia):
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+# Consultas do dashboard: cada uma é uma única consulta, independente do volume de dados
+
+def vendas_totais(janelas):
+    """Totais gerais e por janela, em uma única consulta ao resumo diário"""
+    agregados = {
+        'total_valor': Sum('valor_total'),
+        'total_qtd': Sum('quantidade_vendas'),
+    }
+    for nome, (atual, anterior) in janelas.items():
+        agregados[f'{nome}_valor'] = Sum('valor_total', filter=Q(data__range=atual))
+        agregados[f'{nome}_anterior_valor'] = Sum('valor_total', filter=Q(data__range=anterior))
+        agregados[f'{nome}_qtd'] = Sum('quantidade_vendas', filter=Q(data__range=atual))
+        agregados[f'{nome}_anterior_qtd'] = Sum('quantidade_vendas', filter=Q(data__range=anterior))
+    totais = ResumoVendasDia.objects.aggregate(**agregados)
+
+    comparativos = {
+        nome: {
+            'valor': float(totais[f'{nome}_valor'] or 0),
+            'valor_anterior': float(totais[f'{nome}_anterior_valor'] or 0),
+            'quantidade': totais[f'{nome}_qtd'] or 0,
+            'quantidade_anterior': totais[f'{nome}_anterior_qtd'] or 0,
+            'variacao': variacao(totais[f'{nome}_valor'], totais[f'{nome}_anterior_valor']),
+        }
+        for nome in janelas
+    }
+    return {
+        'valor': float(totais['total_valor'] or 0),
+        'quantidade': totais['total_qtd'] or 0,
+        'comparativo': comparativos['mes']['variacao'],
+        'comparativos': comparativos,
+    }
+
+
+def clientes_ativos(inicio_periodo):
+    """Base de clientes atual vs a base antes de `inicio_periodo`"""
+    clientes = Cliente.objects.aggregate(
+        total=Count('id'),
+        antes_do_periodo=Count('id', filter=Q(criado_em__lt=_inicio_do_dia(inicio_periodo))),
+    )
+    return {
+        'quantidade': clientes['total'],
+        'comparativo': variacao(clientes['total'], clientes['antes_do_periodo']),
+    }
+
+
+def produtos_vendidos(periodo, periodo_anterior):
+    """Produtos ativos e a variação de unidades vendidas entre os dois períodos"""
+    ativos = Produto.objects.aggregate(ativos=Count('id', filter=Q(ativo=True)))['ativos']
+    unidades = ResumoProdutoDia.objects.filter(data__gte=periodo_anterior[0]).aggregate(
+        atual=Sum('quantidade', filter=Q(data__range=periodo)),
+        anterior=Sum('quantidade', filter=Q(data__range=periodo_anterior)),
+    )
+    return {
+        'quantidade': ativos,
+        'comparativo': variacao(unidades['atual'], unidades['anterior']),
+    }
+
+
+def vendas_recentes(limite=5):
+    vendas = Venda.objects.select_related('cliente').order_by('-data_venda')[:limite]
+    return [
+        {
+            'data': venda.data_venda.strftime('%d/%m/%Y'),
+            'cliente': venda.cliente.nome if venda.cliente else 'Consumidor Final',
+            'pagamento': PAGAMENTOS_MOCK[i % len(PAGAMENTOS_MOCK)],
+            'valor': float(venda.total_venda),
+        }
+        for i, venda in enumerate(vendas)
+    ]
+
+
+def estoque_baixo(limite=5):
+    """
+    Produtos com menor estoque; o total vendido vem de uma subconsulta agrupada,
+    calculada só para as linhas retornadas
+    """
+    vendidos = ItemVenda.objects.filter(produto_id=OuterRef('pk')).order_by().values(
+        'produto_id'
+    ).annotate(total=Sum('quantidade')).values('total')
+
+    produtos = Produto.objects.annotate(
+        vendido_total=Coalesce(Subquery(vendidos), 0)
+    ).order_by('quantidade_estoque').values('descricao', 'quantidade_estoque', 'vendido_total')[:limite]
+    return [
+        {
+            'produto': produto['descricao'],
+            'estoque': produto['quantidade_estoque'],
+            'vendidos': produto['vendido_total'],
+        }
+        for produto in produtos
+    ]
+
+
+def relatorio_geral(hoje=None):
+    """Métricas do dashboard de Relatórios (6 consultas)"""
+    hoje = hoje or timezone.localdate()
+    janelas = janelas_comparativas(hoje)
+    mes, mes_anterior = janelas['mes']
+    return {
+        'vendas_totais': vendas_totais(janelas),
+        'produtos_vendidos': produtos_vendidos(mes, mes_anterior),
+        'clientes_ativos': clientes_ativos(mes[0]),
+        'vendas_recentes': vendas_recentes(),
+        'estoque_produtos': estoque_baixo(),
+    }
+
+
+class _SomaJanela(Func):
+    """SUM(...) OVER (...) sobre um agregado do GROUP BY (Sum do Django não aceita agregado)"""
+    function = 'SUM'
+    window_compatible = True
+
+
+def curva_abc(data_inicio, data_fim, ordenar='receita', classe=None, limite=100):
+    """
+    Ranking de produtos por receita ou quantidade no período (datas inclusivas)
+    com a classificação ABC pela receita, tudo em uma única consulta agrupada:
+    GROUP BY produto sobre o resumo diário e funções de janela para a posição,
+    a receita acumulada e a receita total. O banco ordena e corta o ranking,
+    então só `limite` linhas trafegam mesmo com catálogos de 100 mil produtos.
+
+    A receita é a soma de quantidade x preço unitário com o desconto do item,
+    a mesma conta de ItemVenda.subtotal, já consolidada por dia em ResumoProdutoDia.
+    Um produto é A enquanto a receita acumulada antes dele não chegou a 80%,
+    B até 95% e C no restante.
+    """
+    por_receita = [F('receita').desc(), F('produto_id').asc()]
+    ordem = por_receita if ordenar == 'receita' else [F('quantidade').desc(), F('produto_id').asc()]
+
+    ranking = (
+        ResumoProdutoDia.objects.filter(data__range=(data_inicio, data_fim))
+        .values('produto_id', 'produto__descricao')
+        .annotate(receita=Sum('valor_total'), quantidade=Sum('quantidade'))
+        .annotate(
+            posicao=Window(RowNumber(), order_by=ordem),
+            acumulado=Window(_SomaJanela(F('receita')), order_by=por_receita, frame=RowRange(start=None, end=0)),
+            total=Window(_SomaJanela(F('receita'))),
+        )
+        .order_by('posicao')
+    )
+    if classe is not None:
+        # O acumulado antes do produto decide a classe; é NULL no primeiro do ranking.
+        # Os cortes também são janelas: o banco compara colunas já calculadas.
+        ranking = ranking.annotate(
+            acumulado_anterior=Window(
+                _SomaJanela(F('receita')), order_by=por_receita, frame=RowRange(start=None, end=-1),
+            ),
+            corte_a=Window(_SomaJanela(F('receita') * LIMITE_CLASSE_A)),
+            corte_b=Window(_SomaJanela(F('receita') * LIMITE_CLASSE_B)),
+        )
+        abaixo_de_a = Q(acumulado_anterior__isnull=True) | Q(acumulado_anterior__lt=F('corte_a'))
+        abaixo_de_b = Q(acumulado_anterior__isnull=True) | Q(acumulado_anterior__lt=F('corte_b'))
+        filtros = {'A': abaixo_de_a, 'B': ~abaixo_de_a & abaixo_de_b, 'C': ~abaixo_de_b}
+        ranking = ranking.filter(filtros[classe])
+
+    produtos = []
+    total_receita = 0.0
+    for linha in ranking[:limite]:
+        total_receita = float(linha['total'] or 0)
+        receita = float(linha['receita'] or 0)
+        acumulado = float(linha['acumulado'] or 0)
+        antes = (acumulado - receita) / total_receita if total_receita else 0
+        produtos.append({
+            'posicao': linha['posicao'],
+            'produto_id': linha['produto_id'],
+            'produto': linha['produto__descricao'],
+            'receita': receita,
+            'quantidade': linha['quantidade'],
+            'participacao': round(receita / total_receita * 100, 2) if total_receita else 0.0,
+            'participacao_acumulada': round(acumulado / total_receita * 100, 2) if total_receita else 0.0,
+            'classe': 'A' if antes < float(LIMITE_CLASSE_A) else 'B' if antes < float(LIMITE_CLASSE_B) else 'C',
+        })
+    return {'total_receita': total_receita, 'produtos': produtos}
@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save
+from clientes.models import Cliente
+from produtos.models import Produto
+from vendas.models import ItemVenda, Venda
+from .cache import invalidar_relatorios
+
+
+def _invalidar(sender, **kwargs):
+    invalidar_relatorios()
+
+
+def conectar():
+    """
+    Liga a invalidação do cache de relatórios às alterações dos modelos de origem.
+
+    Venda e ItemVenda só escutam post_save: vendas só são excluídas por
+    vendas.cancelamento.cancelar_vendas, que estorna os resumos e invalida uma vez
+    por lote. Um receptor de post_delete faria o Django carregar e excluir as
+    vendas (e os itens) uma a uma, invalidando o cache a cada registro.
+    Operações em massa (update()/bulk_create) não disparam sinais e devem chamar
+    invalidar_relatorios() por conta própria.
+    """
+    for modelo in (Venda, ItemVenda, Produto, Cliente):
+        post_save.connect(_invalidar, sender=modelo, dispatch_uid=f'relatorios_save_{modelo.__name__}')
+    for modelo in (Produto, Cliente):
+        post_delete.connect(_invalidar, sender=modelo, dispatch_uid=f'relatorios_delete_{modelo.__name__}')
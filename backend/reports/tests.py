@@ -0,0 +1,341 @@
+import io
+import json
+from datetime import timedelta
+from decimal import Decimal
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from clientes.models import Cliente
+from produtos.models import Produto
+from reports.models import ResumoProdutoDia, ResumoVendasDia
+from reports.resumos import reconstruir_resumos
+from vendas.models import Venda, ItemVenda
+
+
+class RelatorioGeralAPITest(APITestCase):
+
+    def setUp(self):
+        caches["default"].clear()
+        self.url = reverse("relatorio_geral")
+        self.cliente = Cliente.objects.create(nome="Cliente Teste")
+
+    def _criar_dados(self, quantidade):
+        produtos = [
+            Produto.objects.create(descricao=f"Produto {i}", preco=Decimal("10.00"), quantidade_estoque=i)
+            for i in range(quantidade)
+        ]
+        for produto in produtos:
+            venda = Venda.objects.create(cliente=self.cliente, total_venda=Decimal("20.00"))
+            ItemVenda.objects.create(venda=venda, produto=produto, quantidade=2, preco_unitario=Decimal("10.00"))
+            ItemVenda.objects.create(venda=venda, produto=produto, quantidade=1, preco_unitario=Decimal("10.00"))
+        reconstruir_resumos()
+        return produtos
+
+    # DASHBOARD (GET /relatorio_geral/)
+    def test_relatorio_geral(self):
+        self._criar_dados(7)
+        Produto.objects.filter(descricao="Produto 6").update(ativo=False)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["vendas_totais"]["quantidade"], 7)
+        self.assertEqual(response.data["vendas_totais"]["valor"], 140.0)
+        self.assertEqual(response.data["produtos_vendidos"]["quantidade"], 6)
+        self.assertEqual(response.data["clientes_ativos"]["quantidade"], 1)
+        self.assertEqual(len(response.data["vendas_recentes"]), 5)
+        self.assertEqual(
+            [(p["produto"], p["estoque"], p["vendidos"]) for p in response.data["estoque_produtos"]],
+            [(f"Produto {i}", i, 3) for i in range(5)],
+        )
+
+    # COMPARATIVOS REAIS ENTRE PERÍODOS
+    def test_relatorio_geral_comparativos(self):
+        hoje = timezone.localdate()
+        for dias_atras, valor in ((0, "30.00"), (1, "20.00"), (3, "10.00"), (10, "40.00"), (45, "50.00")):
+            ResumoVendasDia.objects.create(data=hoje - timedelta(days=dias_atras), quantidade_vendas=1, valor_total=Decimal(valor))
+
+        response = self.client.get(self.url)
+
+        comparativos = response.data["vendas_totais"]["comparativos"]
+        self.assertEqual(comparativos["dia"]["valor"], 30.0)
+        self.assertEqual(comparativos["dia"]["valor_anterior"], 20.0)
+        self.assertEqual(comparativos["dia"]["variacao"], "+50.0%")
+        self.assertEqual(comparativos["semana"]["valor"], 60.0)
+        self.assertEqual(comparativos["semana"]["valor_anterior"], 40.0)
+        self.assertEqual(comparativos["mes"]["valor"], 100.0)
+        self.assertEqual(comparativos["mes"]["valor_anterior"], 50.0)
+        self.assertEqual(response.data["vendas_totais"]["comparativo"], "+100.0%")
+        self.assertEqual(response.data["clientes_ativos"]["comparativo"], "+100.0%")
+
+    # NÚMERO DE CONSULTAS NÃO CRESCE COM OS DADOS
+    def test_relatorio_geral_consultas_constantes(self):
+        self._criar_dados(2)
+        with CaptureQueriesContext(connection) as poucos:
+            self.client.get(self.url)
+
+        self._criar_dados(30)
+        with CaptureQueriesContext(connection) as muitos:
+            self.client.get(self.url)
+
+        self.assertEqual(len(poucos), len(muitos))
+        self.assertLessEqual(len(muitos), 6)
+
+    # COMANDO USA O MESMO SERVIÇO DA API
+    def test_comando_relatorio_geral(self):
+        self._criar_dados(3)
+        saida = io.StringIO()
+        call_command("relatorio_geral", stdout=saida)
+
+        self.assertEqual(json.loads(saida.getvalue()), self.client.get(self.url).json())
+
+    # CACHE DO DASHBOARD: SEGUNDA CHAMADA SEM CONSULTAS
+    def test_relatorio_geral_cache(self):
+        self._criar_dados(3)
+        primeira = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            segunda = self.client.get(self.url)
+
+        self.assertEqual(primeira["X-Cache"], "MISS")
+        self.assertEqual(segunda["X-Cache"], "HIT")
+        self.assertEqual(primeira.data, segunda.data)
+
+        estatisticas = self.client.get(reverse("relatorios_cache")).data
+        self.assertEqual(estatisticas["acertos"], 1)
+        self.assertEqual(estatisticas["falhas"], 1)
+        self.assertEqual(estatisticas["taxa_acerto"], 0.5)
+
+    # CACHE INVALIDADO AO ALTERAR VENDAS, PRODUTOS E CLIENTES
+    def test_relatorio_geral_cache_invalidado(self):
+        produtos = self._criar_dados(3)
+        self.client.get(self.url)
+
+        Cliente.objects.create(nome="Novo Cliente")
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["clientes_ativos"]["quantidade"], 2)
+
+        produtos[0].ativo = False
+        produtos[0].save()
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["produtos_vendidos"]["quantidade"], 2)
+
+        venda = Venda.objects.first()
+        resposta = self.client.delete(reverse("venda-detail", args=[venda.pk]))
+        self.assertEqual(resposta.status_code, status.HTTP_204_NO_CONTENT)
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(len(response.data["vendas_recentes"]), 2)
+        # Totais vêm dos resumos: a exclusão precisa estornar
+        self.assertEqual(response.data["vendas_totais"]["quantidade"], 2)
+        self.assertEqual(response.data["vendas_totais"]["valor"], 40.0)
+
+
+class ResumoVendasTest(APITestCase):
+
+    def setUp(self):
+        self.cliente = Cliente.objects.create(nome="Cliente Teste")
+        self.produtos = [
+            Produto.objects.create(descricao=f"Produto {i}", preco=Decimal("10.00"), quantidade_estoque=100)
+            for i in range(3)
+        ]
+
+    def _vender(self, produtos, quantidade=2):
+        payload = {
+            "cliente": self.cliente.id,
+            "itens": [{"produto": p.id, "quantidade": quantidade} for p in produtos],
+        }
+        return self.client.post(reverse("venda-list"), payload, format="json").data["id"]
+
+    def _resumos(self):
+        vendas = list(ResumoVendasDia.objects.values_list("vendedor_id", "quantidade_vendas", "valor_total"))
+        produtos = dict(ResumoProdutoDia.objects.values_list("produto_id", "quantidade"))
+        return vendas, produtos
+
+    # RESUMO ACOMPANHA CRIAÇÃO E CANCELAMENTO DE VENDAS
+    def test_resumo_incremental(self):
+        self._vender(self.produtos[:2])
+        cancelada = self._vender(self.produtos, quantidade=1)
+
+        self.assertEqual(self._resumos(), (
+            [(None, 2, Decimal("70.00"))],
+            {self.produtos[0].id: 3, self.produtos[1].id: 3, self.produtos[2].id: 1},
+        ))
+
+        self.client.post(reverse("venda-cancelar", args=[cancelada]))
+
+        self.assertEqual(self._resumos(), (
+            [(None, 1, Decimal("40.00"))],
+            {self.produtos[0].id: 2, self.produtos[1].id: 2},
+        ))
+
+    # RECONSTRUÇÃO CHEGA NO MESMO RESULTADO DO INCREMENTAL
+    def test_reconstruir_resumos(self):
+        self._vender(self.produtos[:2])
+        self._vender(self.produtos, quantidade=3)
+        incremental = self._resumos()
+
+        ResumoVendasDia.objects.all().delete()
+        ResumoProdutoDia.objects.all().delete()
+        call_command("reconstruir_resumos", stdout=io.StringIO())
+
+        self.assertEqual(self._resumos(), incremental)
+
+
+class SerieVendasAPITest(APITestCase):
+
+    def setUp(self):
+        caches["default"].clear()
+        self.url = reverse("serie_vendas")
+        self.ana = Cliente.objects.create(nome="Ana")
+        self.bruno = Cliente.objects.create(nome="Bruno")
+        self.produto = Produto.objects.create(descricao="Caneta", preco=Decimal("5.00"), quantidade_estoque=100)
+        self.hoje = timezone.localdate()
+
+    def _venda(self, cliente, dias_atras, quantidade, total):
+        venda = Venda.objects.create(cliente=cliente, total_venda=Decimal(total))
+        ItemVenda.objects.create(venda=venda, produto=self.produto, quantidade=quantidade, preco_unitario=Decimal("5.00"))
+        Venda.objects.filter(pk=venda.pk).update(data_venda=timezone.now() - timedelta(days=dias_atras))
+        return venda
+
+    # SÉRIE DIÁRIA (GET /serie_vendas/)
+    def test_serie_por_dia(self):
+        self._venda(self.ana, 0, 2, "10.00")
+        self._venda(self.bruno, 0, 1, "5.00")
+        self._venda(self.ana, 2, 4, "20.00")
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        resultados = response.data["resultados"]
+        self.assertEqual(len(resultados), 2)
+        self.assertEqual(
+            [(p["quantidade_vendas"], p["valor_total"], p["quantidade_itens"]) for p in resultados],
+            [(1, 20.0, 4), (2, 15.0, 3)],
+        )
+
+    # SÉRIE AGRUPADA POR CLIENTE E POR PRODUTO
+    def test_serie_agrupada(self):
+        self._venda(self.ana, 0, 2, "10.00")
+        self._venda(self.bruno, 0, 1, "5.00")
+
+        por_cliente = self.client.get(self.url, {"agrupar": "cliente", "intervalo": "mes"}).data["resultados"]
+        self.assertEqual(
+            [(p["grupo"], p["quantidade_itens"], p["valor_total"]) for p in por_cliente],
+            [("Ana", 2, 10.0), ("Bruno", 1, 5.0)],
+        )
+
+        por_produto = self.client.get(self.url, {"agrupar": "produto"}).data["resultados"]
+        self.assertEqual(len(por_produto), 1)
+        self.assertEqual(por_produto[0]["grupo"], "Caneta")
+        self.assertEqual(por_produto[0]["quantidade_vendas"], 2)
+        self.assertEqual(por_produto[0]["quantidade_itens"], 3)
+
+    # RESPOSTA EM CACHE POR PARÂMETROS
+    def test_serie_cache(self):
+        self._venda(self.ana, 0, 2, "10.00")
+        params = {"intervalo": "semana", "data_inicio": (self.hoje - timedelta(days=10)).isoformat()}
+
+        self.assertEqual(self.client.get(self.url, params)["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url, params)["X-Cache"], "HIT")
+        self.assertEqual(self.client.get(self.url, dict(params, intervalo="hora"))["X-Cache"], "MISS")
+
+    # PARÂMETROS INVÁLIDOS
+    def test_serie_parametros_invalidos(self):
+        self.assertEqual(self.client.get(self.url, {"intervalo": "ano"}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {"agrupar": "loja"}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {"data_inicio": "ontem"}).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CurvaABCAPITest(APITestCase):
+
+    def setUp(self):
+        caches["default"].clear()
+        self.url = reverse("curva_abc")
+        hoje = timezone.localdate()
+        # Receitas 700, 150, 100, 50 (total 1000): acumulado antes de cada um 0%, 70%, 85%, 95% -> A, A, B, C
+        self.produtos = []
+        for i, (receita, quantidade) in enumerate((("700.00", 7), ("150.00", 30), ("100.00", 10), ("50.00", 5))):
+            produto = Produto.objects.create(descricao=f"Produto {i}", preco=Decimal("10.00"), quantidade_estoque=100)
+            ResumoProdutoDia.objects.create(data=hoje, produto=produto, quantidade=quantidade, valor_total=Decimal(receita))
+            self.produtos.append(produto)
+        # Venda fora do período não entra no ranking
+        ResumoProdutoDia.objects.create(
+            data=hoje - timedelta(days=60), produto=self.produtos[3], quantidade=1, valor_total=Decimal("5000.00")
+        )
+
+    # RANKING POR RECEITA COM CLASSES (GET /curva_abc/)
+    def test_curva_abc(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total_receita"], 1000.0)
+        self.assertEqual(
+            [(p["produto"], p["posicao"], p["classe"], p["participacao_acumulada"]) for p in response.data["produtos"]],
+            [("Produto 0", 1, "A", 70.0), ("Produto 1", 2, "A", 85.0), ("Produto 2", 3, "B", 95.0), ("Produto 3", 4, "C", 100.0)],
+        )
+
+    # RANKING POR QUANTIDADE, FILTRO DE CLASSE E LIMITE
+    def test_curva_abc_parametros(self):
+        por_quantidade = self.client.get(self.url, {"ordenar": "quantidade", "limite": 2}).data["produtos"]
+        self.assertEqual([p["produto"] for p in por_quantidade], ["Produto 1", "Produto 2"])
+        self.assertEqual([p["classe"] for p in por_quantidade], ["A", "B"])
+
+        classe_a = self.client.get(self.url, {"classe": "A"}).data["produtos"]
+        self.assertEqual([p["produto"] for p in classe_a], ["Produto 0", "Produto 1"])
+        classe_c = self.client.get(self.url, {"classe": "C"}).data["produtos"]
+        self.assertEqual([p["produto"] for p in classe_c], ["Produto 3"])
+
+        self.assertEqual(self.client.get(self.url, {"classe": "D"}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {"limite": "0"}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    # RESPOSTA EM CACHE
+    def test_curva_abc_cache(self):
+        self.assertEqual(self.client.get(self.url)["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url)["X-Cache"], "HIT")
+
+
+class MigracaoResumosTest(TransactionTestCase):
+    """Carga inicial dos resumos pela migração 0001 sobre vendas já existentes"""
+    antes = [('reports', None), ('vendas', '0001_initial'), ('produtos', '0004_codigo_barras_unico')]
+    depois = [('reports', '0001_initial'), ('vendas', '0001_initial'), ('produtos', '0004_codigo_barras_unico')]
+
+    def setUp(self):
+        self.executor = MigrationExecutor(connection)
+        self.executor.migrate(self.antes)
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    # PREÇO E DESCONTO INTEIROS NÃO CAEM EM DIVISÃO INTEIRA NO SQLITE
+    def test_resumos_populados(self):
+        apps = self.executor.loader.project_state(self.antes[1:]).apps
+        cliente = apps.get_model('clientes', 'Cliente').objects.create(nome="Cliente")
+        produto = apps.get_model('produtos', 'Produto').objects.create(descricao="Caneta", preco=Decimal("10.00"))
+        venda = apps.get_model('vendas', 'Venda').objects.create(cliente=cliente, total_venda=Decimal("28.83"))
+        ItemVendaAntigo = apps.get_model('vendas', 'ItemVenda')
+        ItemVendaAntigo.objects.create(venda=venda, produto=produto, quantidade=3,
+                                       preco_unitario=Decimal("10.00"), desconto_percentual=Decimal("15.00"))
+        ItemVendaAntigo.objects.create(venda=venda, produto=produto, quantidade=1,
+                                       preco_unitario=Decimal("3.33"), desconto_percentual=Decimal("0.00"))
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.depois)
+        apps = executor.loader.project_state(self.depois).apps
+
+        resumo_produto = apps.get_model('reports', 'ResumoProdutoDia').objects.get()
+        self.assertEqual((resumo_produto.quantidade, resumo_produto.valor_total), (4, Decimal("28.83")))
+        resumo_vendas = apps.get_model('reports', 'ResumoVendasDia').objects.get()
+        self.assertEqual((resumo_vendas.quantidade_vendas, resumo_vendas.valor_total), (1, Decimal("28.83")))
@@ -1,6 +1,9 @@
 from django.urls import path
-from .views import RelatorioGeralView
+from .views import CacheRelatoriosView, CurvaABCView, RelatorioGeralView, SerieVendasView
 
 urlpatterns = [
     path('relatorio_geral/', RelatorioGeralView.as_view(), name='relatorio_geral'),
+    path('serie_vendas/', SerieVendasView.as_view(), name='serie_vendas'),
+    path('curva_abc/', CurvaABCView.as_view(), name='curva_abc'),
+    path('cache/', CacheRelatoriosView.as_view(), name='relatorios_cache'),
 ]
\ No newline at end of file
@@ -1,81 +1,135 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.db.models import Sum, Count
-from datetime import date
-from vendas.models import Venda, ItemVenda
-from clientes.models import Cliente
-from produtos.models import Produto 
+from rest_framework import status
+from datetime import timedelta
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from .cache import estatisticas, obter_relatorio, zerar_estatisticas
+from .servicos import curva_abc, relatorio_geral
+from .series import AGRUPAMENTOS, INTERVALOS, serie_vendas
+from vendas.exportacao import intervalo_datas
+
 
 class RelatorioGeralView(APIView):
     """
     Retorna um resumo de métricas do negócio para a tela de Relatórios (Dashboard).
+    Usa um número fixo de consultas, independente da quantidade de vendas e produtos,
+    e guarda o resultado em cache até a próxima alteração (ou até o TTL).
     """
     def get(self, request, format=None):
-        hoje = date.today()
-        
-        # Vendas Totais
-        vendas_totais = Venda.objects.aggregate(
-            total_valor=Sum('total_venda'),
-            total_qtd=Count('id')
-        )
-        
-        # Clientes Ativos 
-        clientes_ativos = Cliente.objects.count()
-        
-        # Produtos Ativos
-        produtos_ativos = Produto.objects.filter(ativo=True).count()
-        
-        # Vendas Recentes (Últimos 5 registros) 
-        vendas_recentes = Venda.objects.select_related('cliente').order_by('-data_venda')[:5]
-        
-        vendas_recentes_data = []
-        pagamentos_mock = ['PIX', 'Cartão', 'Dinheiro'] 
-        
-        for i, venda in enumerate(vendas_recentes):
-            nome_cliente = 'Consumidor Final'
-            if venda.cliente:
-                nome_cliente = venda.cliente.nome
-
-            vendas_recentes_data.append({
-                'data': venda.data_venda.strftime('%d/%m/%Y'),
-                'cliente': nome_cliente,
-                'pagamento': pagamentos_mock[i % len(pagamentos_mock)], 
-                'valor': float(venda.total_venda) 
-            })
-
-        # Estoque de Produtos (Top 5 menor estoque) 
-        produtos_estoque = Produto.objects.order_by('quantidade_estoque')[:5]
-        
-        estoque_data = []
-        for produto in produtos_estoque:
-            # Calcula quantos itens desse produto foram vendidos
-            vendido_total = ItemVenda.objects.filter(
-                produto_id=produto.pk
-            ).aggregate(Sum('quantidade'))['quantidade__sum'] or 0
-            
-            estoque_data.append({
-                'produto': produto.descricao,
-                'estoque': produto.quantidade_estoque,
-                'vendidos': vendido_total
-            })
-
-        # Consolidação Final 
-        data = {
-            'vendas_totais': {
-                'valor': float(vendas_totais['total_valor'] or 0),
-                'quantidade': vendas_totais['total_qtd'] or 0,
-                'comparativo': '+0%' 
-            },
-            'produtos_vendidos': {
-                'quantidade': produtos_ativos,
-                'comparativo': '+0%' 
-            },
-            'clientes_ativos': {
-                'quantidade': clientes_ativos,
-                'comparativo': '+0%' 
-            },
-            'vendas_recentes': vendas_recentes_data,
-            'estoque_produtos': estoque_data,
+        hoje = timezone.localdate()
+        data, acerto = obter_relatorio('geral', lambda: relatorio_geral(hoje), hoje)
+        response = Response(data)
+        response['X-Cache'] = 'HIT' if acerto else 'MISS'
+        return response
+
+
+class SerieVendasView(APIView):
+    """
+    Série temporal de vendas
+    GET /api/reports/serie_vendas/?intervalo=hora|dia|semana|mes&agrupar=vendedor|cliente|produto
+        &data_inicio=AAAA-MM-DD&data_fim=AAAA-MM-DD
+    - intervalo padrão: dia; sem data_inicio, considera os últimos 30 dias
+    - a resposta fica em cache por combinação de parâmetros
+    """
+    def get(self, request, format=None):
+        intervalo = request.query_params.get('intervalo', 'dia')
+        if intervalo not in INTERVALOS:
+            return Response(
+                {"detail": f"Intervalo inválido. Use {', '.join(INTERVALOS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        agrupar = request.query_params.get('agrupar') or None
+        if agrupar is not None and agrupar not in (*AGRUPAMENTOS, 'produto'):
+            return Response(
+                {"detail": "Agrupamento inválido. Use vendedor, cliente ou produto."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        datas = {
+            'data_inicio': request.query_params.get('data_inicio')
+            or (timezone.localdate() - timedelta(days=29)).isoformat(),
+            'data_fim': request.query_params.get('data_fim'),
         }
-        
-        return Response(data)
\ No newline at end of file
+        filtros = intervalo_datas(datas)
+
+        resultados, acerto = obter_relatorio(
+            'serie_vendas',
+            lambda: serie_vendas(filtros, intervalo, agrupar),
+            intervalo, agrupar, *(filtros[chave].isoformat() for chave in sorted(filtros)),
+        )
+        response = Response({
+            'intervalo': intervalo,
+            'agrupar': agrupar,
+            'data_inicio': datas['data_inicio'],
+            'data_fim': datas['data_fim'],
+            'resultados': resultados,
+        })
+        response['X-Cache'] = 'HIT' if acerto else 'MISS'
+        return response
+
+
+class CurvaABCView(APIView):
+    """
+    Produtos mais vendidos com a classificação ABC pela receita
+    GET /api/reports/curva_abc/?data_inicio=AAAA-MM-DD&data_fim=AAAA-MM-DD
+        &ordenar=receita|quantidade&classe=A|B|C&limite=100
+    - sem datas, considera os últimos 30 dias
+    - a resposta fica em cache por combinação de parâmetros
+    """
+    limite_padrao = 100
+    limite_maximo = 100000
+
+    def get(self, request, format=None):
+        params = request.query_params
+        hoje = timezone.localdate()
+        datas = {}
+        for param, padrao in (('data_inicio', hoje - timedelta(days=29)), ('data_fim', hoje)):
+            valor = params.get(param)
+            datas[param] = parse_date(valor) if valor else padrao
+            if datas[param] is None:
+                return Response({param: 'Data inválida. Use o formato AAAA-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        ordenar = params.get('ordenar', 'receita')
+        if ordenar not in ('receita', 'quantidade'):
+            return Response({"detail": "Ordenação inválida. Use receita ou quantidade."}, status=status.HTTP_400_BAD_REQUEST)
+
+        classe = params.get('classe') or None
+        if classe is not None and classe not in ('A', 'B', 'C'):
+            return Response({"detail": "Classe inválida. Use A, B ou C."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limite = int(params.get('limite', self.limite_padrao))
+        except ValueError:
+            limite = 0
+        if not 1 <= limite <= self.limite_maximo:
+            return Response(
+                {"detail": f"Limite inválido. Use um número entre 1 e {self.limite_maximo}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        resultado, acerto = obter_relatorio(
+            'curva_abc',
+            lambda: curva_abc(datas['data_inicio'], datas['data_fim'], ordenar, classe, limite),
+            datas['data_inicio'], datas['data_fim'], ordenar, classe, limite,
+        )
+        response = Response({
+            'data_inicio': datas['data_inicio'].isoformat(),
+            'data_fim': datas['data_fim'].isoformat(),
+            'ordenar': ordenar,
+            'classe': classe,
+            **resultado,
+        })
+        response['X-Cache'] = 'HIT' if acerto else 'MISS'
+        return response
+
+
+class CacheRelatoriosView(APIView):
+    """Acertos/falhas do cache de relatórios (GET) e reinício dos contadores (DELETE)"""
+    def get(self, request, format=None):
+        return Response(estatisticas())
+
+    def delete(self, request, format=None):
+        zerar_estatisticas()
+        return Response(status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
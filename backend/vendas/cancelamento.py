@@ -0,0 +1,56 @@
+from django.db import transaction
+from django.db.models import Sum
+from reports.cache import invalidar_relatorios
+from reports.resumos import estornar_vendas
+from .estoque import devolver_estoque
+from .models import Venda, ItemVenda
+
+
+class LimiteCancelamentoExcedido(Exception):
+    """Levantada quando a seleção passa do máximo de vendas por cancelamento em lote"""
+    def __init__(self, quantidade, limite):
+        self.quantidade = quantidade
+        self.limite = limite
+        super().__init__(f"A seleção tem {quantidade} vendas; o máximo por cancelamento é {limite}.")
+
+
+def cancelar_vendas(ids=None, filtros=None, limite=None, simular=False):
+    """
+    Cancela várias vendas em uma transação, com custo fixo em consultas:
+    trava as vendas (ordem de id), soma os itens por produto, exclui tudo em
+    um DELETE (itens em cascata) e devolve o estoque em um único UPDATE.
+    O cache de relatórios é invalidado uma vez para o lote inteiro.
+    Devolve a lista de ids efetivamente cancelados; ids ausentes (inexistentes
+    ou já cancelados por outra requisição) simplesmente não aparecem.
+
+    `limite` vale para o conjunto selecionado (ids e/ou filtros): acima dele
+    nada é cancelado e sobe LimiteCancelamentoExcedido. Com simular=True só
+    devolve os ids que seriam cancelados, sem alterar nada.
+    """
+    queryset = Venda.objects.select_for_update().order_by('pk')
+    if ids is not None:
+        queryset = queryset.filter(pk__in=ids)
+    if filtros:
+        queryset = queryset.filter(**filtros)
+
+    with transaction.atomic():
+        # Trava no máximo limite + 1 vendas: basta para saber se passou do limite
+        selecao = queryset if limite is None else queryset[:limite + 1]
+        canceladas = list(selecao.values_list('pk', flat=True))
+        if limite is not None and len(canceladas) > limite:
+            raise LimiteCancelamentoExcedido(queryset.count(), limite)
+        if not canceladas or simular:
+            return canceladas
+
+        quantidades = dict(
+            ItemVenda.objects.filter(venda_id__in=canceladas)
+            .values('produto_id')
+            .annotate(total=Sum('quantidade'))
+            .values_list('produto_id', 'total')
+        )
+        estornar_vendas(canceladas)
+        Venda.objects.filter(pk__in=canceladas).delete()
+        devolver_estoque(quantidades)
+        invalidar_relatorios()
+
+    return canceladas
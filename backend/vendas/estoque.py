@@ -0,0 +1,105 @@
+from collections import Counter
+from functools import reduce
+from operator import or_
+from django.db.models import Case, F, PositiveIntegerField, Q, When
+from django.db.models.functions import Coalesce
+from produtos.codigo_barras import invalidar_produtos
+from produtos.models import Produto
+
+
+class EstoqueInsuficiente(Exception):
+    """
+    Levantada quando um ou mais produtos não têm estoque para a baixa.
+    `faltas` mapeia o id do produto para {"descricao", "solicitado", "disponivel"}.
+    """
+    def __init__(self, faltas):
+        self.faltas = faltas
+        super().__init__(f"Estoque insuficiente para {len(faltas)} produto(s).")
+
+
+def somar_quantidades(itens):
+    """Agrupa as quantidades por produto (um produto pode aparecer em várias linhas)"""
+    quantidades = Counter()
+    for item in itens:
+        quantidades[item.produto_id] += item.quantidade
+    return quantidades
+
+
+def baixar_estoque(quantidades):
+    """
+    Reserva o estoque de vários produtos de forma segura contra vendas concorrentes.
+    Deve ser chamada dentro de transaction.atomic().
+
+    1. Trava as linhas com SELECT ... FOR UPDATE sempre em ordem crescente de id,
+       para que dois terminais nunca esperem um pelo outro em ordem inversa (deadlock).
+    2. Confere o saldo travado e levanta EstoqueInsuficiente com todas as faltas.
+    3. Aplica a baixa em um único UPDATE condicional
+       (WHERE id = x AND quantidade_estoque >= n OR ...), que também protege
+       bancos sem suporte a FOR UPDATE, como o SQLite.
+    """
+    ids = sorted(quantidades)
+    if not ids:
+        return
+
+    travados = (
+        Produto.objects.select_for_update()
+        .filter(pk__in=ids)
+        .order_by("pk")
+        .values_list("pk", "descricao", "quantidade_estoque")
+    )
+    faltas = _conferir_saldo(quantidades, travados)
+    if faltas:
+        raise EstoqueInsuficiente(faltas)
+
+    condicao = reduce(or_, (Q(pk=pk, quantidade_estoque__gte=quantidades[pk]) for pk in ids))
+    atualizados = Produto.objects.filter(condicao).update(
+        quantidade_estoque=Case(
+            *[When(pk=pk, then=F("quantidade_estoque") - quantidades[pk]) for pk in ids],
+            default=F("quantidade_estoque"),
+            output_field=PositiveIntegerField(),
+        )
+    )
+    invalidar_produtos(ids=ids)
+
+    if atualizados != len(ids):
+        # Outra transação consumiu o saldo entre a leitura e o UPDATE
+        # (só acontece em bancos sem FOR UPDATE); o chamador faz o rollback.
+        atuais = Produto.objects.filter(pk__in=ids).values_list("pk", "descricao", "quantidade_estoque")
+        raise EstoqueInsuficiente(_conferir_saldo(quantidades, atuais) or {
+            pk: {"descricao": None, "solicitado": quantidades[pk], "disponivel": None} for pk in ids
+        })
+
+
+def devolver_estoque(quantidades):
+    """
+    Devolve ao estoque as quantidades de vários produtos em um único UPDATE
+    relativo (quantidade_estoque = quantidade_estoque + n), sem ler os produtos
+    e sem sobrescrever baixas feitas por vendas concorrentes
+    """
+    ids = sorted(quantidades)
+    if not ids:
+        return 0
+    atualizados = Produto.objects.filter(pk__in=ids).update(
+        quantidade_estoque=Case(
+            *[When(pk=pk, then=Coalesce(F("quantidade_estoque"), 0) + quantidades[pk]) for pk in ids],
+            default=F("quantidade_estoque"),
+            output_field=PositiveIntegerField(),
+        )
+    )
+    invalidar_produtos(ids=ids)
+    return atualizados
+
+
+def _conferir_saldo(quantidades, linhas):
+    encontrados = set()
+    faltas = {}
+    for pk, descricao, estoque in linhas:
+        encontrados.add(pk)
+        disponivel = estoque or 0
+        if disponivel < quantidades[pk]:
+            faltas[pk] = {"descricao": descricao, "solicitado": quantidades[pk], "disponivel": disponivel}
+
+    for pk in quantidades:
+        if pk not in encontrados:
+            faltas[pk] = {"descricao": None, "solicitado": quantidades[pk], "disponivel": 0}
+    return faltas
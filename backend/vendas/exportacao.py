@@ -0,0 +1,125 @@
+import csv
+import json
+from datetime import datetime, time, timedelta
+from itertools import groupby
+from operator import itemgetter
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import serializers
+from .models import ItemVenda
+
+CAMPOS_VENDA = [
+    'venda_id',
+    'venda__data_venda',
+    'venda__cliente_id',
+    'venda__cliente__nome',
+    'venda__vendedor__username',
+    'venda__desconto_percentual',
+    'venda__total_venda',
+]
+CAMPOS_ITEM = [
+    'id',
+    'produto_id',
+    'produto__descricao',
+    'quantidade',
+    'preco_unitario',
+    'desconto_percentual',
+    'subtotal',
+]
+CABECALHO_CSV = [
+    'venda_id', 'data_venda', 'cliente_id', 'cliente', 'vendedor',
+    'desconto_venda', 'total_venda',
+    'item_id', 'produto_id', 'produto', 'quantidade', 'preco_unitario',
+    'desconto_item', 'subtotal',
+]
+
+
+def intervalo_datas(params):
+    """
+    Converte ?data_inicio=AAAA-MM-DD&data_fim=AAAA-MM-DD (ambos opcionais e inclusivos)
+    em filtros de faixa sobre data_venda, que aproveitam índice em vez de __date
+    """
+    filtros = {}
+    for param, lookup, dias in (('data_inicio', 'gte', 0), ('data_fim', 'lt', 1)):
+        valor = params.get(param)
+        if not valor:
+            continue
+        data = parse_date(valor)
+        if data is None:
+            raise serializers.ValidationError({param: 'Data inválida. Use o formato AAAA-MM-DD.'})
+        limite = timezone.make_aware(datetime.combine(data + timedelta(days=dias), time.min))
+        filtros[f'data_venda__{lookup}'] = limite
+    return filtros
+
+
+def linhas_exportacao(filtros, chunk_size=2000):
+    """
+    Uma única consulta itens ⨝ venda ⨝ cliente ⨝ produto, lida com cursor do servidor
+    em blocos de `chunk_size` e ordenada por venda para agrupar os itens em sequência
+    """
+    filtros_itens = {f'venda__{campo}': valor for campo, valor in filtros.items()}
+    return (
+        ItemVenda.objects.filter(**filtros_itens)
+        .order_by('venda_id', 'id')
+        .values(*CAMPOS_VENDA, *CAMPOS_ITEM)
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def gerar_ndjson(linhas):
+    """Uma linha JSON por venda, com os itens aninhados"""
+    for venda_id, itens in groupby(linhas, key=itemgetter('venda_id')):
+        itens = list(itens)
+        primeira = itens[0]
+        venda = {
+            'id': venda_id,
+            'data_venda': primeira['venda__data_venda'],
+            'cliente_id': primeira['venda__cliente_id'],
+            'cliente': primeira['venda__cliente__nome'],
+            'vendedor': primeira['venda__vendedor__username'],
+            'desconto_percentual': primeira['venda__desconto_percentual'],
+            'total_venda': primeira['venda__total_venda'],
+            'itens': [
+                {
+                    'id': item['id'],
+                    'produto_id': item['produto_id'],
+                    'produto': item['produto__descricao'],
+                    'quantidade': item['quantidade'],
+                    'preco_unitario': item['preco_unitario'],
+                    'desconto_percentual': item['desconto_percentual'],
+                    'subtotal': item['subtotal'],
+                }
+                for item in itens
+            ],
+        }
+        yield json.dumps(venda, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+class _Eco:
+    """Pseudo-arquivo para o csv.writer devolver a linha em vez de acumular"""
+    def write(self, valor):
+        return valor
+
+
+def gerar_csv(linhas):
+    """Uma linha CSV por item, repetindo os dados da venda"""
+    writer = csv.writer(_Eco())
+    yield writer.writerow(CABECALHO_CSV)
+    for linha in linhas:
+        yield writer.writerow([
+            linha['venda_id'],
+            linha['venda__data_venda'].isoformat(),
+            linha['venda__cliente_id'],
+            linha['venda__cliente__nome'],
+            linha['venda__vendedor__username'] or '',
+            linha['venda__desconto_percentual'],
+            linha['venda__total_venda'],
+            linha['id'],
+            linha['produto_id'],
+            linha['produto__descricao'],
+            linha['quantidade'],
+            linha['preco_unitario'],
+            linha['desconto_percentual'],
+            linha['subtotal'],
+        ])
@@ -0,0 +1,190 @@
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Index, Max, Min
+from django.utils import timezone
+from clientes.models import Cliente
+from funcionarios.models import Usuario
+from produtos.models import Produto
+from vendas.models import Venda
+
+# Índices medidos: (modelo, nome em Meta.indexes ou Meta.constraints)
+INDICES = [
+    (Venda, 'venda_data_id'),
+    (Produto, 'produto_codigo_barras_unico'),
+    (Produto, 'produto_estoque'),
+    (Produto, 'produto_ativo_estoque'),
+    (Cliente, 'cliente_cpf'),
+    (Usuario, 'usuario_nome'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede as consultas mais frequentes sem e com os índices em um banco de teste "
+        "temporário, populado com --linhas registros por tabela. O banco configurado não é tocado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=1_000_000, help='Registros por tabela')
+        parser.add_argument('--repeticoes', type=int, default=200, help='Execuções de cada consulta')
+        parser.add_argument('--lote', type=int, default=2000, help='Tamanho do lote do bulk_create')
+
+    def handle(self, *args, **options):
+        nome_original = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=False)
+        try:
+            self._executar(options)
+        finally:
+            connection.creation.destroy_test_db(nome_original, verbosity=0)
+
+    def _executar(self, options):
+        linhas = options['linhas']
+        indices = [
+            (modelo, next(
+                indice for indice in [*modelo._meta.indexes, *modelo._meta.constraints] if indice.name == nome
+            ))
+            for modelo, nome in INDICES
+        ]
+        # No SQLite, mexer em constraint recria a tabela a partir do Meta do modelo
+        # (com todos os índices): constraints saem primeiro e entram por último
+        indices.sort(key=lambda par: isinstance(par[1], Index))
+
+        # Popula sem os índices (inserção mais rápida) e mede o "antes"
+        constraints_originais = {modelo: modelo._meta.constraints for modelo, _ in indices}
+        with connection.schema_editor() as editor:
+            for modelo, indice in indices:
+                if isinstance(indice, Index):
+                    editor.remove_index(modelo, indice)
+                else:
+                    modelo._meta.constraints = [c for c in modelo._meta.constraints if c is not indice]
+                    editor.remove_constraint(modelo, indice)
+
+        inicio = time.perf_counter()
+        self._popular(linhas, options['lote'])
+        self.stdout.write(f"{linhas} registros por tabela inseridos em {time.perf_counter() - inicio:.1f}s")
+
+        consultas = self._consultas(linhas)
+        antes = self._medir(consultas, options['repeticoes'])
+
+        inicio = time.perf_counter()
+        for modelo, constraints in constraints_originais.items():
+            modelo._meta.constraints = constraints
+        with connection.schema_editor() as editor:
+            for modelo, indice in reversed(indices):
+                if isinstance(indice, Index):
+                    editor.add_index(modelo, indice)
+                else:
+                    editor.add_constraint(modelo, indice)
+        self.stdout.write(f"Índices criados em {time.perf_counter() - inicio:.1f}s")
+
+        depois = self._medir(consultas, options['repeticoes'])
+
+        self.stdout.write('')
+        self.stdout.write(f"{'consulta':<28}{'sem índice (ms)':>18}{'com índice (ms)':>18}{'ganho':>10}")
+        for nome in consultas:
+            self.stdout.write(
+                f"{nome:<28}{antes[nome]:>18.3f}{depois[nome]:>18.3f}{antes[nome] / max(depois[nome], 1e-6):>9.1f}x"
+            )
+
+    def _popular(self, linhas, lote):
+        agora = timezone.now()
+        cliente = Cliente.objects.create(nome='Cliente Benchmark')
+
+        Cliente.objects.bulk_create(
+            (Cliente(nome=f'Cliente {i}', cpf=self._cpf(i)) for i in range(linhas)),
+            batch_size=lote,
+        )
+        Produto.objects.bulk_create(
+            (
+                Produto(
+                    descricao=f'Produto {i}',
+                    preco=Decimal('9.90'),
+                    quantidade_estoque=(i * 7919) % 1000,
+                    codigo_barras=f'789{i:010d}',
+                    ativo=i % 10 != 0,
+                )
+                for i in range(linhas)
+            ),
+            batch_size=lote,
+        )
+        Usuario.objects.bulk_create(
+            (
+                Usuario(
+                    nome=f'usuario{i}', email=f'usuario{i}@exemplo.com', cep='00000-000',
+                    celular='(00) 00000-0000', endereco='Rua', numero_casa='1', bairro='Centro',
+                    cidade='Cidade', uf='PR', rg=f'RG{i}', cpf=self._cpf(i), cargo='Vendedor',
+                    senha='senha', nivel_acesso='user',
+                )
+                for i in range(linhas)
+            ),
+            batch_size=lote,
+        )
+        Venda.objects.bulk_create(
+            (Venda(cliente=cliente, total_venda=Decimal('10.00')) for _ in range(linhas)),
+            batch_size=lote,
+        )
+        # data_venda é auto_now_add: espalha as vendas pelo último ano, uma faixa de ids por hora
+        horas = 365 * 24
+        ids = Venda.objects.aggregate(menor=Min('id'), maior=Max('id'))
+        por_hora = max(1, (ids['maior'] - ids['menor'] + 1) // horas + 1)
+        for hora in range(horas):
+            inicio = ids['menor'] + hora * por_hora
+            Venda.objects.filter(id__gte=inicio, id__lt=inicio + por_hora).update(
+                data_venda=agora - timedelta(hours=horas - hora)
+            )
+
+    @staticmethod
+    def _cpf(i):
+        return f'{i:011d}'
+
+    def _consultas(self, linhas):
+        aleatorio = random.Random(42)
+        agora = timezone.now()
+
+        def codigo_barras():
+            Produto.objects.filter(codigo_barras=f'789{aleatorio.randrange(linhas):010d}').first()
+
+        def cpf():
+            Cliente.objects.filter(cpf=self._cpf(aleatorio.randrange(linhas))).first()
+
+        def login():
+            Usuario.objects.filter(nome=f'usuario{aleatorio.randrange(linhas)}', senha='senha').first()
+
+        def estoque_baixo():
+            list(Produto.objects.order_by('quantidade_estoque').values('id')[:5])
+
+        def ativos_estoque_baixo():
+            list(Produto.objects.filter(ativo=True, quantidade_estoque__lt=5).values('id')[:50])
+
+        def vendas_periodo():
+            inicio = agora - timedelta(days=aleatorio.randrange(365))
+            Venda.objects.filter(data_venda__gte=inicio, data_venda__lt=inicio + timedelta(days=1)).count()
+
+        def pagina_vendas():
+            limite = agora - timedelta(days=aleatorio.randrange(365))
+            list(Venda.objects.filter(data_venda__lt=limite).order_by('-data_venda', '-id').values('id')[:50])
+
+        return {
+            'produto por codigo_barras': codigo_barras,
+            'cliente por cpf': cpf,
+            'login por nome': login,
+            'menor estoque (top 5)': estoque_baixo,
+            'ativos com estoque baixo': ativos_estoque_baixo,
+            'vendas de um dia': vendas_periodo,
+            'página de vendas': pagina_vendas,
+        }
+
+    @staticmethod
+    def _medir(consultas, repeticoes):
+        tempos = {}
+        for nome, consulta in consultas.items():
+            consulta()  # aquece o cache de páginas do banco
+            inicio = time.perf_counter()
+            for _ in range(repeticoes):
+                consulta()
+            tempos[nome] = (time.perf_counter() - inicio) * 1000 / repeticoes
+        return tempos
@@ -0,0 +1,50 @@
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from clientes.models import Cliente
+from produtos.models import Produto
+from vendas.models import Venda, ItemVenda
+from vendas.nota_fiscal import renderizar_html
+
+
+class Command(BaseCommand):
+    help = "Mede o tempo de renderização da nota fiscal em HTML para vendas de 10, 100 e 1.000 itens."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamanhos', nargs='+', type=int, default=[10, 100, 1000])
+        parser.add_argument('--repeticoes', type=int, default=20)
+
+    def handle(self, *args, **options):
+        for tamanho in options['tamanhos']:
+            venda, itens = self._venda_em_memoria(tamanho)
+            # Primeira renderização compila e guarda os templates no loader com cache
+            ''.join(renderizar_html(venda, itens))
+
+            inicio = time.perf_counter()
+            for _ in range(options['repeticoes']):
+                tamanho_html = sum(len(parte) for parte in renderizar_html(venda, itens))
+            media_ms = (time.perf_counter() - inicio) * 1000 / options['repeticoes']
+
+            self.stdout.write(f"{tamanho:>5} itens: {media_ms:8.2f} ms/nota ({tamanho_html / 1024:.0f} KiB)")
+
+    @staticmethod
+    def _venda_em_memoria(tamanho):
+        """Venda e itens sem tocar no banco, para medir só a renderização"""
+        venda = Venda(
+            id=1,
+            cliente=Cliente(nome='Cliente <Benchmark>'),
+            data_venda=timezone.now(),
+            desconto_percentual=Decimal('5.00'),
+            total_venda=Decimal('999.99'),
+        )
+        itens = [
+            ItemVenda.montar(
+                produto=Produto(descricao=f'Produto {i} & Cia'),
+                quantidade=i % 7 + 1,
+                preco_unitario=Decimal('12.34'),
+                desconto_percentual=Decimal('10.00'),
+            )
+            for i in range(tamanho)
+        ]
+        return venda, itens
@@ -0,0 +1,83 @@
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework import serializers
+from vendas.exportacao import intervalo_datas
+from vendas.notas_lote import gravar_diretorio, gravar_zip, renderizar_em_lote, selecionar_vendas
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera as notas fiscais em PDF de várias vendas em paralelo (pool de processos) "
+        "e grava em um ZIP ou em um diretório."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ids', nargs='+', type=int, help='Ids das vendas')
+        parser.add_argument('--data-inicio', help='AAAA-MM-DD (inclusivo)')
+        parser.add_argument('--data-fim', help='AAAA-MM-DD (inclusivo)')
+        parser.add_argument('--saida', help='Arquivo .zip ou diretório de destino')
+        parser.add_argument('--workers', type=int, default=0, help='Processos (padrão: número de CPUs)')
+        parser.add_argument('--bloco', type=int, default=50, help='Vendas por tarefa enviada ao pool')
+        parser.add_argument(
+            '--benchmark', action='store_true',
+            help='Renderiza sem cache com 1 processo e com --workers processos e compara a vazão',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            filtros = intervalo_datas({
+                'data_inicio': options['data_inicio'],
+                'data_fim': options['data_fim'],
+            })
+        except serializers.ValidationError as exc:
+            raise CommandError(exc.detail)
+
+        ids = selecionar_vendas(options['ids'], filtros)
+        if not ids:
+            raise CommandError('Nenhuma venda encontrada para os filtros informados.')
+
+        if options['benchmark']:
+            self._benchmark(ids, options)
+            return
+
+        if not options['saida']:
+            raise CommandError('Informe --saida (arquivo .zip ou diretório).')
+
+        inicio = time.perf_counter()
+        notas = renderizar_em_lote(
+            ids,
+            workers=options['workers'],
+            tamanho_bloco=options['bloco'],
+            progresso=self._progresso,
+        )
+        if options['saida'].lower().endswith('.zip'):
+            quantidade = gravar_zip(notas, options['saida'])
+        else:
+            quantidade = gravar_diretorio(notas, options['saida'])
+        decorrido = time.perf_counter() - inicio
+
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(
+            f"{quantidade} nota(s) gravada(s) em {options['saida']} "
+            f"em {decorrido:.2f}s ({quantidade / decorrido:.1f} notas/s)"
+        ))
+
+    def _progresso(self, feitos, total):
+        self.stdout.write(f"\r{feitos}/{total} notas ({feitos * 100 // total}%)", ending='')
+        self.stdout.flush()
+
+    def _benchmark(self, ids, options):
+        paralelo = options['workers'] or os.cpu_count() or 1
+        vazoes = []
+        for workers in sorted({1, paralelo}):
+            inicio = time.perf_counter()
+            quantidade = sum(1 for _ in renderizar_em_lote(
+                ids, workers=workers, tamanho_bloco=options['bloco'], usar_cache=False,
+            ))
+            decorrido = time.perf_counter() - inicio
+            vazoes.append(quantidade / decorrido)
+            self.stdout.write(f"workers={workers}: {quantidade} notas em {decorrido:.2f}s ({vazoes[-1]:.1f} notas/s)")
+
+        if len(vazoes) > 1:
+            self.stdout.write(self.style.SUCCESS(f"Aceleração com {paralelo} processos: {vazoes[-1] / vazoes[0]:.2f}x"))
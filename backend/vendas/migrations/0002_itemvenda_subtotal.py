@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:18
+
+from django.db import migrations, models
+from django.db.models.functions import Round
+
+
+def preencher_subtotais(apps, schema_editor):
+    # Um único UPDATE com a mesma conta de ItemVenda.calcular_subtotal.
+    # Divide por 100.0: o SQLite guarda decimais inteiros como INTEGER e / 100 truncaria
+    ItemVenda = apps.get_model('vendas', 'ItemVenda')
+    ItemVenda.objects.update(subtotal=Round(
+        models.F('quantidade') * models.F('preco_unitario') * (100 - models.F('desconto_percentual')) / 100.0,
+        2,
+        output_field=models.DecimalField(max_digits=12, decimal_places=2),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtos', '__first__'),
+        ('vendas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itemvenda',
+            name='subtotal',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.RunPython(preencher_subtotais, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='itemvenda',
+            index=models.Index(fields=['produto', 'subtotal'], name='itemvenda_produto_subtotal'),
+        ),
+    ]
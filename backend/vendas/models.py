@@ -1,3 +1,4 @@
+from decimal import ROUND_HALF_UP, Decimal
 from django.db import models
 from produtos.models import Produto  
 from clientes.models import Cliente  
@@ -11,18 +12,29 @@ class Venda(models.Model):
     total_venda = models.DecimalField(max_digits=10, decimal_places=2, default=0)
 
     def calcular_total(self):
-        """Calcula o total da venda somando os subtotais dos itens"""
-        total = sum(item.subtotal for item in self.itens.all())
-        desconto = total * (self.desconto_percentual / 100)
-        self.total_venda = total - desconto
+        """Calcula o total da venda com um SUM dos subtotais gravados nos itens"""
+        soma = self.itens.aggregate(total=models.Sum('subtotal'))['total']
+        self.total_venda = self.aplicar_desconto(soma or Decimal(0))
         self.save()
         return self.total_venda
 
+    def total_com_desconto(self, itens):
+        """Soma os subtotais dos itens (salvos ou não) aplicando o desconto geral, sem consultar o banco"""
+        return self.aplicar_desconto(sum((item.subtotal for item in itens), Decimal(0)))
+
+    def aplicar_desconto(self, total):
+        desconto = total * (Decimal(self.desconto_percentual) / 100)
+        return (total - desconto).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
     def __str__(self):
         return f"Venda #{self.id} - Cliente: {self.cliente.nome} - Total: R$ {self.total_venda}"
 
     class Meta:
         ordering = ['-data_venda']
+        indexes = [
+            # Filtros por período e paginação por cursor (ORDER BY data_venda DESC, id DESC)
+            models.Index(fields=['data_venda', 'id'], name='venda_data_id'),
+        ]
 
 
 class ItemVenda(models.Model):
@@ -34,17 +46,35 @@ class ItemVenda(models.Model):
     quantidade = models.IntegerField()
     preco_unitario = models.DecimalField(max_digits=10, decimal_places=2)
     desconto_percentual = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    # Subtotal com desconto, gravado na inclusão (itens não são alterados depois):
+    # relatórios agregam com um SUM simples em vez de refazer a conta em SQL ou em Python
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
+
+    @classmethod
+    def montar(cls, **campos):
+        """Cria o item em memória já com o subtotal, para bulk_create (que não chama save())"""
+        item = cls(**campos)
+        item.subtotal = item.calcular_subtotal(item.quantidade, item.preco_unitario, item.desconto_percentual)
+        return item
+
+    def save(self, *args, **kwargs):
+        self.subtotal = self.calcular_subtotal(self.quantidade, self.preco_unitario, self.desconto_percentual)
+        super().save(*args, **kwargs)
 
-    @property
-    def subtotal(self):
-        """Calcula o subtotal do item com desconto"""
-        valor = self.quantidade * self.preco_unitario
-        desconto = valor * (self.desconto_percentual / 100)
-        return valor - desconto
+    @staticmethod
+    def calcular_subtotal(quantidade, preco_unitario, desconto_percentual):
+        """Quantidade x preço com o desconto do item, arredondado em centavos"""
+        valor = quantidade * Decimal(preco_unitario)
+        desconto = valor * (Decimal(desconto_percentual) / 100)
+        return (valor - desconto).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
 
     def __str__(self):
         return f"{self.produto.descricao} x{self.quantidade}"
 
     class Meta:
         verbose_name = 'Item de Venda'
-        verbose_name_plural = 'Itens de Venda'
\ No newline at end of file
+        verbose_name_plural = 'Itens de Venda'
+        indexes = [
+            # Receita por produto (SUM(subtotal) GROUP BY produto) só lendo o índice
+            models.Index(fields=['produto', 'subtotal'], name='itemvenda_produto_subtotal'),
+        ]
\ No newline at end of file
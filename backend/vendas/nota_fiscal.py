@@ -0,0 +1,267 @@
+from functools import lru_cache
+from hashlib import sha256
+from io import BytesIO
+from itertools import islice
+from datetime import datetime
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import prefetch_related_objects
+from django.template.loader import get_template
+
+# Importações para PDF (só importa se reportlab estiver instalado)
+try:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+    REPORTLAB_AVAILABLE = True
+except ImportError:
+    REPORTLAB_AVAILABLE = False
+
+# Incrementar sempre que o layout do PDF mudar: invalida todas as notas em cache
+VERSAO_TEMPLATE = 2
+
+
+def etag_nota_fiscal(venda):
+    """
+    ETag determinística da nota: vendas são imutáveis, então id, data e total
+    junto com a versão do template identificam o conteúdo sem renderizar nada
+    """
+    chave = f"{VERSAO_TEMPLATE}:{venda.pk}:{venda.data_venda.isoformat()}:{venda.total_venda}"
+    return '"%s"' % sha256(chave.encode()).hexdigest()[:32]
+
+
+def _cache():
+    return caches[getattr(settings, 'NOTA_FISCAL_CACHE', 'default')]
+
+
+def _chave_cache(venda):
+    conteudo = etag_nota_fiscal(venda).strip('"')
+    return f"nota_fiscal:v{VERSAO_TEMPLATE}:{venda.pk}:{conteudo}"
+
+
+def obter_pdf(venda):
+    """Devolve o PDF da venda a partir do cache, renderizando só na primeira vez"""
+    cache = _cache()
+    chave = _chave_cache(venda)
+    pdf = cache.get(chave)
+    if pdf is None:
+        prefetch_related_objects([venda], 'itens__produto')
+        pdf = gerar_pdf(venda)
+        cache.set(chave, pdf, timeout=None)
+    return pdf
+
+
+def pdfs_em_cache(vendas):
+    """PDFs já em cache das `vendas`, em um get_many: {venda_id: pdf}"""
+    chaves = {_chave_cache(venda): venda.pk for venda in vendas}
+    return {chaves[chave]: pdf for chave, pdf in _cache().get_many(list(chaves)).items()}
+
+
+def guardar_pdfs(notas):
+    """Guarda no cache os pares (venda, pdf) renderizados fora de obter_pdf"""
+    _cache().set_many({_chave_cache(venda): pdf for venda, pdf in notas}, timeout=None)
+
+
+@lru_cache(maxsize=1)
+def _estilos():
+    """getSampleStyleSheet() é caro: monta os estilos uma vez por processo"""
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#2C3E50'),
+        spaceAfter=30,
+        alignment=TA_CENTER
+    )
+    footer_style = ParagraphStyle(
+        'Footer',
+        parent=styles['Normal'],
+        fontSize=8,
+        textColor=colors.grey,
+        alignment=TA_CENTER
+    )
+    return title_style, footer_style
+
+
+def dados_nota(venda):
+    """
+    Tudo o que a nota impressa usa, em tipos simples (serializáveis com pickle),
+    para renderizar em outro processo sem acesso ao banco.
+    Espera venda com cliente/vendedor carregados; os itens vêm de venda.itens.all()
+    (use prefetch_related('itens__produto') para evitar N+1).
+    """
+    return {
+        'id': venda.id,
+        'data_venda': venda.data_venda,
+        'cliente': venda.cliente.nome,
+        'vendedor': venda.vendedor.username if venda.vendedor else None,
+        'desconto_percentual': venda.desconto_percentual,
+        'total_venda': venda.total_venda,
+        'itens': [
+            (item.produto.descricao, item.quantidade, item.preco_unitario, item.desconto_percentual, item.subtotal)
+            for item in venda.itens.all()
+        ],
+    }
+
+
+def gerar_pdf(venda):
+    """Renderiza a nota fiscal da venda em PDF e devolve os bytes (ver dados_nota)"""
+    return renderizar_pdf(dados_nota(venda))
+
+
+def renderizar_pdfs(lista_dados):
+    """
+    Tarefa dos workers de notas_lote: só ReportLab sobre dados simples. Fica neste
+    módulo, que não importa modelos, para funcionar também com o start method "spawn"
+    (o filho importa o módulo da função sem o Django configurado).
+    """
+    return [renderizar_pdf(dados) for dados in lista_dados]
+
+
+def renderizar_pdf(dados):
+    """Renderiza em PDF os dados de dados_nota(); não consulta o banco"""
+    title_style, footer_style = _estilos()
+
+    # Cria buffer para o PDF
+    buffer = BytesIO()
+
+    # Cria o documento PDF
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        rightMargin=30,
+        leftMargin=30,
+        topMargin=30,
+        bottomMargin=30,
+        # Sem data de criação/ID aleatório nos metadados: mesmos bytes a cada renderização
+        invariant=True,
+    )
+
+    # Container para elementos do PDF
+    elements = []
+
+    # Cabeçalho
+    elements.append(Paragraph("NOTA FISCAL DE VENDA", title_style))
+    elements.append(Spacer(1, 12))
+
+    # Informações da empresa (substitua pelos seus dados)
+    empresa_info = [
+        ["<b>Empresa:</b>", "Sua Empresa LTDA"],
+        ["<b>CNPJ:</b>", "00.000.000/0001-00"],
+        ["<b>Endereço:</b>", "Rua Exemplo, 123 - Cidade/UF"],
+        ["<b>Telefone:</b>", "(45) 99999-9999"]
+    ]
+
+    empresa_table = Table(empresa_info, colWidths=[100, 350])
+    empresa_table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#2C3E50')),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ]))
+    elements.append(empresa_table)
+    elements.append(Spacer(1, 20))
+
+    # Informações da venda
+    venda_info = [
+        ["<b>Nota Fiscal Nº:</b>", f"{dados['id']:06d}"],
+        ["<b>Data:</b>", dados['data_venda'].strftime("%d/%m/%Y %H:%M")],
+        ["<b>Cliente:</b>", dados['cliente']],
+        ["<b>Vendedor:</b>", dados['vendedor'] or "N/A"],
+    ]
+
+    venda_table = Table(venda_info, colWidths=[150, 300])
+    venda_table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#2C3E50')),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#ECF0F1')),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ]))
+    elements.append(venda_table)
+    elements.append(Spacer(1, 20))
+
+    # Cabeçalho da tabela de itens
+    data = [['Item', 'Produto', 'Qtd', 'Preço Unit.', 'Desconto', 'Subtotal']]
+
+    # Itens da venda
+    for idx, (descricao, quantidade, preco_unitario, desconto_percentual, subtotal) in enumerate(dados['itens'], 1):
+        data.append([
+            str(idx),
+            descricao,
+            str(quantidade),
+            f"R$ {preco_unitario:.2f}",
+            f"{desconto_percentual}%",
+            f"R$ {subtotal:.2f}"
+        ])
+
+    # Totais
+    data.append(['', '', '', '', '<b>Desconto Geral:</b>', f"<b>{dados['desconto_percentual']}%</b>"])
+    data.append(['', '', '', '', '<b>TOTAL:</b>', f"<b>R$ {dados['total_venda']:.2f}</b>"])
+
+    # Cria tabela de itens
+    items_table = Table(data, colWidths=[30, 200, 40, 80, 80, 80])
+    items_table.setStyle(TableStyle([
+        # Cabeçalho
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495E')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 11),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+
+        # Corpo
+        ('TEXTCOLOR', (0, 1), (-1, -3), colors.black),
+        ('ALIGN', (2, 1), (2, -3), 'CENTER'),  # Quantidade
+        ('ALIGN', (3, 1), (-1, -1), 'RIGHT'),  # Valores
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 9),
+        ('GRID', (0, 0), (-1, -3), 0.5, colors.grey),
+
+        # Totais
+        ('FONTNAME', (0, -2), (-1, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, -2), (-1, -1), 10),
+        ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#ECF0F1')),
+        ('LINEABOVE', (0, -2), (-1, -2), 2, colors.black),
+        ('LINEABOVE', (0, -1), (-1, -1), 2, colors.black),
+    ]))
+    elements.append(items_table)
+    elements.append(Spacer(1, 30))
+
+    # Rodapé: só dados da venda, para o PDF em cache ser sempre o mesmo para a mesma ETag
+    elements.append(Paragraph(
+        f"Documento referente à venda nº {dados['id']} de {dados['data_venda'].strftime('%d/%m/%Y às %H:%M')}",
+        footer_style
+    ))
+
+    # Gera o PDF
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+def renderizar_html(venda, itens, tamanho_bloco=200):
+    """
+    Gera a nota fiscal em HTML em pedaços, para StreamingHttpResponse.
+    Os templates são compilados uma vez (loader com cache) e os itens saem
+    em blocos de `tamanho_bloco` linhas, sem montar a página inteira em memória.
+    O autoescape do template protege nomes de cliente/produto.
+    """
+    contexto = {
+        'venda': venda,
+        'gerado_em': datetime.now().strftime('%d/%m/%Y às %H:%M'),
+    }
+    yield get_template('vendas/nota_fiscal_html/inicio.html').render(contexto)
+
+    template_itens = get_template('vendas/nota_fiscal_html/itens.html')
+    linhas = enumerate(itens, 1)
+    while True:
+        bloco = list(islice(linhas, tamanho_bloco))
+        if not bloco:
+            break
+        yield template_itens.render({'linhas': bloco})
+
+    yield get_template('vendas/nota_fiscal_html/fim.html').render(contexto)
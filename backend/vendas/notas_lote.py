@@ -0,0 +1,149 @@
+import atexit
+import os
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from pathlib import Path
+from .models import Venda
+from .nota_fiscal import dados_nota, guardar_pdfs, pdfs_em_cache, renderizar_pdfs
+
+
+def selecionar_vendas(ids=None, filtros=None):
+    """Ids das vendas do lote, em ordem crescente (por lista de ids e/ou intervalo de datas)"""
+    queryset = Venda.objects.order_by('pk')
+    if ids:
+        queryset = queryset.filter(pk__in=ids)
+    if filtros:
+        queryset = queryset.filter(**filtros)
+    return list(queryset.values_list('pk', flat=True))
+
+
+def nome_arquivo(venda_id):
+    return f"nota_fiscal_{venda_id:06d}.pdf"
+
+
+def _carregar_bloco(ids):
+    """Carrega um bloco de vendas com cliente, vendedor e itens em 3 consultas"""
+    return list(
+        Venda.objects.filter(pk__in=ids)
+        .select_related('cliente', 'vendedor')
+        .prefetch_related('itens__produto')
+        .order_by('pk')
+    )
+
+
+# Pools de processos do módulo, um por número de workers: criados no primeiro
+# lote e reaproveitados pelos seguintes (subir processos a cada request custa caro)
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _obter_pool(workers):
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers)
+        return pool
+
+
+def _descartar_pool(workers, pool):
+    # Pool quebrado (worker morto) não aceita mais tarefas: o próximo lote cria outro
+    with _pools_lock:
+        if _pools.get(workers) is pool:
+            del _pools[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+@atexit.register
+def _encerrar_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def renderizar_em_lote(ids, workers=None, tamanho_bloco=50, progresso=None, usar_cache=True):
+    """
+    Gera (venda_id, pdf) para cada venda de `ids`, na ordem dos ids.
+
+    As vendas são lidas aqui, bloco a bloco, e só os dados simples de cada nota
+    (dados_nota) vão para os workers: nenhum processo filho usa o ORM nem herda
+    conexões em uso. Renderizar com ReportLab é CPU-bound e segura o GIL, então
+    com workers > 1 os blocos vão para um ProcessPoolExecutor do módulo, mantendo
+    no máximo 2 blocos por worker em andamento. Com workers=1 tudo roda no
+    processo atual (útil em testes). Notas já em cache não são renderizadas.
+    `progresso(feitos, total)` é chamado a cada bloco concluído.
+    Com usar_cache=False as notas são sempre renderizadas (para benchmark).
+    """
+    workers = workers or os.cpu_count() or 1
+    blocos = [ids[i:i + tamanho_bloco] for i in range(0, len(ids), tamanho_bloco)]
+    total = len(ids)
+    feitos = 0
+    pool = _obter_pool(workers) if workers > 1 and len(blocos) > 1 else None
+
+    def enviar(bloco):
+        vendas = _carregar_bloco(bloco)
+        em_cache = pdfs_em_cache(vendas) if usar_cache else {}
+        pendentes = [venda for venda in vendas if venda.pk not in em_cache]
+        lista_dados = [dados_nota(venda) for venda in pendentes]
+        if pool is None or not lista_dados:
+            renderizadas = renderizar_pdfs(lista_dados)
+        else:
+            renderizadas = pool.submit(renderizar_pdfs, lista_dados)
+        return vendas, em_cache, pendentes, renderizadas
+
+    em_andamento = deque()
+    restantes = iter(blocos)
+    try:
+        for bloco in islice(restantes, 2 * workers if pool else 1):
+            em_andamento.append(enviar(bloco))
+        while em_andamento:
+            vendas, em_cache, pendentes, renderizadas = em_andamento.popleft()
+            if isinstance(renderizadas, Future):
+                try:
+                    renderizadas = renderizadas.result()
+                except BrokenProcessPool:
+                    _descartar_pool(workers, pool)
+                    raise
+            # Lê o próximo bloco enquanto os workers renderizam os já enviados
+            for bloco in islice(restantes, 1):
+                em_andamento.append(enviar(bloco))
+
+            novas = dict(zip((venda.pk for venda in pendentes), renderizadas))
+            if usar_cache and novas:
+                guardar_pdfs(zip(pendentes, renderizadas))
+            for venda in vendas:
+                yield venda.pk, em_cache.get(venda.pk) or novas[venda.pk]
+            feitos += len(vendas)
+            if progresso:
+                progresso(feitos, total)
+    finally:
+        # Gerador abandonado no meio: libera o pool compartilhado das tarefas restantes
+        for *_, renderizadas in em_andamento:
+            if isinstance(renderizadas, Future):
+                renderizadas.cancel()
+
+
+def gravar_zip(notas, destino):
+    """Grava as notas em um ZIP (PDF já é comprimido, então sem deflate); `destino` é caminho ou arquivo"""
+    quantidade = 0
+    with zipfile.ZipFile(destino, 'w', compression=zipfile.ZIP_STORED) as arquivo_zip:
+        for venda_id, pdf in notas:
+            arquivo_zip.writestr(nome_arquivo(venda_id), pdf)
+            quantidade += 1
+    return quantidade
+
+
+def gravar_diretorio(notas, destino):
+    """Grava um PDF por venda dentro do diretório `destino`"""
+    pasta = Path(destino)
+    pasta.mkdir(parents=True, exist_ok=True)
+    quantidade = 0
+    for venda_id, pdf in notas:
+        (pasta / nome_arquivo(venda_id)).write_bytes(pdf)
+        quantidade += 1
+    return quantidade
@@ -0,0 +1,108 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginação por chave (keyset) em (data, id), do mais recente para o mais antigo.
+    Cada página é um `WHERE (data, id) < (cursor) ORDER BY data DESC, id DESC LIMIT n`,
+    então o custo não cresce com o histórico e os cursores continuam válidos
+    mesmo com vendas novas entrando no topo.
+
+    Query params:
+    - cursor: valor opaco devolvido em `next`
+    - page_size: tamanho da página (limitado a max_page_size)
+    """
+    campo_data = 'data_venda'
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Cursor inválido.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        posicao = self.decode_cursor(request)
+
+        queryset = queryset.order_by(f'-{self.campo_data}', '-id')
+        if posicao is not None:
+            data, pk = posicao
+            queryset = queryset.filter(
+                Q(**{f'{self.campo_data}__lt': data}) | Q(**{self.campo_data: data, 'id__lt': pk})
+            )
+
+        resultados = list(queryset[:self.page_size + 1])
+        self.has_next = len(resultados) > self.page_size
+        resultados = resultados[:self.page_size]
+        self.next_position = self.get_position(resultados[-1]) if self.has_next else None
+        return resultados
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            tamanho = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if tamanho <= 0:
+            return self.page_size
+        return min(tamanho, self.max_page_size)
+
+    def get_position(self, instance):
+        valor = instance
+        for atributo in self.campo_data.split('__'):
+            valor = getattr(valor, atributo)
+        return valor, instance.pk
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def encode_cursor(self, posicao):
+        data, pk = posicao
+        return urlsafe_b64encode(f'{data.isoformat()}|{pk}'.encode('ascii')).decode('ascii')
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            data, pk = urlsafe_b64decode(cursor.encode('ascii')).decode('ascii').split('|')
+            data = parse_datetime(data)
+            pk = int(pk)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if data is None:
+            raise NotFound(self.invalid_cursor_message)
+        return data, pk
+
+
+class VendaPagination(KeysetPagination):
+    campo_data = 'data_venda'
+
+
+class ItemVendaPagination(KeysetPagination):
+    campo_data = 'venda__data_venda'
@@ -1,11 +1,33 @@
+from decimal import Decimal
 from rest_framework import serializers
 from django.db import transaction
+from .estoque import EstoqueInsuficiente, baixar_estoque, somar_quantidades
 from .models import Venda, ItemVenda  
 from produtos.models import Produto   
 from clientes.models import Cliente   
+from reports.resumos import registrar_venda
+
+
+class ProdutoLoteField(serializers.PrimaryKeyRelatedField):
+    """
+    Resolve o produto usando o lote carregado pelo VendaSerializer
+    (uma única consulta para todos os itens); cai no comportamento
+    padrão quando usado fora de uma venda.
+    """
+    def to_internal_value(self, data):
+        produtos = getattr(self.root, "_produtos_em_lote", None)
+        if produtos is not None:
+            try:
+                produto = produtos.get(int(data))
+            except (TypeError, ValueError):
+                produto = None
+            if produto is not None:
+                return produto
+        return super().to_internal_value(data)
+
 
 class ItemVendaSerializer(serializers.ModelSerializer):
-    produto = serializers.PrimaryKeyRelatedField(
+    produto = ProdutoLoteField(
         queryset=Produto.objects.all()  
     )
     produto_nome = serializers.CharField(source="produto.descricao", read_only=True)
@@ -37,6 +59,8 @@ class ItemVendaSerializer(serializers.ModelSerializer):
         return value
 
     def validate(self, data):
+        # Checagem antecipada para resposta amigável; a garantia contra
+        # vendas concorrentes fica em estoque.baixar_estoque()
         produto = data.get("produto")
         quantidade = data.get("quantidade")
 
@@ -81,6 +105,19 @@ class VendaSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("A venda deve ter pelo menos 1 item.")
         return value
 
+    def to_internal_value(self, data):
+        """Carrega todos os produtos da venda em uma única consulta antes de validar os itens"""
+        itens = data.get("itens") if hasattr(data, "get") else None
+        if isinstance(itens, list):
+            ids = set()
+            for item in itens:
+                try:
+                    ids.add(int(item.get("produto")))
+                except (AttributeError, TypeError, ValueError):
+                    continue
+            self._produtos_em_lote = Produto.objects.in_bulk(ids)
+        return super().to_internal_value(data)
+
     def create(self, validated_data):
         request = self.context.get("request")
         
@@ -91,28 +128,59 @@ class VendaSerializer(serializers.ModelSerializer):
 
         with transaction.atomic():
             itens_data = validated_data.pop("itens")
-            venda = Venda.objects.create(**validated_data)
-
-            for item_data in itens_data:
-                produto = item_data["produto"]
-                quantidade = item_data["quantidade"]
-                preco_unitario = item_data.get("preco_unitario", produto.preco)
-                desconto_item = item_data.get("desconto_percentual", 0)
-
-                ItemVenda.objects.create(
-                    venda=venda,
-                    produto=produto,
-                    quantidade=quantidade,
-                    preco_unitario=preco_unitario,
-                    desconto_percentual=desconto_item,
+            venda = Venda(**validated_data)
+
+            # Monta os itens em memória para calcular o total antes do INSERT
+            itens = [
+                ItemVenda.montar(
+                    produto=item_data["produto"],
+                    quantidade=item_data["quantidade"],
+                    preco_unitario=item_data.get("preco_unitario", item_data["produto"].preco),
+                    desconto_percentual=item_data.get("desconto_percentual", Decimal(0)),
                 )
+                for item_data in itens_data
+            ]
+            self._reservar_estoque(itens)
 
-                produto.quantidade_estoque -= quantidade
-                produto.save()
+            venda.total_venda = venda.total_com_desconto(itens)
+            venda.save()
 
-            venda.calcular_total()
+            for item in itens:
+                item.venda = venda
+            ItemVenda.objects.bulk_create(itens)
+            registrar_venda(venda, itens)
+
+            self._cachear_itens(venda, itens)
             return venda
 
+    @staticmethod
+    def _reservar_estoque(itens):
+        """Baixa o estoque de forma atômica e aponta as linhas que ficaram sem saldo"""
+        try:
+            baixar_estoque(somar_quantidades(itens))
+        except EstoqueInsuficiente as exc:
+            erros = []
+            for item in itens:
+                falta = exc.faltas.get(item.produto_id)
+                if falta is None:
+                    erros.append({})
+                    continue
+                erros.append({
+                    "quantidade": [
+                        f"Estoque insuficiente para {item.produto.descricao}. "
+                        f"Solicitado: {falta['solicitado']}. Disponível: {falta['disponivel']}"
+                    ]
+                })
+            raise serializers.ValidationError({"itens": erros})
+
+    @staticmethod
+    def _cachear_itens(venda, itens):
+        """Preenche o cache de venda.itens para que a resposta não consulte os itens de novo"""
+        queryset = venda.itens.all()
+        queryset._result_cache = list(itens)
+        queryset._prefetch_done = True
+        venda._prefetched_objects_cache = {"itens": queryset}
+
     def update(self, instance, validated_data):
         raise serializers.ValidationError("Vendas não podem ser modificadas após criadas.")
 
@@ -120,7 +188,9 @@ class VendaSerializer(serializers.ModelSerializer):
 class VendaListSerializer(serializers.ModelSerializer):
     cliente_nome = serializers.CharField(source="cliente.nome", read_only=True)
     vendedor_nome = serializers.CharField(source="vendedor.username", read_only=True)
-    quantidade_itens = serializers.SerializerMethodField()
+    # Anotados pela queryset de listagem (ver VendaViewSet.get_queryset)
+    quantidade_itens = serializers.IntegerField(read_only=True)
+    quantidade_total = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Venda
@@ -131,7 +201,5 @@ class VendaListSerializer(serializers.ModelSerializer):
             "data_venda",
             "total_venda",
             "quantidade_itens",
-        ]
-
-    def get_quantidade_itens(self, obj):
-        return obj.itens.count()
\ No newline at end of file
+            "quantidade_total",
+        ]
\ No newline at end of file
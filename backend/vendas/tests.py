@@ -1,3 +1,526 @@
-from django.test import TestCase
+import csv
+import io
+import os
+import json
+import tempfile
+import zipfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APITestCase
+from clientes.models import Cliente
+from produtos.models import Produto
+from vendas import nota_fiscal, notas_lote
+from vendas.models import Venda, ItemVenda
+from vendas.serializers import VendaSerializer
+from vendas.views import VendaViewSet
 
-# Create your tests here.
+
+# Cache das notas em memória: os testes não gravam PDFs em backend/.cache
+@override_settings(CACHES={
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "notas_fiscais": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "testes-nf"},
+})
+class VendaAPITest(APITestCase):
+
+    def setUp(self):
+        caches["notas_fiscais"].clear()
+        self.cliente = Cliente.objects.create(nome="Cliente Teste")
+        self.produtos = [
+            Produto.objects.create(
+                descricao=f"Produto {i}",
+                preco=Decimal("10.00"),
+                quantidade_estoque=100,
+            )
+            for i in range(40)
+        ]
+        self.list_url = reverse("venda-list")
+
+    def _payload(self, produtos, quantidade=2, **extra):
+        payload = {
+            "cliente": self.cliente.id,
+            "itens": [{"produto": p.id, "quantidade": quantidade} for p in produtos],
+        }
+        payload.update(extra)
+        return payload
+
+    # CRIAR VENDA (POST /)
+    def test_criar_venda(self):
+        payload = self._payload(self.produtos[:2], quantidade=3, desconto_percentual="10.00")
+        payload["itens"][0]["desconto_percentual"] = "50.00"
+
+        response = self.client.post(self.list_url, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # (30 * 0.5 + 30) * 0.9
+        self.assertEqual(response.data["total_venda"], "40.50")
+        self.assertEqual(len(response.data["itens"]), 2)
+        self.assertEqual(response.data["itens"][0]["produto_nome"], "Produto 0")
+
+        venda = Venda.objects.get(pk=response.data["id"])
+        self.assertEqual(venda.total_venda, Decimal("40.50"))
+        self.assertEqual(venda.itens.count(), 2)
+        self.produtos[0].refresh_from_db()
+        self.assertEqual(self.produtos[0].quantidade_estoque, 97)
+
+    # SUBTOTAL GRAVADO NO ITEM E TOTAL RECALCULADO COM SUM NO BANCO
+    def test_subtotal_gravado(self):
+        payload = self._payload(self.produtos[:2], quantidade=3, desconto_percentual="10.00")
+        payload["itens"][0].update(preco_unitario="3.33", desconto_percentual="15.00")
+
+        response = self.client.post(self.list_url, payload, format="json")
+
+        venda = Venda.objects.get(pk=response.data["id"])
+        # 3 * 3.33 * 0.85 = 8.4915 -> 8.49
+        self.assertEqual(
+            sorted(venda.itens.values_list("subtotal", flat=True)),
+            [Decimal("8.49"), Decimal("30.00")],
+        )
+        venda.total_venda = Decimal(0)
+        with self.assertNumQueries(2):
+            venda.calcular_total()
+        # (8.49 + 30) * 0.9
+        self.assertEqual(venda.total_venda, Decimal("34.64"))
+        self.assertEqual(response.data["total_venda"], "34.64")
+
+    # MEIO CENTAVO NO DESCONTO GERAL ARREDONDA PARA CIMA, COMO NOS ITENS
+    def test_desconto_geral_meio_centavo(self):
+        payload = self._payload(self.produtos[:1], quantidade=1, desconto_percentual="50.00")
+        payload["itens"][0]["preco_unitario"] = "10.05"
+
+        response = self.client.post(self.list_url, payload, format="json")
+
+        # 10.05 * 0.5 = 5.025 -> 5.03
+        self.assertEqual(response.data["total_venda"], "5.03")
+        self.assertEqual(Venda.objects.get(pk=response.data["id"]).total_venda, Decimal("5.03"))
+
+    # PRODUTO REPETIDO EM DUAS LINHAS BAIXA O ESTOQUE SOMADO
+    def test_criar_venda_produto_repetido(self):
+        produto = self.produtos[0]
+        payload = self._payload([produto, produto], quantidade=4)
+
+        response = self.client.post(self.list_url, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        produto.refresh_from_db()
+        self.assertEqual(produto.quantidade_estoque, 92)
+
+    # NÚMERO DE CONSULTAS NÃO CRESCE COM O TAMANHO DA CESTA
+    def test_criar_venda_consultas_constantes(self):
+        with CaptureQueriesContext(connection) as pequena:
+            response = self.client.post(self.list_url, self._payload(self.produtos[:1]), format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        with CaptureQueriesContext(connection) as grande:
+            response = self.client.post(self.list_url, self._payload(self.produtos), format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(len(pequena), len(grande))
+        self.assertEqual(ItemVenda.objects.count(), 41)
+
+    # ESTOQUE INSUFICIENTE SOMANDO LINHAS DO MESMO PRODUTO
+    def test_criar_venda_estoque_insuficiente_aponta_linhas(self):
+        produto = self.produtos[0]
+        payload = self._payload([self.produtos[1], produto, produto], quantidade=60)
+        payload["itens"][0]["quantidade"] = 1
+
+        response = self.client.post(self.list_url, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        erros = response.data["itens"]
+        self.assertEqual(erros[0], {})
+        self.assertIn("Disponível: 100", str(erros[1]["quantidade"][0]))
+        self.assertIn("quantidade", erros[2])
+        self.assertEqual(Venda.objects.count(), 0)
+        self.produtos[1].refresh_from_db()
+        self.assertEqual(self.produtos[1].quantidade_estoque, 100)
+
+    # OUTRO TERMINAL CONSUMIU O ESTOQUE ENTRE A VALIDAÇÃO E A GRAVAÇÃO
+    def test_criar_venda_estoque_consumido_apos_validacao(self):
+        produto = self.produtos[0]
+        serializer = VendaSerializer(data=self._payload([produto], quantidade=5))
+        self.assertTrue(serializer.is_valid())
+
+        Produto.objects.filter(pk=produto.pk).update(quantidade_estoque=3)
+
+        with self.assertRaises(ValidationError):
+            serializer.save()
+        produto.refresh_from_db()
+        self.assertEqual(produto.quantidade_estoque, 3)
+        self.assertEqual(Venda.objects.count(), 0)
+
+    # LISTAR VENDAS (GET /) EM UMA ÚNICA CONSULTA
+    def test_listar_vendas_com_contagem_anotada(self):
+        for quantidade in (1, 2, 3):
+            response = self.client.post(self.list_url, self._payload(self.produtos[:quantidade], quantidade=2), format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.list_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        contagens = sorted((v["quantidade_itens"], v["quantidade_total"]) for v in response.data["results"])
+        self.assertEqual(contagens, [(1, 2), (2, 4), (3, 6)])
+
+    # LISTAGEM PAGINADA POR CURSOR PERCORRE TODAS AS VENDAS SEM REPETIR
+    def test_listar_vendas_paginacao_por_cursor(self):
+        for produto in self.produtos[:5]:
+            self.client.post(self.list_url, self._payload([produto]), format="json")
+        # Força empate de data para exercitar o desempate por id
+        Venda.objects.update(data_venda=Venda.objects.first().data_venda)
+
+        ids = []
+        url = self.list_url + "?page_size=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data["results"]), 2)
+            ids.extend(v["id"] for v in response.data["results"])
+            url = response.data["next"]
+
+        self.assertEqual(ids, sorted(Venda.objects.values_list("id", flat=True), reverse=True))
+
+    def test_listar_itens_paginacao_por_cursor(self):
+        self.client.post(self.list_url, self._payload(self.produtos[:3]), format="json")
+
+        response = self.client.get(reverse("item-venda-list"), {"page_size": 2})
+        self.assertEqual(len(response.data["results"]), 2)
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertIsNone(response.data["next"])
+
+    def test_listar_vendas_cursor_invalido(self):
+        response = self.client.get(self.list_url, {"cursor": "invalido"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    # EXPORTAR VENDAS EM NDJSON (GET /exportar/)
+    def test_exportar_ndjson(self):
+        for quantidade in (1, 3):
+            self.client.post(self.list_url, self._payload(self.produtos[:quantidade]), format="json")
+
+        response = self.client.get(reverse("venda-exportar"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        linhas = b"".join(response.streaming_content).decode().splitlines()
+        vendas = [json.loads(linha) for linha in linhas]
+        self.assertEqual([len(v["itens"]) for v in vendas], [1, 3])
+        self.assertEqual(vendas[0]["total_venda"], "20.00")
+        self.assertEqual(Decimal(vendas[1]["itens"][0]["subtotal"]), Decimal("20"))
+
+    # EXPORTAR EM CSV COM FILTRO DE DATAS
+    def test_exportar_csv_com_intervalo(self):
+        self.client.post(self.list_url, self._payload(self.produtos[:2]), format="json")
+        antiga = self.client.post(self.list_url, self._payload(self.produtos[:1]), format="json").data["id"]
+        Venda.objects.filter(pk=antiga).update(data_venda=Venda.objects.get(pk=antiga).data_venda - timedelta(days=10))
+        hoje = Venda.objects.exclude(pk=antiga).get().data_venda.date().isoformat()
+
+        response = self.client.get(reverse("venda-exportar"), {"formato": "csv", "data_inicio": hoje, "data_fim": hoje})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        linhas = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(linhas[0][0], "venda_id")
+        self.assertEqual(len(linhas), 3)
+        self.assertNotIn(str(antiga), {linha[0] for linha in linhas[1:]})
+
+    def test_exportar_parametros_invalidos(self):
+        response = self.client.get(reverse("venda-exportar"), {"formato": "xml"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(reverse("venda-exportar"), {"data_inicio": "31/12/2024"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # NOTA FISCAL EM PDF COM CACHE E ETAG (GET /<id>/nota_fiscal/)
+    def test_nota_fiscal_cache_e_etag(self):
+        venda_id = self.client.post(self.list_url, self._payload(self.produtos[:3]), format="json").data["id"]
+        url = reverse("venda-nota-fiscal", args=[venda_id])
+
+        with mock.patch.object(nota_fiscal, "gerar_pdf", wraps=nota_fiscal.gerar_pdf) as gerar_pdf:
+            primeira = self.client.get(url)
+            segunda = self.client.get(url)
+
+        self.assertEqual(primeira.status_code, status.HTTP_200_OK)
+        self.assertTrue(primeira.content.startswith(b"%PDF"))
+        self.assertEqual(primeira.content, segunda.content)
+        self.assertEqual(gerar_pdf.call_count, 1)
+
+        etag = primeira["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH='"outra"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    # PDF DEPENDE SÓ DA VENDA (O CACHE NÃO GUARDA HORA DE GERAÇÃO)
+    def test_nota_fiscal_pdf_deterministico(self):
+        venda_id = self.client.post(self.list_url, self._payload(self.produtos[:2]), format="json").data["id"]
+        venda = Venda.objects.prefetch_related("itens__produto").get(pk=venda_id)
+
+        primeiro = nota_fiscal.gerar_pdf(venda)
+        # Um dia depois: relógio do reportlab (metadados) e o usado pelo módulo
+        amanha = timezone.now() + timedelta(days=1)
+        with mock.patch("time.time", return_value=amanha.timestamp()), \
+                mock.patch("vendas.nota_fiscal.datetime") as relogio:
+            relogio.now.return_value = amanha
+            segundo = nota_fiscal.gerar_pdf(venda)
+
+        self.assertEqual(primeiro, segundo)
+
+    # NOTA FISCAL EM HTML (GET /<id>/nota_fiscal_html/)
+    def test_nota_fiscal_html_template_com_escape(self):
+        self.cliente.nome = "<script>alert(1)</script>"
+        self.cliente.save()
+        venda_id = self.client.post(self.list_url, self._payload(self.produtos[:3]), format="json").data["id"]
+
+        response = self.client.get(reverse("venda-nota-fiscal-html", args=[venda_id]))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        html = b"".join(response.streaming_content).decode()
+        self.assertIn(f"Nota Fiscal Nº: {venda_id:06d}", html)
+        self.assertIn("&lt;script&gt;", html)
+        self.assertNotIn("<script>", html)
+        self.assertIn("R$ 20.00", html)
+        self.assertIn("R$ 60.00", html)
+        self.assertTrue(html.rstrip().endswith("</html>"))
+
+    # NOTAS FISCAIS EM LOTE (POST /notas_fiscais_lote/)
+    @override_settings(NOTA_FISCAL_LOTE_WORKERS=1)
+    def test_notas_fiscais_lote_zip(self):
+        ids = [
+            self.client.post(self.list_url, self._payload(self.produtos[:i]), format="json").data["id"]
+            for i in (1, 2, 3)
+        ]
+
+        response = self.client.post(reverse("venda-notas-fiscais-lote"), {"ids": ids[:2]}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content))) as arquivo_zip:
+            nomes = arquivo_zip.namelist()
+            self.assertEqual(nomes, [f"nota_fiscal_{i:06d}.pdf" for i in ids[:2]])
+            self.assertTrue(arquivo_zip.read(nomes[0]).startswith(b"%PDF"))
+
+    # WORKERS RECEBEM SÓ DADOS SIMPLES E O POOL É REAPROVEITADO ENTRE LOTES
+    def test_notas_em_lote_com_pool(self):
+        ids = [
+            self.client.post(self.list_url, self._payload(self.produtos[:i]), format="json").data["id"]
+            for i in (1, 2, 3)
+        ]
+        esperado = [
+            (venda.pk, nota_fiscal.gerar_pdf(venda))
+            for venda in Venda.objects.select_related("cliente").prefetch_related("itens__produto").order_by("pk")
+        ]
+
+        primeiro = list(notas_lote.renderizar_em_lote(ids, workers=2, tamanho_bloco=1))
+        pool = notas_lote._obter_pool(2)
+        # Segunda vez vem do cache, sem renderizar nada
+        with mock.patch.object(pool, "submit", wraps=pool.submit) as submit:
+            segundo = list(notas_lote.renderizar_em_lote(ids, workers=2, tamanho_bloco=1))
+
+        self.assertEqual(primeiro, esperado)
+        self.assertEqual(segundo, esperado)
+        submit.assert_not_called()
+        self.assertIs(notas_lote._obter_pool(2), pool)
+
+    def test_notas_fiscais_lote_sem_filtro(self):
+        response = self.client.post(reverse("venda-notas-fiscais-lote"), {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_comando_gerar_notas_fiscais_diretorio(self):
+        venda_id = self.client.post(self.list_url, self._payload(self.produtos[:2]), format="json").data["id"]
+
+        with tempfile.TemporaryDirectory() as pasta:
+            call_command("gerar_notas_fiscais", ids=[venda_id], saida=pasta, workers=1, stdout=io.StringIO())
+            self.assertEqual(os.listdir(pasta), [f"nota_fiscal_{venda_id:06d}.pdf"])
+
+    # CANCELAR VENDA (POST /<id>/cancelar/)
+    def test_cancelar_venda_devolve_estoque(self):
+        produto = self.produtos[0]
+        payload = self._payload([produto, produto, self.produtos[1]], quantidade=5)
+        venda_id = self.client.post(self.list_url, payload, format="json").data["id"]
+        # Venda concorrente depois desta: a devolução não pode sobrescrevê-la
+        Produto.objects.filter(pk=produto.pk).update(quantidade_estoque=50)
+
+        response = self.client.post(reverse("venda-cancelar", args=[venda_id]))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Venda.objects.filter(pk=venda_id).exists())
+        self.assertEqual(ItemVenda.objects.count(), 0)
+        produto.refresh_from_db()
+        self.assertEqual(produto.quantidade_estoque, 60)
+        self.produtos[1].refresh_from_db()
+        self.assertEqual(self.produtos[1].quantidade_estoque, 100)
+
+    # EXCLUIR VENDA (DELETE /<id>/) SEGUE O CANCELAMENTO
+    def test_excluir_venda_devolve_estoque(self):
+        produto = self.produtos[0]
+        venda_id = self.client.post(self.list_url, self._payload([produto], quantidade=5), format="json").data["id"]
+
+        response = self.client.delete(reverse("venda-detail", args=[venda_id]))
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Venda.objects.filter(pk=venda_id).exists())
+        produto.refresh_from_db()
+        self.assertEqual(produto.quantidade_estoque, 100)
+        self.assertEqual(self.client.delete(reverse("venda-detail", args=[venda_id])).status_code,
+                         status.HTTP_404_NOT_FOUND)
+
+    # NÚMERO DE CONSULTAS DO CANCELAMENTO NÃO CRESCE COM OS ITENS
+    def test_cancelar_venda_consultas_constantes(self):
+        pequena = self.client.post(self.list_url, self._payload(self.produtos[:1]), format="json").data["id"]
+        grande = self.client.post(self.list_url, self._payload(self.produtos), format="json").data["id"]
+
+        with CaptureQueriesContext(connection) as consultas_pequena:
+            self.client.post(reverse("venda-cancelar", args=[pequena]))
+        with CaptureQueriesContext(connection) as consultas_grande:
+            self.client.post(reverse("venda-cancelar", args=[grande]))
+
+        self.assertEqual(len(consultas_pequena), len(consultas_grande))
+        self.assertEqual(Venda.objects.count(), 0)
+
+    # CANCELAR VÁRIAS VENDAS (POST /cancelar_lote/)
+    def test_cancelar_lote_por_ids(self):
+        ids = [
+            self.client.post(self.list_url, self._payload(self.produtos[:3], quantidade=4), format="json").data["id"]
+            for _ in range(3)
+        ]
+
+        response = self.client.post(reverse("venda-cancelar-lote"), {"ids": ids[:2] + [999999]}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["canceladas"], 2)
+        self.assertEqual(response.data["resultados"], [
+            {"id": ids[0], "status": "cancelada"},
+            {"id": ids[1], "status": "cancelada"},
+            {"id": 999999, "status": "nao_encontrada"},
+        ])
+        self.assertEqual(list(Venda.objects.values_list("id", flat=True)), [ids[2]])
+        self.produtos[0].refresh_from_db()
+        self.assertEqual(self.produtos[0].quantidade_estoque, 96)
+
+    def test_cancelar_lote_por_cliente(self):
+        outro = Cliente.objects.create(nome="Outro")
+        self.client.post(self.list_url, self._payload(self.produtos[:1]), format="json")
+        self.client.post(self.list_url, {**self._payload(self.produtos[:1]), "cliente": outro.id}, format="json")
+
+        response = self.client.post(reverse("venda-cancelar-lote"), {"cliente": outro.id}, format="json")
+
+        self.assertEqual(response.data["canceladas"], 1)
+        self.assertFalse(Venda.objects.filter(cliente=outro).exists())
+        self.assertTrue(Venda.objects.filter(cliente=self.cliente).exists())
+
+    # LOTE INVALIDA O CACHE DE RELATÓRIOS UMA VEZ, COM CONSULTAS CONSTANTES
+    def test_cancelar_lote_invalida_uma_vez(self):
+        def criar(quantidade):
+            ids = []
+            for _ in range(quantidade):
+                venda = Venda.objects.create(cliente=self.cliente, total_venda=Decimal("10.00"))
+                ItemVenda.objects.create(venda=venda, produto=self.produtos[0], quantidade=1, preco_unitario=Decimal("10.00"))
+                ids.append(venda.id)
+            return ids
+
+        poucas, muitas = criar(5), criar(50)
+        with mock.patch("reports.cache._trocar_versao") as trocar_versao:
+            with CaptureQueriesContext(connection) as consultas_poucas:
+                self.client.post(reverse("venda-cancelar-lote"), {"ids": poucas}, format="json")
+            with CaptureQueriesContext(connection) as consultas_muitas:
+                response = self.client.post(reverse("venda-cancelar-lote"), {"ids": muitas}, format="json")
+
+        self.assertEqual(response.data["canceladas"], 50)
+        # Uma troca de versão por lote (a do on_commit não roda dentro do TestCase)
+        self.assertEqual(trocar_versao.call_count, 2)
+        self.assertEqual(len(consultas_poucas), len(consultas_muitas))
+
+    def test_cancelar_lote_sem_filtro(self):
+        self.client.post(self.list_url, self._payload(self.produtos[:1]), format="json")
+
+        response = self.client.post(reverse("venda-cancelar-lote"), {}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Venda.objects.count(), 1)
+
+    # LIMITE VALE PARA A SELEÇÃO DOS FILTROS, NÃO SÓ PARA OS IDS
+    def test_cancelar_lote_filtro_acima_do_limite(self):
+        for _ in range(3):
+            self.client.post(self.list_url, self._payload(self.produtos[:1]), format="json")
+
+        with mock.patch.object(VendaViewSet, "lote_max_vendas", 2):
+            response = self.client.post(reverse("venda-cancelar-lote"), {"data_inicio": "2000-01-01"}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("3 vendas", response.data["detail"])
+        self.assertEqual(Venda.objects.count(), 3)
+
+    # SIMULAÇÃO LISTA O QUE SERIA CANCELADO SEM ALTERAR NADA
+    def test_cancelar_lote_simular(self):
+        ids = [
+            self.client.post(self.list_url, self._payload(self.produtos[:1]), format="json").data["id"]
+            for _ in range(2)
+        ]
+
+        response = self.client.post(
+            reverse("venda-cancelar-lote"), {"data_inicio": "2000-01-01", "simular": True}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data["simulacao"], response.data["selecionadas"], response.data["canceladas"]),
+                         (True, 2, 0))
+        self.assertEqual(response.data["resultados"], [{"id": pk, "status": "a_cancelar"} for pk in ids])
+        self.assertEqual(Venda.objects.count(), 2)
+        self.produtos[0].refresh_from_db()
+        self.assertEqual(self.produtos[0].quantidade_estoque, 96)
+
+    # PRODUTO INEXISTENTE
+    def test_criar_venda_produto_inexistente(self):
+        payload = {"cliente": self.cliente.id, "itens": [{"produto": 999999, "quantidade": 1}]}
+
+        response = self.client.post(self.list_url, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Venda.objects.count(), 0)
+
+
+class MigracaoSubtotalTest(TransactionTestCase):
+    """Preenchimento de ItemVenda.subtotal pela migração 0002 em vendas já existentes"""
+    antes = [('vendas', '0001_initial'), ('produtos', '0004_codigo_barras_unico')]
+    depois = [('vendas', '0002_itemvenda_subtotal'), ('produtos', '0004_codigo_barras_unico')]
+
+    def setUp(self):
+        self.executor = MigrationExecutor(connection)
+        self.executor.migrate(self.antes)
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    # PREÇO E DESCONTO INTEIROS NÃO CAEM EM DIVISÃO INTEIRA NO SQLITE
+    def test_subtotal_preenchido(self):
+        apps = self.executor.loader.project_state(self.antes).apps
+        cliente = apps.get_model('clientes', 'Cliente').objects.create(nome="Cliente")
+        produto = apps.get_model('produtos', 'Produto').objects.create(descricao="Caneta", preco=Decimal("10.00"))
+        venda = apps.get_model('vendas', 'Venda').objects.create(cliente=cliente, total_venda=Decimal("25.50"))
+        ItemVendaAntigo = apps.get_model('vendas', 'ItemVenda')
+        ItemVendaAntigo.objects.create(venda=venda, produto=produto, quantidade=3,
+                                       preco_unitario=Decimal("10.00"), desconto_percentual=Decimal("15.00"))
+        ItemVendaAntigo.objects.create(venda=venda, produto=produto, quantidade=1,
+                                       preco_unitario=Decimal("3.33"), desconto_percentual=Decimal("0.00"))
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.depois)
+        ItemVendaNovo = executor.loader.project_state(self.depois).apps.get_model('vendas', 'ItemVenda')
+
+        self.assertEqual(
+            list(ItemVendaNovo.objects.order_by('id').values_list('subtotal', flat=True)),
+            [Decimal("25.50"), Decimal("3.33")],
+        )
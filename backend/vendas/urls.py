@@ -4,8 +4,9 @@ from rest_framework.routers import DefaultRouter
 from .views import VendaViewSet, ItemVendaViewSet
 
 router = DefaultRouter()
-router.register(r'', VendaViewSet, basename='venda')  # Rota vazia porque já está em /api/vendas/
+# "itens" precisa vir antes da rota vazia, senão /itens/ casa com o detalhe de venda (pk="itens")
 router.register(r'itens', ItemVendaViewSet, basename='item-venda')
+router.register(r'', VendaViewSet, basename='venda')  # Rota vazia porque já está em /api/vendas/
 
 urlpatterns = [
     path('', include(router.urls)),
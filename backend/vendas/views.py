@@ -1,24 +1,21 @@
+import tempfile
+from django.conf import settings
 from django.db import transaction
-from django.http import HttpResponse
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import parse_etags
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from io import BytesIO
-from datetime import datetime
+from .cancelamento import LimiteCancelamentoExcedido, cancelar_vendas
+from .exportacao import intervalo_datas, linhas_exportacao, gerar_csv, gerar_ndjson
 from .models import Venda, ItemVenda
+from .nota_fiscal import REPORTLAB_AVAILABLE, etag_nota_fiscal, obter_pdf, renderizar_html
+from .notas_lote import gravar_zip, renderizar_em_lote, selecionar_vendas
+from .pagination import VendaPagination, ItemVendaPagination
 from .serializers import VendaSerializer, VendaListSerializer, ItemVendaSerializer
 
-# Importações para PDF (só importa se reportlab estiver instalado)
-try:
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib import colors
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.lib.enums import TA_CENTER, TA_RIGHT
-    REPORTLAB_AVAILABLE = True
-except ImportError:
-    REPORTLAB_AVAILABLE = False
-
 class VendaViewSet(viewsets.ModelViewSet):
     """
     ViewSet para gerenciar vendas
@@ -27,8 +24,30 @@ class VendaViewSet(viewsets.ModelViewSet):
     - create: Cria uma nova venda com itens
     - update/patch: Bloqueado pelo serializer
     - destroy: Permite exclusão (configure conforme necessário)
+
+    A listagem é paginada por cursor (?cursor=...&page_size=...)
     """
     queryset = Venda.objects.select_related('cliente', 'vendedor').prefetch_related('itens__produto').order_by('-data_venda')
+    pagination_class = VendaPagination
+    export_chunk_size = 2000
+    lote_max_vendas = 5000
+
+    def get_queryset(self):
+        """
+        Na listagem os itens não são serializados: troca o prefetch por
+        contagens agregadas no próprio SELECT (uma consulta para a página toda)
+        """
+        if self.action == 'list':
+            return Venda.objects.select_related('cliente', 'vendedor').annotate(
+                quantidade_itens=Count('itens'),
+                quantidade_total=Coalesce(Sum('itens__quantidade'), 0),
+            ).order_by('-data_venda', '-id')
+        if self.action == 'cancelar':
+            return Venda.objects.all()
+        if self.action in ('nota_fiscal', 'nota_fiscal_html'):
+            # Itens são carregados à parte (PDF: só sem cache; HTML: em streaming)
+            return Venda.objects.select_related('cliente', 'vendedor')
+        return super().get_queryset()
     
     def get_serializer_class(self):
         """Usa serializer simplificado para listagem"""
@@ -46,11 +65,8 @@ class VendaViewSet(viewsets.ModelViewSet):
             serializer.is_valid(raise_exception=True)
             venda = serializer.save()
             
-            # O método calcular_total() já é chamado no serializer.create()
-            # mas podemos garantir que está atualizado
-            venda.refresh_from_db()
-            
-            # Retorna a venda criada com todos os dados
+            # O total já é calculado em memória no serializer.create() e os
+            # itens ficam em cache na instância, então não é preciso reler do banco
             output_serializer = self.get_serializer(venda)
             headers = self.get_success_headers(output_serializer.data)
             return Response(
@@ -73,11 +89,52 @@ class VendaViewSet(viewsets.ModelViewSet):
             status=status.HTTP_403_FORBIDDEN
         )
 
+    def destroy(self, request, *args, **kwargs):
+        """Exclusão equivale ao cancelamento: devolve o estoque e estorna os resumos"""
+        venda = self.get_object()
+
+        if not cancelar_vendas([venda.pk]):
+            return Response(
+                {"detail": "Venda já foi cancelada."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """
+        Exporta vendas com seus itens em streaming (memória constante)
+        GET /api/vendas/exportar/?formato=ndjson|csv&data_inicio=AAAA-MM-DD&data_fim=AAAA-MM-DD
+        - ndjson (padrão): uma venda por linha com os itens aninhados
+        - csv: um item por linha, repetindo os dados da venda
+        """
+        formato = request.query_params.get('formato', 'ndjson')
+        geradores = {
+            'ndjson': (gerar_ndjson, 'application/x-ndjson'),
+            'csv': (gerar_csv, 'text/csv; charset=utf-8'),
+        }
+        if formato not in geradores:
+            return Response(
+                {"detail": "Formato inválido. Use ndjson ou csv."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        gerador, content_type = geradores[formato]
+        linhas = linhas_exportacao(intervalo_datas(request.query_params), chunk_size=self.export_chunk_size)
+        response = StreamingHttpResponse(gerador(linhas), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="vendas.{formato}"'
+        return response
+
     @action(detail=True, methods=['get'])
     def nota_fiscal(self, request, pk=None):
         """
         Gera nota fiscal em PDF da venda
         GET /api/vendas/{id}/nota_fiscal/
+
+        O PDF renderizado fica em cache (chave: venda + versão do template) e a
+        resposta leva ETag, então downloads repetidos custam uma leitura de
+        cache ou um 304 com If-None-Match.
         """
         if not REPORTLAB_AVAILABLE:
             return Response(
@@ -86,321 +143,156 @@ class VendaViewSet(viewsets.ModelViewSet):
             )
         
         venda = self.get_object()
-        
-        # Cria buffer para o PDF
-        buffer = BytesIO()
-        
-        # Cria o documento PDF
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=30,
-            leftMargin=30,
-            topMargin=30,
-            bottomMargin=30
-        )
-        
-        # Container para elementos do PDF
-        elements = []
-        
-        # Estilos
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#2C3E50'),
-            spaceAfter=30,
-            alignment=TA_CENTER
-        )
-        
-        # Cabeçalho
-        elements.append(Paragraph("NOTA FISCAL DE VENDA", title_style))
-        elements.append(Spacer(1, 12))
-        
-        # Informações da empresa (substitua pelos seus dados)
-        empresa_info = [
-            ["<b>Empresa:</b>", "Sua Empresa LTDA"],
-            ["<b>CNPJ:</b>", "00.000.000/0001-00"],
-            ["<b>Endereço:</b>", "Rua Exemplo, 123 - Cidade/UF"],
-            ["<b>Telefone:</b>", "(45) 99999-9999"]
-        ]
-        
-        empresa_table = Table(empresa_info, colWidths=[100, 350])
-        empresa_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#2C3E50')),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ]))
-        elements.append(empresa_table)
-        elements.append(Spacer(1, 20))
-        
-        # Informações da venda
-        venda_info = [
-            ["<b>Nota Fiscal Nº:</b>", f"{venda.id:06d}"],
-            ["<b>Data:</b>", venda.data_venda.strftime("%d/%m/%Y %H:%M")],
-            ["<b>Cliente:</b>", venda.cliente.nome],
-            ["<b>Vendedor:</b>", venda.vendedor.username if venda.vendedor else "N/A"],
-        ]
-        
-        venda_table = Table(venda_info, colWidths=[150, 300])
-        venda_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#2C3E50')),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#ECF0F1')),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ]))
-        elements.append(venda_table)
-        elements.append(Spacer(1, 20))
-        
-        # Cabeçalho da tabela de itens
-        data = [['Item', 'Produto', 'Qtd', 'Preço Unit.', 'Desconto', 'Subtotal']]
-        
-        # Itens da venda
-        for idx, item in enumerate(venda.itens.all(), 1):
-            data.append([
-                str(idx),
-                item.produto.descricao,
-                str(item.quantidade),
-                f"R$ {item.preco_unitario:.2f}",
-                f"{item.desconto_percentual}%",
-                f"R$ {item.subtotal:.2f}"
-            ])
-        
-        # Totais
-        data.append(['', '', '', '', '<b>Desconto Geral:</b>', f"<b>{venda.desconto_percentual}%</b>"])
-        data.append(['', '', '', '', '<b>TOTAL:</b>', f"<b>R$ {venda.total_venda:.2f}</b>"])
-        
-        # Cria tabela de itens
-        items_table = Table(data, colWidths=[30, 200, 40, 80, 80, 80])
-        items_table.setStyle(TableStyle([
-            # Cabeçalho
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495E')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            
-            # Corpo
-            ('TEXTCOLOR', (0, 1), (-1, -3), colors.black),
-            ('ALIGN', (2, 1), (2, -3), 'CENTER'),  # Quantidade
-            ('ALIGN', (3, 1), (-1, -1), 'RIGHT'),  # Valores
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('GRID', (0, 0), (-1, -3), 0.5, colors.grey),
-            
-            # Totais
-            ('FONTNAME', (0, -2), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, -2), (-1, -1), 10),
-            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#ECF0F1')),
-            ('LINEABOVE', (0, -2), (-1, -2), 2, colors.black),
-            ('LINEABOVE', (0, -1), (-1, -1), 2, colors.black),
-        ]))
-        elements.append(items_table)
-        elements.append(Spacer(1, 30))
-        
-        # Rodapé
-        footer_style = ParagraphStyle(
-            'Footer',
-            parent=styles['Normal'],
-            fontSize=8,
-            textColor=colors.grey,
-            alignment=TA_CENTER
-        )
-        elements.append(Paragraph(
-            f"Documento gerado em {datetime.now().strftime('%d/%m/%Y às %H:%M')}",
-            footer_style
-        ))
-        
-        # Gera o PDF
-        doc.build(elements)
-        
-        # Retorna o PDF
-        buffer.seek(0)
-        response = HttpResponse(buffer.getvalue(), content_type='application/pdf')
+        etag = etag_nota_fiscal(venda)
+
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            if '*' in etags or etag in etags:
+                response = HttpResponseNotModified()
+                response['ETag'] = etag
+                return response
+
+        response = HttpResponse(obter_pdf(venda), content_type='application/pdf')
         response['Content-Disposition'] = f'attachment; filename="nota_fiscal_{venda.id:06d}.pdf"'
+        response['ETag'] = etag
         
         return response
 
+    @action(detail=False, methods=['post'])
+    def notas_fiscais_lote(self, request):
+        """
+        Gera as notas fiscais de várias vendas em paralelo e devolve um ZIP
+        POST /api/vendas/notas_fiscais_lote/
+        Body: {"ids": [1, 2, 3]} e/ou {"data_inicio": "AAAA-MM-DD", "data_fim": "AAAA-MM-DD"}
+        Para lotes maiores que lote_max_vendas use: manage.py gerar_notas_fiscais
+        """
+        if not REPORTLAB_AVAILABLE:
+            return Response(
+                {"detail": "ReportLab não está instalado. Execute: pip install reportlab"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        ids = request.data.get('ids') or []
+        if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+            return Response({"ids": "Informe uma lista de ids inteiros."}, status=status.HTTP_400_BAD_REQUEST)
+
+        filtros = intervalo_datas(request.data)
+        if not ids and not filtros:
+            return Response(
+                {"detail": "Informe ids ou um intervalo de datas."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        ids = selecionar_vendas(ids, filtros)
+        if not ids:
+            return Response({"detail": "Nenhuma venda encontrada."}, status=status.HTTP_404_NOT_FOUND)
+        if len(ids) > self.lote_max_vendas:
+            return Response(
+                {"detail": f"Lote com {len(ids)} vendas excede o limite de {self.lote_max_vendas}. "
+                           "Use o comando manage.py gerar_notas_fiscais."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        arquivo = tempfile.TemporaryFile()
+        gravar_zip(renderizar_em_lote(ids, workers=getattr(settings, 'NOTA_FISCAL_LOTE_WORKERS', None)), arquivo)
+        arquivo.seek(0)
+        return FileResponse(arquivo, as_attachment=True, filename='notas_fiscais.zip', content_type='application/zip')
+
     @action(detail=True, methods=['get'])
     def nota_fiscal_html(self, request, pk=None):
         """
         Gera nota fiscal em HTML da venda (para impressão)
         GET /api/vendas/{id}/nota_fiscal_html/
+        Templates em vendas/templates/vendas/nota_fiscal_html/, enviados em streaming
         """
         venda = self.get_object()
-        
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <title>Nota Fiscal #{venda.id:06d}</title>
-            <style>
-                body {{
-                    font-family: Arial, sans-serif;
-                    margin: 40px;
-                    color: #333;
-                }}
-                .header {{
-                    text-align: center;
-                    margin-bottom: 30px;
-                }}
-                .header h1 {{
-                    color: #2C3E50;
-                    margin-bottom: 10px;
-                }}
-                .info-box {{
-                    background: #ECF0F1;
-                    padding: 15px;
-                    margin-bottom: 20px;
-                    border-radius: 5px;
-                }}
-                .info-box p {{
-                    margin: 5px 0;
-                }}
-                table {{
-                    width: 100%;
-                    border-collapse: collapse;
-                    margin-bottom: 20px;
-                }}
-                th {{
-                    background: #34495E;
-                    color: white;
-                    padding: 10px;
-                    text-align: left;
-                }}
-                td {{
-                    padding: 8px;
-                    border-bottom: 1px solid #ddd;
-                }}
-                .text-right {{
-                    text-align: right;
-                }}
-                .text-center {{
-                    text-align: center;
-                }}
-                .total-row {{
-                    background: #ECF0F1;
-                    font-weight: bold;
-                }}
-                .footer {{
-                    text-align: center;
-                    margin-top: 30px;
-                    color: #7f8c8d;
-                    font-size: 12px;
-                }}
-                @media print {{
-                    body {{
-                        margin: 20px;
-                    }}
-                    .no-print {{
-                        display: none;
-                    }}
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>NOTA FISCAL DE VENDA</h1>
-                <p>Nota Fiscal Nº: {venda.id:06d}</p>
-            </div>
-            
-            <div class="info-box">
-                <h3>Informações da Empresa</h3>
-                <p><strong>Empresa:</strong> Sua Empresa LTDA</p>
-                <p><strong>CNPJ:</strong> 00.000.000/0001-00</p>
-                <p><strong>Endereço:</strong> Rua Exemplo, 123 - Cidade/UF</p>
-                <p><strong>Telefone:</strong> (45) 99999-9999</p>
-            </div>
-            
-            <div class="info-box">
-                <h3>Informações da Venda</h3>
-                <p><strong>Data:</strong> {venda.data_venda.strftime("%d/%m/%Y %H:%M")}</p>
-                <p><strong>Cliente:</strong> {venda.cliente.nome}</p>
-                <p><strong>Vendedor:</strong> {venda.vendedor.username if venda.vendedor else "N/A"}</p>
-            </div>
-            
-            <h3>Itens da Venda</h3>
-            <table>
-                <thead>
-                    <tr>
-                        <th>Item</th>
-                        <th>Produto</th>
-                        <th class="text-center">Qtd</th>
-                        <th class="text-right">Preço Unit.</th>
-                        <th class="text-right">Desconto</th>
-                        <th class="text-right">Subtotal</th>
-                    </tr>
-                </thead>
-                <tbody>
-        """
-        
-        # Adiciona itens
-        for idx, item in enumerate(venda.itens.all(), 1):
-            html += f"""
-                    <tr>
-                        <td>{idx}</td>
-                        <td>{item.produto.descricao}</td>
-                        <td class="text-center">{item.quantidade}</td>
-                        <td class="text-right">R$ {item.preco_unitario:.2f}</td>
-                        <td class="text-right">{item.desconto_percentual}%</td>
-                        <td class="text-right">R$ {item.subtotal:.2f}</td>
-                    </tr>
-            """
-        
-        html += f"""
-                    <tr class="total-row">
-                        <td colspan="5" class="text-right">Desconto Geral:</td>
-                        <td class="text-right">{venda.desconto_percentual}%</td>
-                    </tr>
-                    <tr class="total-row">
-                        <td colspan="5" class="text-right">TOTAL:</td>
-                        <td class="text-right">R$ {venda.total_venda:.2f}</td>
-                    </tr>
-                </tbody>
-            </table>
-            
-            <div class="footer">
-                <p>Documento gerado em {datetime.now().strftime('%d/%m/%Y às %H:%M')}</p>
-            </div>
-            
-            <div class="no-print" style="text-align: center; margin-top: 20px;">
-                <button onclick="window.print()" style="padding: 10px 20px; font-size: 16px; cursor: pointer;">🖨️ Imprimir</button>
-            </div>
-        </body>
-        </html>
-        """
-        
-        return HttpResponse(html)
+        itens = venda.itens.select_related('produto').order_by('id').iterator(chunk_size=500)
+        return StreamingHttpResponse(renderizar_html(venda, itens), content_type='text/html; charset=utf-8')
 
     @action(detail=True, methods=['post'])
     def cancelar(self, request, pk=None):
         """
         Endpoint customizado para cancelar uma venda
         POST /api/vendas/{id}/cancelar/
+        Devolve o estoque com um UPDATE agregado por produto e exclui a venda
+        (os itens saem junto, em cascata)
         """
         venda = self.get_object()
-        
-        with transaction.atomic():
-            # Devolve estoque dos produtos
-            for item in venda.itens.all():
-                produto = item.produto
-                produto.quantidade_estoque += item.quantidade
-                produto.save()
-            
-            # Ou exclui a venda
-            venda.delete()
+
+        if not cancelar_vendas([venda.pk]):
+            # Outro terminal cancelou entre a busca e a exclusão
+            return Response(
+                {"detail": "Venda já foi cancelada."},
+                status=status.HTTP_404_NOT_FOUND
+            )
             
         return Response(
             {"detail": "Venda cancelada com sucesso."},
             status=status.HTTP_200_OK
         )
 
+    @action(detail=False, methods=['post'])
+    def cancelar_lote(self, request):
+        """
+        Cancela várias vendas em uma única transação
+        POST /api/vendas/cancelar_lote/
+        Body: {"ids": [1, 2, 3]} e/ou filtros {"data_inicio", "data_fim", "cliente", "vendedor"}
+        e "simular": true para só listar o que seria cancelado.
+        Retorna o resultado de cada venda (cancelada / a_cancelar / nao_encontrada).
+        A seleção (ids e filtros) é limitada a lote_max_vendas vendas.
+        """
+        ids = request.data.get('ids')
+        if ids is not None and (not isinstance(ids, list) or not all(isinstance(i, int) for i in ids)):
+            return Response({"ids": "Informe uma lista de ids inteiros."}, status=status.HTTP_400_BAD_REQUEST)
+
+        filtros = intervalo_datas(request.data)
+        for campo in ('cliente', 'vendedor'):
+            if request.data.get(campo) is not None:
+                try:
+                    filtros[f'{campo}_id'] = int(request.data[campo])
+                except (TypeError, ValueError):
+                    return Response({campo: "Informe um id inteiro."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not ids and not filtros:
+            return Response(
+                {"detail": "Informe ids ou ao menos um filtro."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if ids and len(ids) > self.lote_max_vendas:
+            return Response(
+                {"detail": f"Máximo de {self.lote_max_vendas} vendas por cancelamento em lote."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        simular = request.data.get('simular') in (True, 'true', '1', 1)
+        try:
+            canceladas = cancelar_vendas(ids or None, filtros, limite=self.lote_max_vendas, simular=simular)
+        except LimiteCancelamentoExcedido as exc:
+            return Response(
+                {"detail": f"{exc} Restrinja os filtros ou use ids."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        selecionadas = len(canceladas)
+        situacao = "a_cancelar" if simular else "cancelada"
+        resultados = [{"id": pk, "status": situacao} for pk in canceladas]
+        if ids:
+            canceladas = set(canceladas)
+            resultados += [
+                {"id": pk, "status": "nao_encontrada"}
+                for pk in dict.fromkeys(ids) if pk not in canceladas
+            ]
+
+        return Response(
+            {
+                "simulacao": simular,
+                "selecionadas": selecionadas,
+                "canceladas": 0 if simular else selecionadas,
+                "resultados": resultados,
+            },
+            status=status.HTTP_200_OK
+        )
+
 
 class ItemVendaViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -408,9 +300,12 @@ class ItemVendaViewSet(viewsets.ReadOnlyModelViewSet):
     Itens só podem ser criados através da venda (nested)
     - list: Lista todos os itens
     - retrieve: Detalhe de um item específico
+
+    A listagem é paginada por cursor (?cursor=...&page_size=...)
     """
-    queryset = ItemVenda.objects.select_related('produto', 'venda', 'venda__cliente').order_by('-venda__data_venda')
+    queryset = ItemVenda.objects.select_related('produto', 'venda', 'venda__cliente').order_by('-venda__data_venda', '-id')
     serializer_class = ItemVendaSerializer
+    pagination_class = ItemVendaPagination
 
     def get_queryset(self):
         """
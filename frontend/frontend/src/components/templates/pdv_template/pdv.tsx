@@ -93,68 +93,23 @@ export default function PDVSalesFlow() {
     }
     setLoading(true);
     try {
-      let res = await fetch(`http://127.0.0.1:8000/api/produtos/?codigo_barras=${encodeURIComponent(codigoProduto)}`);
-      if (res.status === 404 || res.status === 405 || !res.ok) {
-        res = await fetch(`http://127.0.0.1:8000/api/produtos/?codigo_barras=${encodeURIComponent(codigoProduto)}`);
-      }
-
-      const json = await res.json();
-
-      if (json && typeof json === 'object' && !Array.isArray(json) && Object.values(json).some(v => typeof v === 'string' && v.includes('/produtos/'))) {
-        const listUrl = json.produtos || Object.values(json).find(v => typeof v === 'string' && v.includes('/produtos/'));
-        if (listUrl) {
-          const listRes = await fetch(listUrl);
-          if (!listRes.ok) throw new Error("Falha ao buscar lista de produtos (router-root).");
-          const lista = await listRes.json();
-          const found = Array.isArray(lista) ? lista.find((p: any) => String(p.codigo_barras) === codigoProduto) : null;
-          if (found) {
-            setNomeProduto(found.descricao || "");
-            setPreco(String(found.preco ?? "0"));
-            setEstoqueDisponivel(found.quantidade_estoque ?? null);
-            setProdutoIdEncontrado(found.id ?? null);
-            return;
-          } else {
-            alert("Produto não encontrado na lista retornada.");
-            setNomeProduto("");
-            setPreco("");
-            setEstoqueDisponivel(null);
-            setProdutoIdEncontrado(null);
-            return;
-          }
-        }
-      }
-
-      if (Array.isArray(json)) {
-        if (json.length === 0) {
-          alert("Produto não encontrado.");
-          setNomeProduto("");
-          setPreco("");
-          setEstoqueDisponivel(null);
-          setProdutoIdEncontrado(null);
-          return;
-        }
-        const p = json[0];
-        setNomeProduto(p.descricao || "");
-        setPreco(String(p.preco ?? "0"));
-        setEstoqueDisponivel(p.quantidade_estoque ?? null);
-        setProdutoIdEncontrado(p.id ?? null);
+      const res = await fetch(`http://127.0.0.1:8000/api/produtos/buscar-por-codigo-barras/?codigo_barras=${encodeURIComponent(codigoProduto)}`);
+      if (res.status === 404) {
+        alert("Produto não encontrado.");
+        setNomeProduto("");
+        setPreco("");
+        setEstoqueDisponivel(null);
+        setProdutoIdEncontrado(null);
         return;
       }
 
-      if (json && typeof json === 'object') {
-        const p = json;
-        setNomeProduto(p.descricao || "");
-        setPreco(String(p.preco ?? "0"));
-        setEstoqueDisponivel(p.quantidade_estoque ?? null);
-        setProdutoIdEncontrado(p.id ?? null);
-        return;
-      }
+      if (!res.ok) throw new Error(`Falha ao buscar produto (HTTP ${res.status}).`);
 
-      alert("Resposta inesperada do servidor ao buscar produto.");
-      setNomeProduto("");
-      setPreco("");
-      setEstoqueDisponivel(null);
-      setProdutoIdEncontrado(null);
+      const p = await res.json();
+      setNomeProduto(p.descricao || "");
+      setPreco(String(p.preco ?? "0"));
+      setEstoqueDisponivel(p.quantidade_estoque ?? null);
+      setProdutoIdEncontrado(p.id ?? null);
     } catch (err) {
       console.error("Erro pesquisarProduto:", err);
       alert("Erro ao pesquisar produto no servidor.");